@@ -0,0 +1,401 @@
+"""
+Synthetic data generators and offline fakes for the YouTube Data API and genai client.
+
+The fakes only implement the calls this project makes:
+- ``youtube.playlistItems().list(...).execute()``
+- ``youtube.videos().list(...).execute()``
+- ``youtube.channels().list(...).execute()``
+- ``https://www.youtube.com/feeds/videos.xml?channel_id=...`` (``feed_xml``)
+- ``client.aio.models.generate_content(...)``
+- ``client.caches.create / update(...)`` and ``client.aio.batches.create / get(...)``
+
+``AsyncDatabase`` lets ``database.VideoRepository`` run on mongomock.
+"""
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+
+from models import VideoYT
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_channels(n: int) -> List[Dict[str, str]]:
+    """YAML-config style channel dicts"""
+    return [
+        {
+            "channel_id": f"UC{i:022d}",
+            "channel_title": f"Channel {i:05d}",
+            "uploads_id": f"UU{i:022d}",
+        }
+        for i in range(n)
+    ]
+
+
+def make_videos(channel: Dict[str, str], n: int, seed: int = 0) -> List[VideoYT]:
+    """Newest-first uploads of a channel with realistic field values"""
+    rnd = random.Random(f"{seed}-{channel['channel_id']}")
+    published = EPOCH
+    videos: List[VideoYT] = []
+    for i in range(n):
+        published -= timedelta(hours=rnd.randint(1, 96))
+        video_id = f"{channel['channel_id'][-6:]}{i:05d}"
+        seconds = rnd.randint(30, 3 * 3600)
+        videos.append(VideoYT(
+            title=f"{channel['channel_title']} video #{i} " + "x" * rnd.randint(10, 60),
+            video_id=video_id,
+            published_at=published,
+            channel_id=channel["channel_id"],
+            channel_title=channel["channel_title"],
+            url=f"https://www.youtube.com/watch?v={video_id}",
+            duration=f"PT{seconds // 3600}H{seconds % 3600 // 60}M{seconds % 60}S",
+            duration_seconds=seconds,
+            seen=rnd.random() < 0.5,
+        ))
+    return videos
+
+
+def playlist_item(video: VideoYT) -> Dict[str, Any]:
+    """Shape of a playlistItems.list item restricted to PLAYLIST_ITEMS_FIELDS"""
+    return {
+        "snippet": {
+            "publishedAt": video.published_at.isoformat().replace("+00:00", "Z"),
+            "channelId": video.channel_id,
+            "channelTitle": video.channel_title,
+            "title": video.title,
+            "resourceId": {"videoId": video.video_id},
+        }
+    }
+
+
+class _Request:
+    def __init__(self, handler, kwargs):
+        self.handler = handler
+        self.kwargs = kwargs
+
+    def execute(self):
+        return self.handler(**self.kwargs)
+
+
+class _Resource:
+    def __init__(self, handler):
+        self.handler = handler
+
+    def list(self, **kwargs):
+        return _Request(self.handler, kwargs)
+
+
+class FakeYouTube:
+    """
+    In-memory YouTube Data API serving generated uploads playlists.
+
+    ``calls`` counts requests per method so benchmarks can report quota use.
+    """
+
+    def __init__(self, channels: List[Dict[str, str]], videos_per_channel: int, seed: int = 0):
+        self.calls: Dict[str, int] = {}
+        self.playlists: Dict[str, List[VideoYT]] = {}
+        self.videos_by_id: Dict[str, VideoYT] = {}
+        self.channels_by_id = {channel["channel_id"]: channel for channel in channels}
+        for channel in channels:
+            uploads = make_videos(channel, videos_per_channel, seed)
+            self.playlists[channel["uploads_id"]] = uploads
+            self.videos_by_id.update((video.video_id, video) for video in uploads)
+
+    def feed_xml(self, channel_id: str, limit: int = 15) -> bytes:
+        """Public Atom feed of a channel (15 latest uploads like YouTube)"""
+        self._count("feeds/videos.xml")
+        channel = self.channels_by_id[channel_id]
+        entries = "".join(
+            "<entry>"
+            f"<id>yt:video:{video.video_id}</id>"
+            f"<yt:videoId>{video.video_id}</yt:videoId>"
+            f"<yt:channelId>{video.channel_id}</yt:channelId>"
+            f"<title>{escape(video.title)}</title>"
+            f"<author><name>{escape(video.channel_title)}</name></author>"
+            f"<published>{video.published_at.isoformat()}</published>"
+            "</entry>"
+            for video in self.playlists[channel["uploads_id"]][:limit]
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>{escape(channel['channel_title'])}</title>{entries}</feed>"
+        ).encode()
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def playlistItems(self):
+        return _Resource(self._playlist_items)
+
+    def videos(self):
+        return _Resource(self._videos)
+
+    def channels(self):
+        return _Resource(self._channels)
+
+    def _playlist_items(self, playlistId, maxResults=5, pageToken=None, **kwargs):
+        self._count("playlistItems.list")
+        uploads = self.playlists.get(playlistId, [])
+        start = int(pageToken or 0)
+        end = start + maxResults
+        response = {"items": [playlist_item(video) for video in uploads[start:end]]}
+        if end < len(uploads):
+            response["nextPageToken"] = str(end)
+        return response
+
+    def _videos(self, id, **kwargs):
+        self._count("videos.list")
+        items = []
+        for video_id in id.split(","):
+            video = self.videos_by_id.get(video_id)
+            if video is None:
+                continue
+            items.append({
+                "id": video_id,
+                "contentDetails": {"duration": video.duration},
+                "snippet": {
+                    "channelId": video.channel_id,
+                    "channelTitle": video.channel_title,
+                    "title": video.title,
+                },
+            })
+        return {"items": items}
+
+    def _channels(self, id, **kwargs):
+        self._count("channels.list")
+        channel = self.channels_by_id[id]
+        return {"items": [{
+            "snippet": {"title": channel["channel_title"]},
+            "contentDetails": {"relatedPlaylists": {"uploads": channel["uploads_id"]}},
+        }]}
+
+
+def _request_key(method: str, kwargs: Dict[str, Any]) -> str:
+    return method + ":" + json.dumps(kwargs, sort_keys=True, default=str)
+
+
+class RecordingYouTube:
+    """Wrap a real API client and store every response, see ``ReplayYouTube``"""
+
+    def __init__(self, youtube, file_path: str):
+        self.youtube = youtube
+        self.file_path = Path(file_path)
+        self.responses: Dict[str, Any] = {}
+
+    def _wrap(self, method: str, resource):
+        recorder = self
+
+        class _RecordingResource:
+            def list(self, **kwargs):
+                request = resource.list(**kwargs)
+
+                def handler():
+                    response = request.execute()
+                    recorder.responses[_request_key(method, kwargs)] = response
+                    return response
+                return SimpleNamespace(execute=handler)
+        return _RecordingResource()
+
+    def playlistItems(self):
+        return self._wrap("playlistItems.list", self.youtube.playlistItems())
+
+    def videos(self):
+        return self._wrap("videos.list", self.youtube.videos())
+
+    def channels(self):
+        return self._wrap("channels.list", self.youtube.channels())
+
+    def save(self):
+        self.file_path.write_text(json.dumps(self.responses, indent=1), encoding="utf-8")
+
+
+class ReplayYouTube:
+    """Serve responses captured by ``RecordingYouTube``, unknown requests raise KeyError"""
+
+    def __init__(self, file_path: str):
+        self.responses: Dict[str, Any] = json.loads(Path(file_path).read_text(encoding="utf-8"))
+
+    def _resource(self, method: str):
+        return _Resource(lambda **kwargs: self.responses[_request_key(method, kwargs)])
+
+    def playlistItems(self):
+        return self._resource("playlistItems.list")
+
+    def videos(self):
+        return self._resource("videos.list")
+
+    def channels(self):
+        return self._resource("channels.list")
+
+
+@dataclass
+class FakeGenAIClient:
+    """
+    Stand-in for ``genai.Client`` returning canned text after ``latency`` seconds.
+
+    Requests with file_data (video mode) are billed ``video_seconds`` times
+    ``VIDEO_TOKENS_PER_SECOND`` input tokens, ``latency_per_ktok`` adds latency
+    per 1000 input tokens so long inputs are slower like with the real API.
+    ``requests`` keeps the keyword arguments of every call for assertions.
+
+    Cached contents are kept in ``cached_contents``, requests referencing one are
+    billed its tokens as ``cached_content_token_count``. Caches below
+    ``min_cache_tokens`` are refused like by the real API. Batch jobs finish
+    after ``batch_polls`` calls of ``batches.get``.
+    """
+    text: str = "Key Takeaways:\n- fake\n\nDetailed Summary: fake summary."
+    latency: float = 0.0
+    video_seconds: int = 0
+    latency_per_ktok: float = 0.0
+    min_cache_tokens: int = 0
+    batch_polls: int = 1
+    requests: List[Dict[str, Any]] = field(default_factory=list)
+    # cache name -> token count
+    cached_contents: Dict[str, int] = field(default_factory=dict)
+    batch_jobs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    # Gemini samples video at 1 fps, ~300 tokens per second with audio
+    VIDEO_TOKENS_PER_SECOND = 300
+
+    def __post_init__(self):
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self._generate_content),
+            batches=SimpleNamespace(create=self._create_batch, get=self._get_batch),
+        )
+        self.models = SimpleNamespace(generate_content=self._generate_content_sync)
+        self.caches = SimpleNamespace(create=self._create_cache, update=self._update_cache)
+
+    @staticmethod
+    def _text_tokens(value) -> int:
+        return len(json.dumps(value, default=str)) // 4 if value else 0
+
+    def _usage(self, kwargs) -> tuple:
+        """(prompt tokens, cached tokens) of a request"""
+        request_config = kwargs.get("config")
+        cached = self.cached_contents.get(getattr(request_config, "cached_content", None), 0)
+        tokens = cached + self._text_tokens(getattr(request_config, "system_instruction", None))
+        tokens += self._text_tokens({k: v for k, v in kwargs.items() if k != "config"})
+        if not isinstance(kwargs.get("contents"), str):
+            tokens += self.video_seconds * self.VIDEO_TOKENS_PER_SECOND
+        return tokens, cached
+
+    def _prompt_tokens(self, kwargs) -> int:
+        return self._usage(kwargs)[0]
+
+    def _response(self, kwargs):
+        self.requests.append(kwargs)
+        prompt_tokens, cached_tokens = self._usage(kwargs)
+        return SimpleNamespace(
+            text=self.text,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=len(self.text) // 4,
+                cached_content_token_count=cached_tokens,
+                total_token_count=prompt_tokens + len(self.text) // 4,
+            ),
+        )
+
+    def _create_cache(self, model: str, config):
+        tokens = self._text_tokens(config.system_instruction)
+        if tokens < self.min_cache_tokens:
+            raise ValueError(f"Cached content is too small: {tokens} < {self.min_cache_tokens} tokens")
+        name = f"cachedContents/{len(self.cached_contents)}"
+        self.cached_contents[name] = tokens
+        return SimpleNamespace(name=name, usage_metadata=SimpleNamespace(total_token_count=tokens))
+
+    def _update_cache(self, name: str, config):
+        if name not in self.cached_contents:
+            raise ValueError(f"{name} not found")
+        return SimpleNamespace(name=name)
+
+    def _batch_job(self, name: str):
+        job = self.batch_jobs[name]
+        done = job["polls"] >= self.batch_polls
+        return SimpleNamespace(
+            name=name,
+            state=SimpleNamespace(name="JOB_STATE_SUCCEEDED" if done else "JOB_STATE_RUNNING"),
+            error=None,
+            dest=SimpleNamespace(inlined_responses=job["responses"]) if done else None,
+        )
+
+    async def _create_batch(self, model: str, src, config=None):
+        name = f"batches/{len(self.batch_jobs)}"
+        responses = [
+            SimpleNamespace(
+                response=self._response({"model": request.model, "contents": request.contents, "config": request.config}),
+                metadata=request.metadata,
+                error=None,
+            )
+            for request in src
+        ]
+        self.batch_jobs[name] = {"polls": 0, "responses": responses}
+        return self._batch_job(name)
+
+    async def _get_batch(self, name: str, config=None):
+        self.batch_jobs[name]["polls"] += 1
+        return self._batch_job(name)
+
+    async def _generate_content(self, **kwargs):
+        latency = self.latency + self.latency_per_ktok * self._prompt_tokens(kwargs) / 1000
+        if latency:
+            await asyncio.sleep(latency)
+        return self._response(kwargs)
+
+    def _generate_content_sync(self, **kwargs):
+        return self._response(kwargs)
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = iter(cursor)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _AsyncCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self.collection.find(*args, **kwargs))
+
+    def with_options(self, **kwargs):
+        return _AsyncCollection(self.collection.with_options(**kwargs))
+
+    async def update_one(self, *args, **kwargs):
+        return self.collection.update_one(*args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return self.collection.bulk_write(*args, **kwargs)
+
+
+class AsyncDatabase:
+    """
+    Awaitable view of a sync (mongomock) database for ``VideoRepository``.
+
+    Only the collection calls the repository makes are wrapped.
+    """
+
+    def __init__(self, database):
+        self.database = database
+
+    def __getitem__(self, name: str) -> _AsyncCollection:
+        return _AsyncCollection(self.database[name])
+
+    def __getattr__(self, name: str) -> _AsyncCollection:
+        return _AsyncCollection(self.database[name])
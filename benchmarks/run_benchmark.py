@@ -0,0 +1,545 @@
+"""
+Reproducible benchmarks for the DB, update pipeline and TUI hot paths.
+
+Everything runs offline: MongoDB is mongomock (default) or a local ``mongod``,
+YouTube and Gemini are served by the fakes in ``fakes.py``.
+
+Usage:
+    uv run python benchmarks/run_benchmark.py --sizes 10 1000 --out bench_output.json
+    uv run python benchmarks/run_benchmark.py --backend mongod --mongo-uri mongodb://localhost:27017
+    uv run python benchmarks/run_benchmark.py --compare old.json new.json
+
+Real API responses can be recorded once and replayed offline afterwards:
+    uv run python benchmarks/run_benchmark.py --youtube-record yt_responses.json
+    uv run python benchmarks/run_benchmark.py --youtube-replay yt_responses.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Benchmarks never reach real services, config only needs the variables to be set
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("YT_API_KEY", "benchmark")
+os.environ.setdefault("GOOGLE_AI_API_KEY", "benchmark")
+
+import yaml
+
+import database
+import feeds
+import google_ai
+import run_update_yt_db
+import youtube
+from config import config
+from fakes import (
+    AsyncDatabase, FakeGenAIClient, FakeYouTube, RecordingYouTube, ReplayYouTube, make_channels, make_videos,
+)
+from metrics import metrics
+
+DEFAULT_SIZES = (10, 1_000, 100_000)
+VIDEOS_PER_CHANNEL = 50
+# Channels rendered one after another in the table benchmark
+TABLE_CHANNELS = 50
+BENCHMARK_DATABASE = "benchmark_youtube_data"
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+# Channels of record/replay runs, the update benchmark points config at generated ones
+YT_CONFIG_FILE = config.yt_config_file
+# Playlist pages only, feeds would go to the network
+REPLAY_ARGV = ["--backend", "api"]
+
+LATEST_20_PIPELINE = [
+    {"$sort": {"published_at": -1}},
+    {"$group": {"_id": "$channel_title", "latest_videos": {"$push": "$$ROOT"}}},
+    {"$project": {"latest_videos": {"$slice": ["$latest_videos", 20]}}},
+    {"$sort": {"_id": 1}},
+]
+
+
+def patch_mongomock():
+    """pymongo >= 4.11 passes `sort` to bulk update/replace builders, mongomock does not know it"""
+    from mongomock.collection import BulkOperationBuilder
+
+    for name in ("add_update", "add_replace"):
+        method = getattr(BulkOperationBuilder, name)
+        if getattr(method, "accepts_sort", False):
+            continue
+
+        def without_sort(self, *args, sort=None, method=method, **kwargs):
+            return method(self, *args, **kwargs)
+
+        without_sort.accepts_sort = True
+        setattr(BulkOperationBuilder, name, without_sort)
+
+
+def use_mongo_backend(backend: str, mongo_uri: str):
+    """Point DatabaseService at mongomock or a local mongod"""
+    config.mongo_database_name = BENCHMARK_DATABASE
+
+    if backend == "mongod":
+        config.mongo_uri = mongo_uri
+        return
+
+    import mongomock
+
+    patch_mongomock()
+    # One shared in-memory server, DatabaseService connects/disconnects per call
+    client = mongomock.MongoClient()
+    database.MongoClient = lambda *args, **kwargs: client
+    # mongomock has no asyncio client, the TUI repository gets an awaitable wrapper
+    database.VideoRepository.database = lambda self: AsyncDatabase(client[config.mongo_database_name])
+
+
+def raw_database():
+    return database.MongoClient(config.mongo_uri)[config.mongo_database_name]
+
+
+def reset_database():
+    db = raw_database()
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+
+
+def seed_latest_20(backend: str):
+    """Create the latest_20 view the TUI reads (materialized on mongomock)"""
+    db = raw_database()
+    db.drop_collection("latest_20")
+    if backend == "mongod":
+        db.create_collection("latest_20", viewOn=config.mongo_collection_name, pipeline=LATEST_20_PIPELINE)
+        return
+    docs = list(db[config.mongo_collection_name].aggregate(LATEST_20_PIPELINE))
+    if docs:
+        db.latest_20.insert_many(docs)
+
+
+def shape(size: int) -> tuple[int, int]:
+    """(channels, videos per channel) for a total number of videos"""
+    channels = max(1, size // VIDEOS_PER_CHANNEL)
+    return channels, max(1, size // channels)
+
+
+def measure(name: str, size: int, func: Callable[[], Any], repeat: int = 1, **extra) -> Dict[str, Any]:
+    metrics.reset()
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    result = {
+        "name": name,
+        "size": size,
+        "repeat": repeat,
+        "seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "per_item_us": min(timings) / max(size, 1) * 1e6,
+        "metrics": metrics.snapshot(),
+        **extra,
+    }
+    print(f"{name:<28} size={size:<7} {result['seconds'] * 1000:10.1f} ms")
+    return result
+
+
+def bench_database(size: int, backend: str, repeat: int) -> List[Dict[str, Any]]:
+    channels, per_channel = shape(size)
+    videos = [video for channel in make_channels(channels) for video in make_videos(channel, per_channel)]
+    service = database.DatabaseService()
+    service.ensure_indexes()
+
+    results = [
+        measure("save_videos_bulk.insert", size, lambda: service.save_videos_bulk(videos)),
+        measure("save_videos_bulk.refresh", size, lambda: service.save_videos_bulk(videos), repeat),
+    ]
+    seed_latest_20(backend)
+    results.append(measure("load_videos", size, service.load_videos, repeat))
+    return results
+
+
+# (name, config overrides) of the read path options compared by bench_read_path
+READ_PATH_OPTIONS = (
+    ("default", {}),
+    ("batch_size", {"mongo_read_batch_size": 1000}),
+    ("raw_bson", {"mongo_raw_bson_loads": True}),
+    ("zlib", {"mongo_compressors": "zlib"}),
+    ("snappy", {"mongo_compressors": "snappy"}),
+    ("zstd", {"mongo_compressors": "zstd"}),
+    ("zstd+raw_bson", {"mongo_compressors": "zstd", "mongo_raw_bson_loads": True, "mongo_read_batch_size": 1000}),
+)
+
+
+def wire_bytes_out() -> int:
+    """Bytes the server has sent so far (after compression), from serverStatus"""
+    return raw_database().client.admin.command("serverStatus")["network"]["physicalBytesOut"]
+
+
+def bench_read_path(size: int, backend: str, repeat: int) -> List[Dict[str, Any]]:
+    """
+    load_videos with each read path option: load time and bytes on the wire.
+
+    Wire bytes, compression and raw batches need ``--backend mongod``,
+    mongomock has no wire protocol and only runs the cursor options.
+    """
+    from pymongo import compression_support
+
+    available = {
+        "zlib": compression_support._have_zlib(),
+        "snappy": compression_support._have_snappy(),
+        "zstd": compression_support._have_zstd(),
+    }
+    results = []
+    for name, overrides in READ_PATH_OPTIONS:
+        compressor = overrides.get("mongo_compressors")
+        if backend != "mongod" and (compressor or overrides.get("mongo_raw_bson_loads")):
+            print(f"{'load_videos.' + name:<28} skipped (needs --backend mongod)")
+            continue
+        if compressor and not available[compressor]:
+            print(f"{'load_videos.' + name:<28} skipped ({compressor} not installed)")
+            continue
+
+        saved = {key: getattr(config, key) for key in overrides}
+        for key, value in overrides.items():
+            setattr(config, key, value)
+        try:
+            service = database.DatabaseService(keep_alive=True)
+            service.connect()
+            before = wire_bytes_out() if backend == "mongod" else 0
+            result = measure(f"load_videos.{name}", size, service.load_videos, repeat)
+            if backend == "mongod":
+                result["wire_bytes"] = (wire_bytes_out() - before) // repeat
+                print(f"{'':<28} {result['wire_bytes']} bytes on the wire per load")
+            service.close()
+        finally:
+            for key, value in saved.items():
+                setattr(config, key, value)
+        results.append(result)
+    return results
+
+
+def bench_update(size: int, repeat: int) -> List[Dict[str, Any]]:
+    channels, per_channel = shape(size)
+    channel_dicts = make_channels(channels)
+    fake = FakeYouTube(channel_dicts, per_channel)
+    youtube.build = lambda *args, **kwargs: fake
+    feeds.fetch_feed = lambda channel: list(feeds.iter_feed_entries(io.BytesIO(fake.feed_xml(channel.channel_id))))
+
+    with tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False, encoding="utf-8") as file:
+        yaml.dump({"channels": channel_dicts, "results": min(per_channel, 50)}, file, sort_keys=False)
+    config.yt_config_file = file.name
+
+    results = []
+    try:
+        for name, argv in (
+            ("run_update_yt_db.main", []),
+            ("run_update_yt_db.main.feed", ["--backend", "feed"]),
+        ):
+            fake.calls = {}
+            result = measure(name, size, lambda: run_update_yt_db.main(argv), repeat)
+            result["api_calls"] = fake.calls
+            results.append(result)
+    finally:
+        os.unlink(file.name)
+    return results
+
+
+def record_youtube(file_path: str):
+    """Run one update of the configured channels against the real API and store every response"""
+    build = youtube.build
+    recorder = None
+
+    def recording_build(*args, **kwargs):
+        nonlocal recorder
+        recorder = recorder or RecordingYouTube(build(*args, **kwargs), file_path)
+        return recorder
+
+    youtube.build = recording_build
+    config.yt_config_file = YT_CONFIG_FILE
+    try:
+        run_update_yt_db.main(REPLAY_ARGV)
+    finally:
+        youtube.build = build
+    if recorder is not None:
+        recorder.save()
+        print(f"Recorded {len(recorder.responses)} YouTube responses to {file_path}")
+
+
+def bench_replay(file_path: str, repeat: int) -> List[Dict[str, Any]]:
+    """Update of the configured channels served by responses from ``record_youtube``"""
+    replay = ReplayYouTube(file_path)
+    youtube.build = lambda *args, **kwargs: replay
+    config.yt_config_file = YT_CONFIG_FILE
+    reset_database()
+    return [measure(
+        "run_update_yt_db.main.replay", len(replay.responses), lambda: run_update_yt_db.main(REPLAY_ARGV), repeat,
+    )]
+
+
+def bench_feed_parser(size: int) -> List[Dict[str, Any]]:
+    body = (FIXTURES / "channel_feed.xml").read_bytes()
+    parses = max(1, size // 3)
+
+    def parse_all():
+        for _ in range(parses):
+            for _ in feeds.iter_feed_entries(io.BytesIO(body)):
+                pass
+
+    return [measure("feeds.iter_feed_entries", size, parse_all)]
+
+
+def bench_ai(size: int) -> List[Dict[str, Any]]:
+    fake = FakeGenAIClient()
+    google_ai.genai.Client = lambda *args, **kwargs: fake
+    calls = min(size, 100)
+
+    async def summarize_all():
+        await asyncio.gather(*(google_ai.get_summary_url(f"https://youtu.be/{i:011d}", i) for i in range(calls)))
+
+    results = [measure("get_summary_url", calls, lambda: asyncio.run(summarize_all()))]
+    return results + bench_summary_modes() + bench_summary_cache(calls)
+
+
+def bench_summary_cache(calls: int) -> List[Dict[str, Any]]:
+    """Video summaries with instructions sent per request, from the context cache and as one batch job (inline instructions)"""
+    videos = make_videos(make_channels(1)[0], calls)
+    for video in videos:
+        video.duration_seconds = 0
+
+    async def interactive(fake):
+        return await asyncio.gather(*(google_ai.summarize_video(video, fake) for video in videos))
+
+    async def batch(fake):
+        return list((await google_ai.summarize_batch(videos, fake)).values())
+
+    results = []
+    context_cache = config.ai_context_cache
+    poll_s = config.ai_batch_poll_s
+    try:
+        for name, caching, run in (("no_cache", False, interactive), ("cache", True, interactive), ("batch", False, batch)):
+            config.ai_context_cache = caching
+            config.ai_batch_poll_s = 0
+            google_ai.instruction_cache.reset()
+            fake = FakeGenAIClient(latency=0.01, video_seconds=60)
+            summaries: Dict[str, List] = {}
+
+            def run_once():
+                summaries["results"] = asyncio.run(run(fake))
+
+            result = measure(f"summarize_video.{name}", calls, run_once)
+            done = summaries["results"]
+            storage_usd = google_ai.instruction_cache.storage_usd
+            result.update(
+                input_tokens=sum(r.input_tokens for r in done),
+                cached_tokens=sum(r.cached_tokens for r in done),
+                cost_usd=sum(r.cost_usd for r in done) + storage_usd,
+                saved_usd=sum(r.saved_usd for r in done) - storage_usd,
+            )
+            print(f"{'':<28} {result['input_tokens']} input ({result['cached_tokens']} cached) tokens, "
+                  f"${result['cost_usd']:.4f} (${result['saved_usd']:.4f} saved)")
+            results.append(result)
+    finally:
+        config.ai_context_cache = context_cache
+        config.ai_batch_poll_s = poll_s
+        google_ai.instruction_cache.reset()
+    return results
+
+
+def bench_summary_modes() -> List[Dict[str, Any]]:
+    """Video vs transcript map-reduce summary of one 40 minute video, latency and tokens per mode"""
+    transcript = (FIXTURES / "transcript_long.txt").read_text(encoding="utf-8")
+    video = make_videos(make_channels(1)[0], 1)[0]
+    video.duration_seconds = 40 * 60
+
+    results = []
+    for mode in ("video", "transcript"):
+        fake = FakeGenAIClient(latency=0.05, video_seconds=video.duration_seconds, latency_per_ktok=0.002)
+        provider = (lambda video_id: transcript) if mode == "transcript" else (lambda video_id: None)
+        summary = {}
+
+        def run():
+            summary["result"] = asyncio.run(google_ai.summarize_video(video, fake, provider))
+
+        result = measure(f"summarize_video.{mode}", 1, run)
+        summary_result = summary["result"]
+        result.update(
+            mode=summary_result.mode,
+            requests=summary_result.requests,
+            input_tokens=summary_result.input_tokens,
+            output_tokens=summary_result.output_tokens,
+        )
+        print(f"{'':<28} {summary_result.requests} requests, {summary_result.input_tokens} input / "
+              f"{summary_result.output_tokens} output tokens")
+        results.append(result)
+    return results
+
+
+def bench_tui(size: int) -> List[Dict[str, Any]]:
+    from main import MyApp
+    from widgets.data_table import CustomDataTable
+    from widgets.list_view import CustomListView
+
+    results: List[Dict[str, Any]] = []
+
+    async def run():
+        app = MyApp()
+        async with app.run_test(size=(200, 60)) as pilot:
+            await pilot.pause()
+            list_view = app.query_one(CustomListView)
+            data_table = app.query_one(CustomDataTable)
+            channels = app.store.channel_names()[:TABLE_CHANNELS]
+
+            start = time.perf_counter()
+            list_view.update_data()
+            await pilot.pause()
+            results.append(timed_result("CustomListView.update_data", len(app.store.channels), start))
+
+            start = time.perf_counter()
+            for channel in channels:
+                data_table.update_table(channel)
+                await pilot.pause()
+            results.append(timed_result("CustomDataTable.update_table", len(channels), start))
+
+            # j presses through the channel list, neighbours are prefetched between presses
+            list_view.focus()
+            list_view.index = 0
+            await app.workers.wait_for_complete()
+            start = time.perf_counter()
+            for _ in channels:
+                await pilot.press("j")
+                await pilot.pause()
+            results.append(timed_result("CustomListView.scroll", len(channels), start))
+
+            # Key repeat: presses arrive faster than the debounce, only the final channel renders
+            list_view.index = 0
+            await pilot.pause(config.highlight_debounce_s * 2)
+            shows = metrics.snapshot().get("ui.show", {}).get("count", 0)
+            start = time.perf_counter()
+            await pilot.press(*["j"] * len(channels))
+            await pilot.pause(config.highlight_debounce_s * 2)
+            result = timed_result("CustomListView.scroll_burst", len(channels), start)
+            result["renders"] = result["metrics"]["ui.show"]["count"] - shows
+            results.append(result)
+
+            # Seen toggles restyle one row and one badge through store events, no table rebuild
+            data_table.focus()
+            await pilot.pause()
+            toggles = min(len(data_table.videos), 20)
+            start = time.perf_counter()
+            for _ in range(toggles):
+                await pilot.press("t", "j")
+            await app.workers.wait_for_complete()
+            results.append(timed_result("CustomDataTable.toggle_seen", toggles, start))
+
+    def timed_result(name: str, n: int, start: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28} size={size:<7} {elapsed * 1000:10.1f} ms  ({n} items)")
+        return {
+            "name": name,
+            "size": size,
+            "items": n,
+            "repeat": 1,
+            "seconds": elapsed,
+            "mean_seconds": elapsed,
+            "per_item_us": elapsed / max(n, 1) * 1e6,
+            "metrics": metrics.snapshot(),
+        }
+
+    metrics.reset()
+    asyncio.run(run())
+    return results
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    use_mongo_backend(args.backend, args.mongo_uri)
+    results: List[Dict[str, Any]] = []
+
+    for size in args.sizes:
+        print(f"--- size {size} ---")
+        reset_database()
+        results += bench_database(size, args.backend, args.repeat)
+        results += bench_read_path(size, args.backend, args.repeat)
+        results += bench_tui(size)
+        reset_database()
+        results += bench_update(size, args.repeat)
+        results += bench_feed_parser(size)
+        results += bench_ai(size)
+
+    if args.youtube_replay:
+        results += bench_replay(args.youtube_replay, args.repeat)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "sizes": args.sizes,
+        },
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    """Print per-benchmark ratios, return 1 if anything got slower than threshold"""
+    def load(path):
+        with open(path, encoding="utf-8") as file:
+            return {(r["name"], r["size"]): r for r in json.load(file)["results"]}
+
+    old, new = load(old_path), load(new_path)
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key]["seconds"] / old[key]["seconds"] if old[key]["seconds"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:<28} size={key[1]:<7} {old[key]['seconds'] * 1000:10.1f} -> {new[key]['seconds'] * 1000:10.1f} ms  x{ratio:.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run offline performance benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Total videos per run")
+    parser.add_argument("--backend", choices=("mongomock", "mongod"), default="mongomock")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017", help="Used with --backend mongod")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of idempotent benchmarks, best is reported")
+    parser.add_argument("--out", default="bench_output.json", help="Machine-readable results file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio in --compare")
+    parser.add_argument(
+        "--youtube-record", metavar="FILE",
+        help="Update the channels of the YAML config once against the real API, save its responses and exit",
+    )
+    parser.add_argument("--youtube-replay", metavar="FILE", help="Also benchmark an update served from a recording")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    # Keep per-call INFO logs out of the timings
+    logging.disable(logging.INFO)
+
+    if args.youtube_record:
+        use_mongo_backend(args.backend, args.mongo_uri)
+        record_youtube(args.youtube_record)
+        return
+
+    report = run_benchmarks(args)
+    with open(args.out, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, default=str)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
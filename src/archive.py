@@ -0,0 +1,164 @@
+"""
+Archival of old seen videos so the hot ``videos`` collection stays bounded.
+
+Each channel keeps its ``keep_newest`` newest videos and everything published
+in the last ``keep_days`` days (YAML defaults, overridable per channel), and
+never fewer than the newest that a routine fetch reads again (see
+``refetch_window``). Older seen videos are moved in batches to an archive: a
+zstd-compressed MongoDB collection or one ``<channel_id>.jsonl.gz`` file per
+channel. Archived videos stay searchable with ``archive --search``.
+
+Backfills read further back: ``DatabaseService.save_videos_bulk`` skips videos
+found in the MongoDB archive, so they don't come back as unseen. The JSON Lines
+archive is not visible to it, backfilled videos reappear in the hot collection.
+"""
+import argparse
+import gzip
+import logging
+import os
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from bson import json_util
+
+from config import config
+from database import DatabaseService, video_from_doc
+from feeds import FEED_ENTRIES
+from models import VideoYT, YTChannel, YTConfig
+
+
+def refetch_window(ytconfig: YTConfig) -> int:
+    """
+    Newest uploads per channel that routine fetches read again: a default
+    update run (``results``), the feed backend (the whole feed) and the
+    first scheduler poll of a channel (one page).
+    """
+    return max(ytconfig.results, FEED_ENTRIES, config.scheduler_page_size)
+
+
+@dataclass
+class RetentionPolicy:
+    keep_newest: int | None = None
+    keep_days: int | None = None
+
+    @classmethod
+    def for_channel(cls, channel: YTChannel, ytconfig: YTConfig) -> 'RetentionPolicy':
+        keep_newest = channel.keep_newest if channel.keep_newest is not None else ytconfig.keep_newest
+        keep_days = channel.keep_days if channel.keep_days is not None else ytconfig.keep_days
+        if keep_newest is None and keep_days is None:
+            return cls()
+        # Never archive what a routine fetch reads again, it would come back as unseen
+        keep_newest = max(keep_newest or 0, refetch_window(ytconfig))
+        return cls(keep_newest, keep_days)
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep_newest is not None or self.keep_days is not None
+
+    def older_than(self, now: datetime) -> datetime | None:
+        return None if self.keep_days is None else now - timedelta(days=self.keep_days)
+
+
+class MongoArchive:
+    """Archive in a compressed collection next to the hot one"""
+
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+        self.db_service.ensure_archive_collection()
+
+    def write(self, channel_id: str, docs: List[Dict]):
+        self.db_service.archive_videos(docs)
+
+    def search(self, text: str, channel_id: str | None = None, limit: int = 100) -> List[VideoYT]:
+        return self.db_service.search_archive(text, channel_id, limit)
+
+
+class JsonlArchive:
+    """Archive in local gzip-compressed JSON Lines files, one per channel"""
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or config.archive_dir
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, channel_id: str) -> str:
+        return os.path.join(self.directory, f"{channel_id}.jsonl.gz")
+
+    def write(self, channel_id: str, docs: List[Dict]):
+        # Appending adds a gzip member, concatenated members read back as one stream
+        with gzip.open(self.path(channel_id), "at", encoding="utf-8") as file:
+            file.writelines(json_util.dumps(doc) + "\n" for doc in docs)
+
+    def search(self, text: str, channel_id: str | None = None, limit: int = 100) -> List[VideoYT]:
+        if channel_id is not None:
+            paths = [self.path(channel_id)]
+        else:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".jsonl.gz")]
+
+        # A batch written again after an interrupted run is stored twice, keep one
+        found: Dict[str, VideoYT] = {}
+        field_names = {f.name for f in fields(VideoYT)}
+        text = text.casefold()
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    doc = json_util.loads(line)
+                    if text in doc.get("title", "").casefold():
+                        found[doc["video_id"]] = video_from_doc({k: v for k, v in doc.items() if k in field_names})
+        return sorted(found.values(), key=lambda video: video.published_at, reverse=True)[:limit]
+
+
+def archive_channel(
+    channel: YTChannel,
+    policy: RetentionPolicy,
+    db_service: DatabaseService,
+    archive: MongoArchive | JsonlArchive,
+    batch_size: int | None = None,
+) -> int:
+    """Move a channel's videos outside the retention window to the archive, returns number moved"""
+    batch_size = batch_size or config.mongo_write_batch_size
+    older_than = policy.older_than(datetime.now(timezone.utc))
+    moved = 0
+    while docs := db_service.find_archive_candidates(channel.channel_id, policy.keep_newest, older_than, batch_size):
+        # Archive first: an interruption leaves a duplicate, never a lost video
+        archive.write(channel.channel_id, docs)
+        moved += db_service.delete_videos([doc["video_id"] for doc in docs])
+    return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old seen videos out of the hot collection")
+    parser.add_argument(
+        "--backend", choices=("mongo", "jsonl"), default="mongo",
+        help=f"Archive to the {config.mongo_archive_collection_name} collection or to {config.archive_dir}/*.jsonl.gz",
+    )
+    parser.add_argument("--search", metavar="TEXT", help="Search archived video titles instead of archiving")
+    parser.add_argument("--channel-id", default=None, help="Limit archiving / search to one channel")
+    args = parser.parse_args(argv)
+
+    db_service = DatabaseService()
+    archive = MongoArchive(db_service) if args.backend == "mongo" else JsonlArchive()
+
+    if args.search:
+        for video in archive.search(args.search, args.channel_id):
+            print(f"{video.published_at:%Y-%m-%d}  {video.channel_title}  {video.title}  {video.url}")
+        return
+
+    ytconfig = YTConfig.from_yaml(config.yt_config_file)
+    total = 0
+    for channel in map(YTChannel.from_dict, ytconfig.channels):
+        if args.channel_id and channel.channel_id != args.channel_id:
+            continue
+        policy = RetentionPolicy.for_channel(channel, ytconfig)
+        if policy.enabled:
+            moved = archive_channel(channel, policy, db_service, archive)
+            if moved:
+                logging.info(f"Archived {moved} videos of {channel.channel_title}")
+            total += moved
+    logging.info(f"Archive completed: {total} videos moved")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,13 +11,56 @@ class Config:
     mongo_uri: str = os.getenv("MONGO_URI")
     mongo_database_name: str = "youtube_data"
     mongo_collection_name: str = "videos"
+    mongo_write_batch_size: int = 500
+    # Wire compression offered to the server in order of preference, e.g. "zstd,snappy,zlib" for a remote
+    # cluster. zstd and snappy come with the ``compression`` extra; missing ones are skipped
+    mongo_compressors: str = os.getenv("MONGO_COMPRESSORS", "")
+    mongo_zlib_compression_level: int = 6
+    # Documents per cursor batch of bulk reads, 0 = server default (101 first, then up to 16 MiB per getMore)
+    mongo_read_batch_size: int = int(os.getenv("MONGO_READ_BATCH_SIZE", "0"))
+    # Read preference of read-only TUI queries. The TUI re-reads right after its own writes (seen, summaries),
+    # which a lagging secondary may not have yet, so only use "secondaryPreferred" if that is acceptable
+    mongo_tui_read_preference: str = os.getenv("MONGO_TUI_READ_PREFERENCE", "primary")
+    # Decode load_videos from raw BSON batches (find_raw_batches) instead of iterating a document cursor
+    mongo_raw_bson_loads: bool = os.getenv("MONGO_RAW_BSON_LOADS", "0") == "1"
     
     # UI settings
-    column_headers: tuple = ("Time", "Title", "Duration")
+    # (label, column key) pairs, column key matches the VideoYT attribute
+    column_headers: tuple = (
+        ("Published At", "published_at"),
+        ("Title", "title"),
+        ("Duration", "duration"),
+        ("Seen", "seen"),
+        ("Has summary", "has_summary"),
+    )
+    # "Short & unseen" table filter threshold
+    short_video_max_seconds: int = 20 * 60
+    # Rows per page of the cross-channel unseen feed
+    feed_page_size: int = 100
+    # Summary text kept with listed videos / full summaries cached for SummaryScreen
+    summary_preview_chars: int = 200
+    summary_cache_size: int = 64
+    # Quiet time after the last list cursor move before the table follows it
+    highlight_debounce_s: float = 0.08
+    # Channels above/below the list cursor prepared in background, LRU size of prepared tables
+    prefetch_neighbours: int = 1
+    prefetch_cache_size: int = 32
+    # videos.list calls (1 quota unit, up to 50 videos each) prefetch may spend
+    # on missing durations per TUI session, 0 = never fetch durations in prefetch
+    prefetch_duration_quota: int = 20
     
     # Data settings
     default_pickle_file: str = "data.pkl"
     connection_timeout_ms: int = 5000
+    # Deadline of each database call made from the TUI, a stalled cluster fails the call instead of hanging
+    db_deadline_s: float = 5.0
+
+    # Offline-first mode: TUI reads/writes the local SQLite store, MongoDB is synced in background
+    offline_first: bool = os.getenv("OFFLINE_FIRST", "0") == "1"
+    local_store_path: str = "data.sqlite3"
+    # Seconds a write waits for another thread's transaction before failing
+    local_store_busy_timeout_s: float = 10.0
+    sync_interval_s: int = 60
 
     # YT API settings
     youtube_api_key: str = os.getenv("YT_API_KEY")
@@ -27,11 +70,91 @@ class Config:
     # GOOGLE AI API KEY
     google_ai_api_key: str = os.getenv("GOOGLE_AI_API_KEY")
 
+    # Videos at least this long are summarized from their transcript (map-reduce) instead of as video
+    transcript_min_seconds: int = 10 * 60
+    transcript_chunk_chars: int = 12_000
+    transcript_map_concurrency: int = 8
+
+    # Batch summarization (summarize command), prices are only used for the cost report
+    ai_concurrency: int = 4
+    ai_summary_flush_size: int = 20
+    ai_checkpoint_file: str = "summarize_checkpoint.jsonl"
+    ai_input_usd_per_mtok: float = 0.5
+    ai_output_usd_per_mtok: float = 3.0
+    ai_cached_input_usd_per_mtok: float = 0.05
+    # Rate limited (429) or overloaded (503) summaries are retried with exponential backoff
+    ai_max_attempts: int = 5
+    ai_retry_base_s: float = 5.0
+    ai_retry_max_s: float = 120.0
+
+    # The fixed summary instructions are registered once as cached content and reused until the TTL runs out
+    ai_context_cache: bool = os.getenv("AI_CONTEXT_CACHE", "1") == "1"
+    ai_cache_ttl_s: int = 60 * 60
+    # Cached content is billed for storage per hour it lives, deducted from the reported savings
+    ai_cache_storage_usd_per_mtok_hour: float = 1.0
+    # summarize --batch: video mode summaries go through the Batch API, cheaper but can take hours
+    ai_batch_size: int = 100
+    ai_batch_poll_s: float = 30.0
+    ai_batch_price_ratio: float = 0.5
+
+    # Durable job queue drained by the `jobs` workers. With JOB_QUEUE=1 the TUI enqueues
+    # duration lookups and AI summaries instead of running them in its own process
+    job_queue: bool = os.getenv("JOB_QUEUE", "0") == "1"
+    mongo_jobs_collection_name: str = "jobs"
+    job_concurrency: int = 4
+    # A running job is handed to another worker if its lease is not extended within this time
+    job_visibility_timeout_s: int = 5 * 60
+    job_max_attempts: int = 5
+    # Retry delay doubles per attempt from base up to max
+    job_retry_base_s: float = 10.0
+    job_retry_max_s: float = 60 * 60
+    # Idle workers and the TUI job status watch poll this often
+    job_poll_interval_s: float = 2.0
+    # Finished jobs are removed by a TTL index after this many days
+    job_retention_days: int = 7
+
+    # Archive of old seen videos: compressed MongoDB collection or *.jsonl.gz files per channel
+    mongo_archive_collection_name: str = "videos_archive"
+    archive_dir: str = "archive"
+
+    # Updater leases, one per shard of a fixed shard count so that updaters
+    # started with different --workers still exclude each other per channel
+    mongo_locks_collection_name: str = "locks"
+    lease_ttl_s: int = 10 * 60
+    update_shards: int = 64
+
+    # One-off data migrations already applied, see DatabaseService.run_migrations
+    mongo_migrations_collection_name: str = "migrations"
+
+    # Updater daemon scheduling
+    scheduler_min_interval_s: int = 5 * 60
+    scheduler_max_interval_s: int = 24 * 60 * 60
+    scheduler_polls_per_upload: int = 4
+    scheduler_jitter: float = 0.1
+    scheduler_history: int = 20
+    scheduler_page_size: int = 10
+    # Pages read to catch up to the last known upload, e.g. after downtime
+    scheduler_max_pages: int = 10
+
+    # Concurrent Atom feed downloads in the "feed" fetch backend
+    feed_fetch_workers: int = 16
+
+    # WebSub push ingestion
+    websub_hub_url: str = "https://pubsubhubbub.appspot.com/subscribe"
+    websub_callback_url: str = os.getenv("WEBSUB_CALLBACK_URL", "")
+    websub_secret: str = os.getenv("WEBSUB_SECRET", "")
+    websub_host: str = "0.0.0.0"
+    websub_port: int = 8080
+    websub_lease_seconds: int = 10 * 24 * 60 * 60
+    # Larger notifications are refused before their body is read
+    websub_max_body_bytes: int = 1024 * 1024
+    websub_max_headers: int = 100
+
     # YT channel config
     yt_config_file: str = "./src/yt_config.yaml"
 
     def __post_init__(self):
-        if not self.mongo_uri:
+        if not self.mongo_uri and not self.offline_first:
             raise ValueError("MONGO_URI environment variable is not set.")
         if not self.youtube_api_key:
             raise ValueError("YT_API_KEY environment variable is not set.")
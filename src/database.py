@@ -1,102 +1,332 @@
+import asyncio
+from contextlib import asynccontextmanager
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
-from pymongo.errors import DuplicateKeyError
 from dataclasses import fields
-from typing import Dict, List
-from models import Video, VideoYT
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List
+from itertools import batched
+from models import Job, Video, VideoYT, BulkWriteStats
 from config import config
+from metrics import metrics
+from utils import parse_iso_duration, summary_preview
 import logging
+import re
 from textual.logging import TextualHandler
 
-from pymongo import AsyncMongoClient
-from pymongo.errors import DuplicateKeyError, BulkWriteError
+import bson
+import pymongo
+from bson import ObjectId
+from pymongo import AsyncMongoClient, ReadPreference, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 
 logging.basicConfig(
     level=logging.INFO,
     handlers=[TextualHandler()],
     )
 
-class MongoDBAsyncClient:
+# Fields edited from the TUI, never overwritten by a refresh from YouTube
+USER_OWNED_FIELDS = ("seen", "summary", "has_summary", "summary_preview")
+
+def user_update(changes: Dict, modified_at: datetime | None = None) -> Dict:
+    """
+    Update document for user state changes.
+
+    ``version`` counts user state changes, ``field_modified_at.<field>`` records
+    when each field was last changed so offline clients can resolve conflicts
+    per field, ``updated_at`` tracks any change for sync pulls.
+    """
+    now = datetime.now(timezone.utc)
+    modified_at = modified_at or now
+    if "summary" in changes:
+        changes = {**changes, "summary_preview": summary_preview(changes["summary"])}
+    return {
+        "$set": {
+            **changes,
+            **{f"field_modified_at.{k}": modified_at for k in changes},
+            "updated_at": now,
+        },
+        "$inc": {"version": 1},
+    }
+
+def video_upsert(video: VideoYT) -> UpdateOne:
+    """
+    Build an upsert keyed on video_id that merges YouTube data with user state.
+
+    An update pipeline: user-owned fields keep their stored value (defaults
+    on insert) and ``updated_at`` only moves when a YouTube-owned field
+    changed, so refreshing unchanged videos modifies nothing.
+    """
+    doc = video.to_dict()
+    defaults = {k: doc.pop(k) for k in USER_OWNED_FIELDS}
+    defaults["version"] = 0
+
+    # Playlist pages carry no duration, keep the stored one unless we fetched it
+    if doc.get("duration") == "N/A":
+        defaults["duration"] = doc.pop("duration")
+        defaults["duration_seconds"] = doc.pop("duration_seconds")
+
+    # $literal: a title starting with "$" would otherwise be read as a field path
+    values = {k: {"$literal": v} for k, v in doc.items()}
+    unchanged = {"$and": [{"$eq": [f"${k}", value]} for k, value in values.items()]}
+    return UpdateOne(
+        {"video_id": video.video_id},
+        [{"$set": {
+            **values,
+            **{k: {"$ifNull": [f"${k}", {"$literal": v}]} for k, v in defaults.items()},
+            "updated_at": {"$cond": [unchanged, "$updated_at", {"$literal": datetime.now(timezone.utc)}]},
+        }}],
+        upsert=True,
+    )
+
+# Fields read for list and table views, summaries are fetched one at a time with get_summary
+LIST_FIELDS = {f.name for f in fields(VideoYT)} - {"summary"}
+
+def video_from_doc(doc: Dict) -> VideoYT:
+    """Build VideoYT from a stored document, parsing duration for pre-existing docs"""
+    video = VideoYT(**doc)
+    if video.duration_seconds is None and video.duration != "N/A":
+        video.duration_seconds = parse_iso_duration(video.duration)
+    return video
+
+def as_utc(dt: datetime) -> datetime:
+    """pymongo returns naive UTC datetimes unless tz_aware is set"""
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def channel_videos(item: Dict) -> List[VideoYT]:
+    """Videos of one latest_20 document"""
+    return [
+        video_from_doc({k: v for k, v in video.items() if k in LIST_FIELDS})
+        for video in item["latest_videos"]
+    ]
+
+def keyset_after(after: VideoYT) -> Dict:
+    """Filter for rows after ``after`` in (published_at, video_id) descending order"""
+    return {"$or": [
+        {"published_at": {"$lt": after.published_at}},
+        {"published_at": after.published_at, "video_id": {"$lt": after.video_id}},
+    ]}
+
+def page_find_args(
+    channel_id: str | None,
+    seen: bool | None = None,
+    max_duration_seconds: int | None = None,
+    after: VideoYT | None = None,
+    sort: str | None = None,
+    descending: bool = True,
+    limit: int | None = None,
+) -> Dict:
+    """
+    find() arguments of one page of list fields, shared by the sync and async reads.
+
+    Without ``sort`` the order is newest first with ``video_id`` as tie
+    breaker, the order ``after`` pages through.
+    """
+    query: Dict = {} if channel_id is None else {"channel_id": channel_id}
+    if seen is not None:
+        query["seen"] = seen
+    if max_duration_seconds is not None:
+        query["duration_seconds"] = {"$lte": max_duration_seconds}
+    if after is not None:
+        query |= keyset_after(after)
+    return {
+        "filter": query,
+        "projection": {name: 1 for name in LIST_FIELDS} | {"_id": 0},
+        "sort": [("published_at", -1), ("video_id", -1)] if sort is None else [(sort, -1 if descending else 1)],
+        "limit": limit or config.feed_page_size,
+    }
+
+# latest_20 documents without the full summaries
+LATEST_PROJECTION = {"latest_videos.summary": 0}
+
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+def client_options(deadline_s: float | None = None) -> Dict:
+    """Keyword arguments shared by the sync and async clients, wire compression from config"""
+    options: Dict = {
+        "serverSelectionTimeoutMS": config.connection_timeout_ms,
+        "server_api": ServerApi('1'),
+    }
+    if config.mongo_compressors:
+        options["compressors"] = config.mongo_compressors
+        options["zlibCompressionLevel"] = config.mongo_zlib_compression_level
+    if deadline_s is not None:
+        options["timeoutMS"] = int(deadline_s * 1000)
+    return options
+
+def tui_read(collection):
+    """Collection for read-only TUI queries, using ``config.mongo_tui_read_preference``"""
+    return collection.with_options(read_preference=READ_PREFERENCES[config.mongo_tui_read_preference])
+
+def read_options() -> Dict:
+    """find() options of bulk reads"""
+    return {"batch_size": config.mongo_read_batch_size} if config.mongo_read_batch_size else {}
+
+
+class DeadlineExceeded(TimeoutError):
+    """A database call did not finish within its deadline"""
+
+
+@asynccontextmanager
+async def deadline(seconds: float | None = None):
+    """
+    Bound a block of async database calls to ``seconds`` (``config.db_deadline_s``).
+
+    ``pymongo.timeout`` makes the driver and server give up (maxTimeMS),
+    ``asyncio.timeout`` also covers server selection and connection setup.
+    """
+    seconds = seconds or config.db_deadline_s
+    try:
+        with pymongo.timeout(seconds):
+            async with asyncio.timeout(seconds):
+                yield
+    except TimeoutError as e:
+        raise DeadlineExceeded(f"Database call exceeded {seconds} s deadline") from e
+    except PyMongoError as e:
+        if e.timeout:
+            raise DeadlineExceeded(f"Database call exceeded {seconds} s deadline") from e
+        raise
+
+
+class VideoRepository:
+    """
+    Asyncio access to the TUI's page queries and user state writes.
+
+    Channel lists are loaded with ``get_store().load_videos()`` in a
+    thread worker instead.
+
+    Every call takes a ``deadline_s`` (``config.db_deadline_s`` by default)
+    and is cancelled cleanly with the awaiting task, e.g. an exclusive
+    Textual worker replaced after the cursor moved. The client is created on
+    first use and bound to the running event loop.
+    """
+
     def __init__(self):
-        self.client = None
+        self.client: AsyncMongoClient | None = None
 
-    async def connect(self) -> AsyncMongoClient:
-        """Establish asynchronous MongoDB connection"""
-        logging.info(f"Connecting to MongoDB at {config.mongo_uri}...")
-        self.client = AsyncMongoClient(
-            config.mongo_uri, 
-            serverSelectionTimeoutMS=config.connection_timeout_ms, 
-            server_api=ServerApi('1')
-        )
-        await self.client.admin.command('ping')
-        logging.info("Successfully connected to MongoDB.")
-        return self.client
+    def database(self):
+        if self.client is None:
+            self.client = AsyncMongoClient(config.mongo_uri, **client_options())
+        return self.client[config.mongo_database_name]
+
+    def videos(self):
+        return self.database()[config.mongo_collection_name]
 
-    async def disconnect(self):
-        """Close asynchronous MongoDB connection"""
+    async def close(self):
         if self.client:
             await self.client.close()
-            logging.info("MongoDB connection closed.")
+            self.client = None
 
-    async def update_video_duration(self, video_id: str, duration: str):
-        """Update the duration of a video asynchronously"""
-        await self.connect()
-        
-        db = self.client[config.mongo_database_name]
-        video_collection = db[config.mongo_collection_name]
+    @metrics.instrument("repo.load_channel_page")
+    async def load_channel_page(
+        self,
+        channel_id: str | None,
+        limit: int | None = None,
+        after: VideoYT | None = None,
+        seen: bool | None = None,
+        max_duration_seconds: int | None = None,
+        sort: str | None = None,
+        descending: bool = True,
+        deadline_s: float | None = None,
+    ) -> List[VideoYT]:
+        """
+        One page of a channel (or of all channels for None), newest first or by ``sort``.
 
-        await video_collection.update_one(
-            {"video_id": video_id},
-            {"$set": {"duration": duration}},
-        )
+        Pass the last video of the previous page as ``after`` for the next one
+        (newest first order only).
+        """
+        find_args = page_find_args(channel_id, seen, max_duration_seconds, after, sort, descending, limit)
+        async with deadline(deadline_s):
+            cursor = tui_read(self.videos()).find(**find_args)
+            return [video_from_doc(doc) async for doc in cursor]
+
+    async def _update_user_state(self, video_id: str, changes: Dict, deadline_s: float | None):
+        async with deadline(deadline_s):
+            await self.videos().update_one({"video_id": video_id}, user_update(changes))
+
+    @metrics.instrument("repo.set_seen")
+    async def set_seen(self, video_id: str, seen: bool, deadline_s: float | None = None):
+        await self._update_user_state(video_id, {"seen": seen}, deadline_s)
+
+    @metrics.instrument("repo.set_duration")
+    async def set_duration(self, video_id: str, duration: str, deadline_s: float | None = None):
+        changes = {"duration": duration, "duration_seconds": parse_iso_duration(duration)}
+        await self._update_user_state(video_id, changes, deadline_s)
+
+    @metrics.instrument("repo.set_summary")
+    async def set_summary(self, video_id: str, summary: str, deadline_s: float | None = None):
+        await self._update_user_state(video_id, {"summary": summary, "has_summary": True}, deadline_s)
 
-        await self.disconnect()
 
 class DatabaseService:
-    def __init__(self):
+    def __init__(self, keep_alive: bool = False, deadline_s: float | None = None):
         self.client = None
+        # Reuse one pooled client across calls (long-running workers) instead of per-call connect
+        self.keep_alive = keep_alive
+        # Client-side timeout of every operation (timeoutMS), None = no limit for batch jobs
+        self.deadline_s = deadline_s
         
+    @metrics.instrument("db.connect")
     def connect(self) -> MongoClient:
         """Establish MongoDB connection"""
+        if self.keep_alive and self.client is not None:
+            return self.client
         logging.info(f"Connecting to MongoDB at {config.mongo_uri}...")
-        self.client = MongoClient(
-            config.mongo_uri, 
-            serverSelectionTimeoutMS=config.connection_timeout_ms, 
-            server_api=ServerApi('1')
-        )
+        self.client = MongoClient(config.mongo_uri, **client_options(self.deadline_s))
         self.client.admin.command('ping')
         logging.info("Successfully connected to MongoDB.")
         return self.client
         
     def disconnect(self):
         """Close MongoDB connection"""
+        if self.client and not self.keep_alive:
+            self.close()
+
+    def close(self):
+        """Close MongoDB connection, also when kept alive"""
         if self.client:
             self.client.close()
+            self.client = None
             logging.info("MongoDB connection closed.")
             
-    def load_videos(self) -> Dict[str, List[VideoYT]]:
-        """Load video data from MongoDB"""
+    @metrics.instrument("db.load_videos")
+    def load_videos(self, raw: bool | None = None) -> Dict[str, List[VideoYT]]:
+        """
+        Load video data from MongoDB.
+
+        With ``raw`` (``config.mongo_raw_bson_loads``) batches are fetched as
+        raw BSON and decoded in one call each, their size is recorded as bytes.
+        """
+        raw = config.mongo_raw_bson_loads if raw is None else raw
         self.connect()
-        
+
         db = self.client[config.mongo_database_name]
-        loaded_data = list(db.latest_20.find())
+        latest_20 = tui_read(db.latest_20)
+        if raw:
+            loaded_data = []
+            for batch in latest_20.find_raw_batches({}, projection=LATEST_PROJECTION, **read_options()):
+                metrics.add_bytes("db.load_videos", len(batch))
+                loaded_data += bson.decode_all(batch, latest_20.codec_options)
+        else:
+            loaded_data = list(latest_20.find({}, projection=LATEST_PROJECTION, **read_options()))
 
         data: dict[str, List[VideoYT]] = {}
-        field_names = {f.name for f in fields(VideoYT)}
 
         for item in loaded_data:
             channel_name: str = item["_id"]
-            videos: List[VideoYT] = []
-
-            for video in item["latest_videos"]:
-                filtered_data = {k: v for k, v in video.items() if k in field_names}
-                videos.append(VideoYT(**filtered_data))
-
-            data[channel_name] = videos
+            data[channel_name] = channel_videos(item)
             
         self.disconnect()
         return data
         
+    @metrics.instrument("db.update_video_seen_status")
     def update_video_seen_status(self, video_id, seen_status: bool):
         """Update the seen status of a video"""
         self.connect()
@@ -106,11 +336,12 @@ class DatabaseService:
         
         video_collection.update_one(
             {"video_id": video_id},
-            {"$set": {"seen": seen_status}},
+            user_update({"seen": seen_status}),
         )
         self.disconnect()
 
-    async def update_video_duration(self, video_id, duration: str):
+    @metrics.instrument("db.update_video_duration")
+    def update_video_duration(self, video_id, duration: str):
         """Update the duration of a video"""
         self.connect()
         
@@ -119,10 +350,14 @@ class DatabaseService:
 
         video_collection.update_one(
             {"video_id": video_id},
-            {"$set": {"duration": duration}},
+            user_update({
+                "duration": duration,
+                "duration_seconds": parse_iso_duration(duration),
+                }),
         )
         self.disconnect()
 
+    @metrics.instrument("db.update_video_summary")
     def update_video_summary(self, video_id, summary: str):
         """Update the summary of a video"""
         self.connect()
@@ -132,67 +367,693 @@ class DatabaseService:
         
         update_result = video_collection.update_one(
             {"video_id": video_id},
-            {"$set": {
+            user_update({
                 "summary": summary,
                 "has_summary": True
-                }},
+                }),
         )
         self.disconnect()
 
-    def save_videos(self, videos: list[VideoYT]):
-        """Save video data to MongoDB"""
+    @metrics.instrument("db.get_summary")
+    def get_summary(self, video_id: str) -> str:
+        """Full summary text of one video, empty if there is none"""
         self.connect()
 
         db = self.client[config.mongo_database_name]
         video_collection = db[config.mongo_collection_name]
 
-        for video in videos:
-            try:
-                video_collection.insert_one(video.to_dict())
-                print(f"Successfully saved video to MongoDB: {video.title} (ID: {video.video_id})")
-            except DuplicateKeyError:
-                print(f"Video already exists in MongoDB (ID: {video.video_id}). Skipping.")
-            except Exception as e:
-                print(f"An error occurred while saving video {video.title} to MongoDB: {e}")
+        doc = tui_read(video_collection).find_one({"video_id": video_id}, projection={"summary": 1, "_id": 0})
 
         self.disconnect()
+        return (doc or {}).get("summary") or ""
 
+    @metrics.instrument("db.save_summaries_bulk")
+    def save_summaries_bulk(self, summaries: Dict[str, str]) -> int:
+        """Store many summaries (video_id -> text) in one unordered bulk write"""
+        if not summaries:
+            return 0
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
 
-    def save_videos_bulk(self, videos: list[VideoYT]):
-        """Save video data to MongoDB using bulk insert"""
+        result = video_collection.bulk_write([
+            UpdateOne({"video_id": video_id}, user_update({"summary": summary, "has_summary": True}))
+            for video_id, summary in summaries.items()
+        ], ordered=False)
+
+        self.disconnect()
+        return result.modified_count
+
+    @metrics.instrument("db.find_unsummarized")
+    def find_unsummarized(
+        self,
+        channel_id: str | None = None,
+        published_after: datetime | None = None,
+        published_before: datetime | None = None,
+        max_duration_seconds: int | None = None,
+        limit: int = 0,
+    ) -> List[VideoYT]:
+        """Videos without a summary, newest first, optionally filtered by channel, date and duration"""
         self.connect()
-    
+
         db = self.client[config.mongo_database_name]
         video_collection = db[config.mongo_collection_name]
+
+        query: Dict = {"has_summary": False}
+        if channel_id is not None:
+            query["channel_id"] = channel_id
+        published: Dict = {}
+        if published_after is not None:
+            published["$gte"] = published_after
+        if published_before is not None:
+            published["$lt"] = published_before
+        if published:
+            query["published_at"] = published
+        if max_duration_seconds is not None:
+            query["duration_seconds"] = {"$lte": max_duration_seconds}
+
+        cursor = video_collection.find(
+            query,
+            projection={name: 1 for name in LIST_FIELDS} | {"_id": 0},
+            sort=[("published_at", -1)],
+            limit=limit,
+            **read_options(),
+        )
+        videos = [video_from_doc(doc) for doc in cursor]
+
+        self.disconnect()
+        return videos
+
+    def save_videos(self, videos: list[VideoYT]) -> BulkWriteStats:
+        """Save video data to MongoDB"""
+        return self.save_videos_bulk(videos)
+
+    def save_videos_bulk(self, videos: Iterable[VideoYT], batch_size: int | None = None) -> BulkWriteStats:
+        """
+        Upsert video data to MongoDB in bulk.
+
+        YouTube-owned fields are refreshed with ``$set`` while user-owned
+        fields (``seen``, ``summary``, ``has_summary``) are only written on
+        insert, so re-running an update is idempotent and never clobbers
+        user state.
+
+        ``videos`` may be any iterable (e.g. a generator from
+        ``youtube.iter_playlist_videos``); it is consumed in chunks of
+        ``batch_size`` so the whole list is never held in memory.
+
+        Videos already moved to the archive collection are skipped (counted
+        as unchanged), a backfill would otherwise bring them back as unseen.
+        """
+        batch_size = batch_size or config.mongo_write_batch_size
+        stats = BulkWriteStats()
+
+        self.connect()
     
-        if not videos:
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+        archive_collection = db[config.mongo_archive_collection_name]
+
+        for batch in batched(videos, batch_size):
+            archived = {
+                doc["video_id"] for doc in archive_collection.find(
+                    {"video_id": {"$in": [video.video_id for video in batch]}}, projection={"video_id": 1, "_id": 0},
+                )
+            }
+            stats.unchanged += len(archived)
+            operations = [video_upsert(video) for video in batch if video.video_id not in archived]
+            if not operations:
+                continue
+
+            try:
+                # Timed per batch: consuming ``videos`` may wait on the YouTube API
+                with metrics.timed("db.save_videos_bulk"):
+                    # ordered=False lets the server apply the rest of the batch on single failures
+                    result = video_collection.bulk_write(operations, ordered=False)
+                stats.add(result.bulk_api_result)
+
+            except BulkWriteError as e:
+                stats.add(e.details)
+                logging.warning(f"{len(e.details.get('writeErrors', []))} write errors occurred")
+
+            except Exception as e:
+                stats.errors += len(operations)
+                logging.error(f"An error occurred during bulk upsert: {e}")
+
+        if stats.total == 0:
             logging.info("No videos to save.")
+        else:
+            logging.info(f"Bulk upsert completed: {stats.inserted} inserted, "
+                        f"{stats.updated} updated, {stats.unchanged} unchanged")
+
+        self.disconnect()
+        return stats
+
+    @metrics.instrument("db.ensure_indexes")
+    def ensure_indexes(self):
+        """Create indexes used by the update and table filter/sort queries"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        video_collection.create_index("video_id", unique=True)
+        video_collection.create_index([("channel_id", 1), ("published_at", -1)])
+        # Serves filters like "unseen, under 20 minutes" per channel and sort by duration
+        video_collection.create_index([("channel_id", 1), ("seen", 1), ("duration_seconds", 1)])
+        # Cross-channel unseen feed, video_id makes the keyset cursor unique
+        video_collection.create_index([("seen", 1), ("published_at", -1), ("video_id", -1)])
+        # Incremental sync pulls, see find_changed_videos
+        video_collection.create_index("updated_at")
+        self.disconnect()
+
+    # One-off data migrations, recorded in the migrations collection once they ran
+    MIGRATIONS = ("backfill_duration_seconds", "backfill_summary_previews")
+
+    @metrics.instrument("db.run_migrations")
+    def run_migrations(self):
+        """Run the data migrations this database has not seen yet"""
+        self.connect()
+        migrations = self.client[config.mongo_database_name][config.mongo_migrations_collection_name]
+        done = {doc["_id"] for doc in migrations.find({}, projection={"_id": 1})}
+        self.disconnect()
+
+        for name in self.MIGRATIONS:
+            if name in done:
+                continue
+            updated = getattr(self, name)()
+            self.connect()
+            self.client[config.mongo_database_name][config.mongo_migrations_collection_name].update_one(
+                {"_id": name},
+                {"$set": {"finished_at": datetime.now(timezone.utc), "updated": updated}},
+                upsert=True,
+            )
             self.disconnect()
-            return
-    
-        # Convert videos to dictionaries
-        video_docs = [video.to_dict() for video in videos]
-        
+            logging.info(f"Migration {name} done: {updated} documents updated")
+
+    @metrics.instrument("db.backfill_duration_seconds")
+    def backfill_duration_seconds(self) -> int:
+        """Parse stored ISO durations of documents ingested before duration_seconds existed"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        cursor = video_collection.find(
+            {"duration_seconds": {"$exists": False}, "duration": {"$ne": "N/A"}},
+            projection={"video_id": 1, "duration": 1, "_id": 0},
+        )
+        updated = 0
+        for batch in batched(cursor, config.mongo_write_batch_size):
+            result = video_collection.bulk_write([
+                UpdateOne(
+                    {"video_id": doc["video_id"]},
+                    {"$set": {"duration_seconds": parse_iso_duration(doc.get("duration"))}},
+                )
+                for doc in batch
+            ], ordered=False)
+            updated += result.modified_count
+
+        self.disconnect()
+        return updated
+
+    @metrics.instrument("db.backfill_summary_previews")
+    def backfill_summary_previews(self) -> int:
+        """Store summary_preview for summaries written before list views stopped loading summaries"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        cursor = video_collection.find(
+            # None also matches documents without the field
+            {"has_summary": True, "summary_preview": {"$in": [None, ""]}},
+            projection={"video_id": 1, "summary": 1, "_id": 0},
+        )
+        updated = 0
+        for batch in batched(cursor, config.mongo_write_batch_size):
+            result = video_collection.bulk_write([
+                UpdateOne(
+                    {"video_id": doc["video_id"]},
+                    {"$set": {"summary_preview": summary_preview(doc.get("summary") or "")}},
+                )
+                for doc in batch
+            ], ordered=False)
+            updated += result.modified_count
+
+        self.disconnect()
+        return updated
+
+    @metrics.instrument("db.find_videos")
+    def find_videos(
+        self,
+        channel_id: str | None,
+        seen: bool | None = None,
+        max_duration_seconds: int | None = None,
+        sort: str = "published_at",
+        descending: bool = True,
+        limit: int = 100,
+    ) -> List[VideoYT]:
+        """Query channel videos with filtering and sorting done server-side"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+        find_args = page_find_args(
+            channel_id, seen, max_duration_seconds, sort=sort, descending=descending, limit=limit,
+        )
+        videos = [video_from_doc(doc) for doc in tui_read(video_collection).find(**find_args)]
+
+        self.disconnect()
+        return videos
+
+    @metrics.instrument("db.load_unseen_feed")
+    def load_unseen_feed(self, limit: int | None = None, after: VideoYT | None = None) -> List[VideoYT]:
+        """
+        Load unseen videos of all channels, newest first.
+
+        One query on the (seen, published_at, video_id) index. Paging uses a
+        keyset cursor: pass the last video of the previous page as ``after``.
+        """
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+        cursor = tui_read(video_collection).find(**page_find_args(None, seen=False, after=after, limit=limit))
+        videos = [video_from_doc(doc) for doc in cursor]
+
+        self.disconnect()
+        return videos
+
+    @metrics.instrument("db.apply_mutation")
+    def apply_mutation(self, video_id: str, changes: Dict, base_version: int, created_at: datetime) -> bool:
+        """
+        Apply a user state change queued by an offline client.
+
+        If the document is still at ``base_version`` the change is applied as
+        a whole. Otherwise conflicts are resolved per field: a field is only
+        dropped when that same field was changed remotely after ``created_at``
+        (last writer wins on ``field_modified_at.<field>``), so e.g. a summary
+        saved by the job worker never discards an offline ``seen`` toggle.
+        Returns False if any field lost to a newer remote change.
+        """
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        result = video_collection.update_one(
+            {"video_id": video_id, "version": base_version}, user_update(changes, modified_at=created_at)
+        )
+        dropped = []
+        if result.matched_count == 0:
+            for field, value in changes.items():
+                modified = f"field_modified_at.{field}"
+                result = video_collection.update_one(
+                    {"video_id": video_id, "$or": [{modified: {"$exists": False}}, {modified: {"$lte": created_at}}]},
+                    user_update({field: value}, modified_at=created_at),
+                )
+                if result.matched_count == 0:
+                    dropped.append(field)
+
+        if dropped:
+            logging.info(f"Offline change of {', '.join(dropped)} of {video_id} lost to a newer remote change")
+
+        self.disconnect()
+        return not dropped
+
+    def find_changed_videos(self, since: datetime | None) -> Iterator[Dict]:
+        """Stream video documents changed after ``since`` (all documents if None)"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        query = {} if since is None else {"updated_at": {"$gt": since}}
         try:
-            # Use insert_many with ordered=False to continue on duplicates
-            result = video_collection.insert_many(video_docs, ordered=False)
-            logging.info(f"Successfully saved {len(result.inserted_ids)} videos to MongoDB")
-            
-        except BulkWriteError as e:
-            # Handle bulk write errors (including duplicates)
-            successful_inserts = e.details.get('nInserted', 0)
-            write_errors = e.details.get('writeErrors', [])
-            duplicate_errors = len([err for err in write_errors if err.get('code') == 11000])
-            
-            logging.info(f"Bulk insert completed: {successful_inserts} new videos saved, "
-                        f"{duplicate_errors} duplicates skipped")
-            
-            # Log other errors if any
-            other_errors = len(write_errors) - duplicate_errors
-            if other_errors > 0:
-                logging.warning(f"{other_errors} other write errors occurred")
-                
-        except Exception as e:
-            logging.error(f"An error occurred during bulk insert: {e}")
-            
-        self.disconnect()
\ No newline at end of file
+            yield from video_collection.find(query, projection={"_id": 0}, batch_size=1000)
+        finally:
+            self.disconnect()
+
+    @metrics.instrument("db.recent_upload_history")
+    def recent_upload_history(self, channel_ids: List[str], per_channel: int) -> Dict[str, tuple[List[datetime], str]]:
+        """
+        Publish dates (newest first) and latest video_id per channel in one aggregation.
+
+        Served by the (channel_id, published_at) index. ``$firstN`` (MongoDB
+        5.2+) keeps only ``per_channel`` dates per group instead of whole
+        channel histories.
+        """
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        pipeline = [
+            {"$match": {"channel_id": {"$in": channel_ids}}},
+            {"$sort": {"channel_id": 1, "published_at": -1}},
+            {"$group": {
+                "_id": "$channel_id",
+                "published": {"$firstN": {"input": "$published_at", "n": per_channel}},
+                "latest_video_id": {"$first": "$video_id"},
+            }},
+        ]
+        history = {
+            item["_id"]: (item["published"], item["latest_video_id"])
+            for item in video_collection.aggregate(pipeline)
+        }
+
+        self.disconnect()
+        return history
+
+    @metrics.instrument("db.acquire_lease")
+    def acquire_lease(self, name: str, owner: str, ttl_s: int) -> bool:
+        """
+        Take or renew a named lease until now + ``ttl_s``.
+
+        Succeeds if the lease is free, expired or already ours. A lease held by
+        someone else makes the upsert collide on ``_id`` and returns False.
+        """
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        locks = db[config.mongo_locks_collection_name]
+        now = datetime.now(timezone.utc)
+
+        try:
+            locks.find_one_and_update(
+                {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_s)}},
+                upsert=True,
+            )
+            acquired = True
+        except DuplicateKeyError:
+            acquired = False
+
+        self.disconnect()
+        return acquired
+
+    def release_lease(self, name: str, owner: str):
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        db[config.mongo_locks_collection_name].delete_one({"_id": name, "owner": owner})
+
+        self.disconnect()
+
+    @metrics.instrument("db.ensure_job_indexes")
+    def ensure_job_indexes(self):
+        """Indexes of the job queue: claim order, one active job per dedupe key, expiry of finished jobs"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        jobs = db[config.mongo_jobs_collection_name]
+
+        jobs.create_index([("status", 1), ("priority", -1), ("visible_at", 1)])
+        # active_key holds the dedupe key while the job is queued or running
+        jobs.create_index("active_key", unique=True, partialFilterExpression={"active_key": {"$exists": True}})
+        jobs.create_index("finished_at", expireAfterSeconds=config.job_retention_days * 24 * 60 * 60)
+        self.disconnect()
+
+    @metrics.instrument("db.enqueue_job")
+    def enqueue_job(
+        self,
+        kind: str,
+        payload: Dict,
+        priority: int = 0,
+        dedupe_key: str | None = None,
+        max_attempts: int | None = None,
+        delay_s: float = 0,
+    ) -> str:
+        """
+        Queue a job, returns its id.
+
+        If a queued or running job with the same ``dedupe_key`` exists, its id
+        is returned and nothing is added.
+        """
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        jobs = db[config.mongo_jobs_collection_name]
+        now = datetime.now(timezone.utc)
+        doc = {
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": max_attempts or config.job_max_attempts,
+            "dedupe_key": dedupe_key,
+            "visible_at": now + timedelta(seconds=delay_s),
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        if dedupe_key is None:
+            job_id = jobs.insert_one(doc).inserted_id
+        else:
+            try:
+                job = jobs.find_one_and_update(
+                    {"active_key": dedupe_key},
+                    {"$setOnInsert": doc},
+                    projection={"_id": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except DuplicateKeyError:
+                # A concurrent enqueue of the same key won the upsert
+                job = jobs.find_one({"active_key": dedupe_key}, projection={"_id": 1})
+            job_id = job["_id"]
+
+        self.disconnect()
+        return str(job_id)
+
+    @metrics.instrument("db.claim_job")
+    def claim_job(self, owner: str, kinds: List[str] | None = None, visibility_s: int | None = None) -> Job | None:
+        """
+        Atomically take the next visible job, highest priority first.
+
+        Queued jobs whose run time has come and running jobs whose lease ran
+        out (crashed or stalled worker) are both visible. The claim hides the
+        job for ``visibility_s`` and counts an attempt.
+        """
+        visibility_s = config.job_visibility_timeout_s if visibility_s is None else visibility_s
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        jobs = db[config.mongo_jobs_collection_name]
+        now = datetime.now(timezone.utc)
+        query: Dict = {"status": {"$in": ["queued", "running"]}, "visible_at": {"$lte": now}}
+        if kinds:
+            query["kind"] = {"$in": kinds}
+
+        doc = jobs.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": owner,
+                    "visible_at": now + timedelta(seconds=visibility_s),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", -1), ("visible_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+        self.disconnect()
+        return Job.from_doc(doc) if doc else None
+
+    def _update_running_job(self, job_id: str, owner: str, update: Dict) -> bool:
+        """Update a job only while ``owner`` still holds it, False if the lease was lost"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        jobs = db[config.mongo_jobs_collection_name]
+        update.setdefault("$set", {})["updated_at"] = datetime.now(timezone.utc)
+        result = jobs.update_one({"_id": ObjectId(job_id), "owner": owner, "status": "running"}, update)
+
+        self.disconnect()
+        return result.matched_count == 1
+
+    @metrics.instrument("db.extend_job_lease")
+    def extend_job_lease(self, job_id: str, owner: str, visibility_s: int | None = None) -> bool:
+        visibility_s = config.job_visibility_timeout_s if visibility_s is None else visibility_s
+        visible_at = datetime.now(timezone.utc) + timedelta(seconds=visibility_s)
+        return self._update_running_job(job_id, owner, {"$set": {"visible_at": visible_at}})
+
+    @metrics.instrument("db.complete_job")
+    def complete_job(self, job_id: str, owner: str, result=None) -> bool:
+        return self._update_running_job(job_id, owner, {
+            "$set": {"status": "done", "result": result, "error": None, "finished_at": datetime.now(timezone.utc)},
+            "$unset": {"active_key": ""},
+        })
+
+    @metrics.instrument("db.fail_job")
+    def fail_job(self, job_id: str, owner: str, error: str, retry_in_s: float | None = None) -> bool:
+        """Queue the job again after ``retry_in_s``, or mark it failed for good when None"""
+        now = datetime.now(timezone.utc)
+        if retry_in_s is None:
+            update = {
+                "$set": {"status": "failed", "error": error, "finished_at": now},
+                "$unset": {"active_key": ""},
+            }
+        else:
+            update = {"$set": {"status": "queued", "error": error, "visible_at": now + timedelta(seconds=retry_in_s)}}
+        return self._update_running_job(job_id, owner, update)
+
+    @metrics.instrument("db.get_jobs")
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Job]:
+        """Current state of the given jobs, finished jobs removed by the TTL index are missing"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        jobs = db[config.mongo_jobs_collection_name]
+        found = {
+            str(doc["_id"]): Job.from_doc(doc)
+            for doc in jobs.find({"_id": {"$in": [ObjectId(job_id) for job_id in job_ids]}})
+        }
+
+        self.disconnect()
+        return found
+
+    @metrics.instrument("db.job_counts")
+    def job_counts(self) -> Dict[tuple, int]:
+        """Number of jobs per (kind, status)"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        jobs = db[config.mongo_jobs_collection_name]
+        counts = {
+            (item["_id"]["kind"], item["_id"]["status"]): item["count"]
+            for item in jobs.aggregate([
+                {"$group": {"_id": {"kind": "$kind", "status": "$status"}, "count": {"$sum": 1}}},
+            ])
+        }
+
+        self.disconnect()
+        return counts
+
+    @metrics.instrument("db.find_archive_candidates")
+    def find_archive_candidates(
+        self, channel_id: str, keep_newest: int | None, older_than: datetime | None, limit: int,
+    ) -> List[Dict]:
+        """
+        Seen videos of a channel outside the retention window, newest first.
+
+        A video is kept if it is one of the ``keep_newest`` newest of the
+        channel (seen or not) or published after ``older_than``. Unseen videos
+        are always kept. Both queries use the (channel_id, published_at) index.
+        """
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        published_before = [] if older_than is None else [older_than]
+        if keep_newest is not None:
+            boundary = video_collection.find_one(
+                {"channel_id": channel_id},
+                projection={"published_at": 1, "_id": 0},
+                sort=[("published_at", -1)],
+                skip=keep_newest - 1,
+            )
+            # No boundary: the channel has no more than keep_newest videos
+            published_before.append(boundary["published_at"] if boundary else None)
+
+        docs = []
+        if published_before and None not in published_before:
+            docs = list(video_collection.find(
+                {"channel_id": channel_id, "seen": True, "published_at": {"$lt": min(published_before, key=as_utc)}},
+                projection={"_id": 0},
+                sort=[("published_at", -1)],
+                limit=limit,
+            ))
+
+        self.disconnect()
+        return docs
+
+    @metrics.instrument("db.ensure_archive_collection")
+    def ensure_archive_collection(self):
+        """Create the archive collection with zstd block compression, it is rarely read"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        name = config.mongo_archive_collection_name
+        if name not in db.list_collection_names():
+            db.create_collection(name, storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}})
+        archive_collection = db[name]
+        archive_collection.create_index("video_id", unique=True)
+        archive_collection.create_index([("channel_id", 1), ("published_at", -1)])
+
+        self.disconnect()
+
+    @metrics.instrument("db.archive_videos")
+    def archive_videos(self, docs: List[Dict]) -> int:
+        """Copy video documents into the archive collection, idempotent per video_id"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        archive_collection = db[config.mongo_archive_collection_name]
+
+        result = archive_collection.bulk_write(
+            [ReplaceOne({"video_id": doc["video_id"]}, doc, upsert=True) for doc in docs],
+            ordered=False,
+        )
+
+        self.disconnect()
+        return result.upserted_count + result.modified_count
+
+    @metrics.instrument("db.delete_videos")
+    def delete_videos(self, video_ids: List[str]) -> int:
+        """Remove videos from the hot collection, e.g. after they were archived"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        deleted = video_collection.delete_many({"video_id": {"$in": video_ids}}).deleted_count
+
+        self.disconnect()
+        return deleted
+
+    @metrics.instrument("db.search_archive")
+    def search_archive(self, text: str, channel_id: str | None = None, limit: int = 100) -> List[VideoYT]:
+        """Case-insensitive title search in the archive collection, newest first"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        archive_collection = db[config.mongo_archive_collection_name]
+        field_names = {f.name for f in fields(VideoYT)}
+
+        query: Dict = {"title": {"$regex": re.escape(text), "$options": "i"}}
+        if channel_id is not None:
+            query["channel_id"] = channel_id
+
+        cursor = archive_collection.find(
+            query,
+            projection={name: 1 for name in field_names} | {"_id": 0},
+            sort=[("published_at", -1)],
+            limit=limit,
+        )
+        videos = [video_from_doc(doc) for doc in cursor]
+
+        self.disconnect()
+        return videos
+
+    @metrics.instrument("db.get_latest_video_id")
+    def get_latest_video_id(self, channel_id: str) -> str | None:
+        """Return video_id of the most recently published stored video of a channel"""
+        self.connect()
+
+        db = self.client[config.mongo_database_name]
+        video_collection = db[config.mongo_collection_name]
+
+        latest = video_collection.find_one(
+            {"channel_id": channel_id},
+            projection={"video_id": 1, "_id": 0},
+            sort=[("published_at", -1)],
+        )
+        self.disconnect()
+        return latest["video_id"] if latest else None
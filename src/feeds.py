@@ -0,0 +1,102 @@
+"""
+Zero-quota fetching of channel uploads from the public YouTube Atom feeds.
+
+``https://www.youtube.com/feeds/videos.xml?channel_id=...`` lists the 15 most
+recent uploads with everything ``VideoYT`` needs except the duration. The
+same entry format is pushed by the WebSub hub (see ``websub.py``).
+"""
+import logging
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Iterable, Iterator, List, Tuple
+
+from config import config
+from metrics import metrics
+from models import VideoYT, YTChannel
+from youtube import iter_playlist_videos, parse_published_at
+
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+# Uploads listed in a channel feed
+FEED_ENTRIES = 15
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+YT = "{http://www.youtube.com/xml/schemas/2015}"
+
+
+def iter_feed_entries(stream: IO[bytes]) -> Iterator[VideoYT]:
+    """
+    Stream-parse an Atom feed into VideoYT objects.
+
+    Entries are yielded as soon as their closing tag is read and cleared
+    afterwards, so memory use does not depend on the feed size.
+    """
+    for _, element in ET.iterparse(stream, events=("end",)):
+        if element.tag != f"{ATOM}entry":
+            continue
+
+        video_id = element.findtext(f"{YT}videoId")
+        if video_id:
+            yield VideoYT(
+                title=element.findtext(f"{ATOM}title", default=""),
+                video_id=video_id,
+                published_at=parse_published_at(element.findtext(f"{ATOM}published", default="")),
+                channel_id=element.findtext(f"{YT}channelId", default=""),
+                channel_title=element.findtext(f"{ATOM}author/{ATOM}name", default=""),
+                url=f"https://www.youtube.com/watch?v={video_id}",
+            )
+        element.clear()
+
+
+def fetch_feed(channel: YTChannel) -> List[VideoYT]:
+    """Download and parse one channel feed"""
+    url = FEED_URL.format(channel_id=channel.channel_id)
+    with metrics.timed("feed.fetch"):
+        with urllib.request.urlopen(url, timeout=config.connection_timeout_ms / 1000) as response:
+            return list(iter_feed_entries(response))
+
+
+def iter_feed_videos(
+    channel: YTChannel,
+    feed: List[VideoYT] | None = None,
+    until_video_id: str | None = None,
+    **api_options,
+) -> Iterator[VideoYT]:
+    """
+    Feed backend with API fallback.
+
+    Yields entries of ``feed`` (fetched if not given) up to ``until_video_id``.
+    If the known video is not in the feed (more than 15 new uploads) or the
+    feed is unavailable, the rest comes from ``iter_playlist_videos`` with
+    the same options.
+    """
+    yielded: set[str] = set()
+    try:
+        for video in feed if feed is not None else fetch_feed(channel):
+            if video.video_id == until_video_id:
+                return
+            yielded.add(video.video_id)
+            yield video
+        if until_video_id is None:
+            return
+    except Exception as e:
+        logging.warning(f"Feed for {channel.channel_title} unavailable, using API: {e}")
+
+    for video in iter_playlist_videos(channel, until_video_id=until_video_id, **api_options):
+        if video.video_id not in yielded:
+            yield video
+
+
+def fetch_feeds_concurrently(
+    channels: Iterable[YTChannel], max_workers: int | None = None
+) -> Iterator[Tuple[YTChannel, List[VideoYT] | None]]:
+    """Fetch many feeds in parallel, yielding (channel, videos or None on error) as they finish"""
+    with ThreadPoolExecutor(max_workers=max_workers or config.feed_fetch_workers) as pool:
+        futures = {pool.submit(fetch_feed, channel): channel for channel in channels}
+        for future in as_completed(futures):
+            channel = futures[future]
+            try:
+                yield channel, future.result()
+            except Exception as e:
+                logging.warning(f"Feed for {channel.channel_title} failed: {e}")
+                yield channel, None
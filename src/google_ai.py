@@ -1,6 +1,15 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
 from google import genai
 from config import config
 from google.genai import types
+from metrics import metrics
 
 
 PROMPT_01 = """
@@ -31,29 +40,376 @@ Clarity: The final output must be self-contained and fully understandable withou
 Focus: Do not include personal opinions, external information, or interpretations not explicitly presented in the video.
 """
 
+# Transcript mode: every chunk is summarized on its own (map), the notes are merged with PROMPT_02 (reduce)
+MAP_PROMPT = """
+Summarize this part of a YouTube video transcript as concise notes. Keep the main points, arguments,
+evidence, data and examples in the order they appear. Do not add anything that is not in the text.
+
+Transcript part {index} of {total}:
+
+"""
+REDUCE_PROMPT_01 = """
+Objective
+You are tasked with creating a concise and comprehensive summary of a YouTube video from notes
+taken on consecutive parts of its transcript. The summary should be accessible to an individual
+who has not seen the video and is unfamiliar with its specific subject matter.
+
+Video title: {title}
+
+Notes
+
+"""
+
+# Fixed part of every video summary request, sent once as cached content (or system instruction)
+SUMMARY_INSTRUCTIONS = PROMPT_01 + PROMPT_02
+
 url = "https://youtu.be/bwz3Z9GXLyI?si=-pr157wnyggKjwxL"
 
 
-async def get_summary_url(url: str, payload) -> str:
-    PROMPT = PROMPT_01 + PROMPT_02
+# model = "gemini-2.0-flash"
+# model = "gemini-2.5-flash-preview-05-20"
+MODEL = "gemini-3-flash-preview"
+
+
+# One client per event loop: its async HTTP connections belong to the loop that opened them
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, genai.Client]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> genai.Client:
+    """Shared client of the running event loop, created on first use"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = genai.Client(api_key=config.google_ai_api_key)
+    return client
+
+
+class InstructionCache:
+    """
+    ``SUMMARY_INSTRUCTIONS`` registered once as cached content and shared by all requests.
 
-    client = genai.Client(api_key=config.google_ai_api_key)
-    # model = "gemini-2.0-flash"
-    # model = "gemini-2.5-flash-preview-05-20"
-    model = "gemini-3-flash-preview"
+    The cache is renewed shortly before its TTL runs out. If the API refuses
+    to create it (e.g. below the model's minimum cacheable size) requests carry
+    the instructions as system instruction instead and creation is retried
+    after one TTL.
+    """
 
+    # Renew this long before expiry so no request references an expired cache
+    RENEW_MARGIN_S = 60
+
+    def __init__(self, instructions: str, ttl_s: int | None = None):
+        self.instructions = instructions
+        self.ttl_s = ttl_s or config.ai_cache_ttl_s
+        self.name: str | None = None
+        self.expires_at = 0.0
+        self.retry_at = 0.0
+        # Token count of the cached instructions as reported by the API
+        self.tokens = 0
+        # Storage billed for the cache so far, every creation or extension keeps it stored for the TTL
+        self.storage_usd = 0.0
+        self._lock = threading.Lock()
+
+    def live_name(self) -> str | None:
+        if self.name is not None and time.monotonic() < self.expires_at - self.RENEW_MARGIN_S:
+            return self.name
+        return None
+
+    def refresh(self, client: genai.Client) -> str | None:
+        """Name of a live cache, extending or creating it as needed, None if caching is unavailable"""
+        with self._lock:
+            if self.live_name() or time.monotonic() < self.retry_at:
+                return self.live_name()
+            ttl = f"{self.ttl_s}s"
+            try:
+                with metrics.timed("ai.instruction_cache"):
+                    if self.name is not None:
+                        try:
+                            client.caches.update(name=self.name, config=types.UpdateCachedContentConfig(ttl=ttl))
+                        except Exception:
+                            # Already expired or deleted, register the instructions again
+                            self.name = None
+                    if self.name is None:
+                        cache = client.caches.create(
+                            model=MODEL,
+                            config=types.CreateCachedContentConfig(
+                                display_name="yt-summary-instructions", system_instruction=self.instructions, ttl=ttl,
+                            ),
+                        )
+                        self.name = cache.name
+                        usage = getattr(cache, "usage_metadata", None)
+                        self.tokens = (usage.total_token_count or 0) if usage is not None else 0
+            except Exception as e:
+                logging.info(f"Context cache unavailable, sending instructions with every request: {e}")
+                self.name = None
+                self.retry_at = time.monotonic() + self.ttl_s
+                return None
+            now = time.monotonic()
+            expires_at = now + self.ttl_s
+            # A renewal before expiry only adds the extension to the billed storage time
+            stored_s = expires_at - max(self.expires_at, now)
+            self.storage_usd += self.tokens * stored_s / 3600 * config.ai_cache_storage_usd_per_mtok_hour / 1_000_000
+            self.expires_at = expires_at
+            return self.name
+
+    async def request_config(self, client: genai.Client) -> types.GenerateContentConfig:
+        """Config referencing the cached instructions, or carrying them when there is no cache"""
+        name = self.live_name()
+        if name is None and config.ai_context_cache:
+            name = await asyncio.to_thread(self.refresh, client)
+        if name is not None:
+            return types.GenerateContentConfig(cached_content=name)
+        return types.GenerateContentConfig(system_instruction=self.instructions)
+
+    def reset(self):
+        with self._lock:
+            self.name = None
+            self.expires_at = self.retry_at = 0.0
+            self.tokens = 0
+            self.storage_usd = 0.0
+
+
+instruction_cache = InstructionCache(SUMMARY_INSTRUCTIONS)
+
+
+def video_contents(url: str) -> types.Content:
+    return types.Content(parts=[types.Part(file_data=types.FileData(file_uri=url))])
+
+
+async def generate_summary(client: genai.Client, url: str):
+    """One summary request, the response carries text and usage_metadata"""
     response = await client.aio.models.generate_content(
-        model=model,
-        contents=types.Content(
-            parts=[
-                types.Part(
-                    file_data=types.FileData(file_uri=url),
-                ),
-                types.Part(
-                    text=PROMPT,
-                ),
-            ]
-        ),
+        model=MODEL,
+        contents=video_contents(url),
+        config=await instruction_cache.request_config(client),
     )
+    return response
+
+
+@dataclass
+class SummaryResult:
+    text: str
+    # "video" (whole video as file_data) or "transcript" (map-reduce over the transcript)
+    mode: str
+    latency_s: float = 0.0
+    requests: int = 0
+    # input_tokens includes cached_tokens, which are billed at the cached input price
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    # Submitted through the Batch API, billed at ai_batch_price_ratio
+    batched: bool = False
+
+    @property
+    def list_price_usd(self) -> float:
+        """Cost without cache and batch discounts"""
+        return (
+            self.input_tokens * config.ai_input_usd_per_mtok + self.output_tokens * config.ai_output_usd_per_mtok
+        ) / 1_000_000
+
+    @property
+    def cost_usd(self) -> float:
+        cost = self.list_price_usd - self.cached_tokens * (
+            config.ai_input_usd_per_mtok - config.ai_cached_input_usd_per_mtok
+        ) / 1_000_000
+        return cost * config.ai_batch_price_ratio if self.batched else cost
+
+    @property
+    def saved_usd(self) -> float:
+        return self.list_price_usd - self.cost_usd
+
+    def add_usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        self.requests += 1
+        if usage is not None:
+            self.input_tokens += usage.prompt_token_count or 0
+            self.cached_tokens += getattr(usage, "cached_content_token_count", None) or 0
+            self.output_tokens += usage.candidates_token_count or 0
+
+
+def split_transcript(text: str, chunk_chars: int | None = None) -> List[str]:
+    """Split a transcript into chunks of at most ``chunk_chars``, cutting at whitespace"""
+    chunk_chars = chunk_chars or config.transcript_chunk_chars
+    chunks = []
+    text = " ".join(text.split())
+    while len(text) > chunk_chars:
+        cut = text.rfind(" ", 0, chunk_chars)
+        if cut <= 0:
+            cut = chunk_chars
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+def fetch_transcript(video_id: str) -> str | None:
+    """
+    Transcript text via the optional ``youtube-transcript-api`` package
+    (``transcripts`` extra).
+
+    Returns None if the package is not installed or the video has no
+    transcript, the caller then falls back to video mode.
+    """
+    try:
+        from youtube_transcript_api import YouTubeTranscriptApi
+    except ImportError:
+        return None
+    try:
+        fetched = YouTubeTranscriptApi().fetch(video_id)
+    except Exception as e:
+        logging.info(f"No transcript for {video_id}: {e}")
+        return None
+    return " ".join(snippet.text for snippet in fetched)
+
+
+def choose_mode(duration_seconds: int | None) -> str:
+    """Long videos are summarized from the transcript, short or unknown ones as video"""
+    if duration_seconds is not None and duration_seconds >= config.transcript_min_seconds:
+        return "transcript"
+    return "video"
+
+
+async def generate_text(client: genai.Client, prompt: str):
+    return await client.aio.models.generate_content(model=MODEL, contents=prompt)
+
+
+async def summarize_transcript(client: genai.Client, transcript: str, title: str = "") -> SummaryResult:
+    """Map-reduce summary: chunks are summarized concurrently, then merged into one summary"""
+    result = SummaryResult(text="", mode="transcript")
+    chunks = split_transcript(transcript)
+    semaphore = asyncio.Semaphore(config.transcript_map_concurrency)
+
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        async with semaphore:
+            response = await generate_text(client, MAP_PROMPT.format(index=index, total=len(chunks)) + chunk)
+        result.add_usage(response)
+        return response.text or ""
+
+    if len(chunks) == 1:
+        # Short transcript: no map step, the transcript itself is the input of the reduce prompt
+        notes = chunks
+    else:
+        notes = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, 1)))
+
+    response = await generate_text(client, REDUCE_PROMPT_01.format(title=title) + "\n\n".join(notes) + PROMPT_02)
+    result.add_usage(response)
+    result.text = response.text or ""
+    return result
+
+
+async def summarize_video(
+    video,
+    client: genai.Client | None = None,
+    transcript_provider: Callable[[str], str | None] = fetch_transcript,
+) -> SummaryResult:
+    """
+    Summarize a video, picking the mode from its parsed duration.
+
+    Transcript mode falls back to video mode when no transcript is available.
+    Latency is recorded per mode as ``ai.summary.<mode>`` in metrics.
+    """
+    client = client or get_client()
+    start = time.perf_counter()
+
+    mode = choose_mode(video.duration_seconds)
+    transcript = await asyncio.to_thread(transcript_provider, video.video_id) if mode == "transcript" else None
+
+    with metrics.timed(f"ai.summary.{'transcript' if transcript else 'video'}"):
+        if transcript:
+            result = await summarize_transcript(client, transcript, video.title)
+        else:
+            response = await generate_summary(client, video.url)
+            result = SummaryResult(text=response.text or "", mode="video")
+            result.add_usage(response)
+
+    result.latency_s = time.perf_counter() - start
+    metrics.add_bytes(f"ai.summary.{result.mode}", len(result.text))
+    return result
+
+
+# Batch jobs in these states are finished, see types.JobState
+BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+async def summarize_batch(
+    videos: List,
+    client: genai.Client | None = None,
+    job_name: str | None = None,
+    on_submit: Callable[[str], None] | None = None,
+) -> Dict[str, SummaryResult | Exception]:
+    """
+    Summarize videos (video mode) as one Batch API job and wait for it.
+
+    Batch requests cost ``ai_batch_price_ratio`` of the interactive price but
+    can take hours, so this is for headless runs only. The instructions are
+    sent inline with every request: a job may run long after the short-lived
+    context cache expired. ``job_name`` resumes
+    waiting for a job submitted earlier, ``on_submit`` receives the name of a
+    new job so the caller can record it. Returns a result or the error per
+    video_id.
+    """
+    client = client or get_client()
+    start = time.perf_counter()
+
+    if job_name is None:
+        request_config = types.GenerateContentConfig(system_instruction=SUMMARY_INSTRUCTIONS)
+        job = await client.aio.batches.create(
+            model=MODEL,
+            src=[
+                types.InlinedRequest(
+                    model=MODEL, contents=video_contents(video.url), metadata={"video_id": video.video_id},
+                    config=request_config,
+                )
+                for video in videos
+            ],
+            config=types.CreateBatchJobConfig(display_name=f"yt-summaries-{len(videos)}"),
+        )
+        job_name = job.name
+        logging.info(f"Submitted batch {job_name} with {len(videos)} videos")
+        if on_submit is not None:
+            on_submit(job_name)
+    else:
+        job = await client.aio.batches.get(name=job_name)
+
+    while job.state.name not in BATCH_DONE_STATES:
+        await asyncio.sleep(config.ai_batch_poll_s)
+        job = await client.aio.batches.get(name=job_name)
+
+    responses = (job.dest.inlined_responses or []) if job.dest is not None else []
+    if job.state.name not in ("JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED") or not responses:
+        error = RuntimeError(f"Batch {job_name} ended in {job.state.name}: {job.error}")
+        return {video.video_id: error for video in videos}
+
+    latency_s = time.perf_counter() - start
+    results: Dict[str, SummaryResult | Exception] = {}
+    for video, inlined in zip(videos, responses):
+        # Responses come in request order, metadata is echoed back when present
+        video_id = (inlined.metadata or {}).get("video_id", video.video_id)
+        if inlined.error is not None or inlined.response is None:
+            results[video_id] = RuntimeError(f"Batch request failed: {inlined.error}")
+            continue
+        result = SummaryResult(text=inlined.response.text or "", mode="video", latency_s=latency_s, batched=True)
+        result.add_usage(inlined.response)
+        metrics.add_bytes("ai.summary.batch", len(result.text))
+        results[video_id] = result
+    for video in videos:
+        results.setdefault(video.video_id, RuntimeError(f"No response for {video.video_id} in batch {job_name}"))
+    return results
+
+
+@metrics.instrument("ai.get_summary")
+async def get_summary(video) -> tuple[str, object]:
+    """Summary of a video for the TUI, returns (text, video) like get_summary_url"""
+    result = await summarize_video(video)
+    return (result.text, video)
+
+
+@metrics.instrument("ai.get_summary_url")
+async def get_summary_url(url: str, payload) -> str:
+    response = await generate_summary(get_client(), url)
 
+    metrics.add_bytes("ai.get_summary_url", len(response.text or ""))
     return (response.text, payload)
@@ -0,0 +1,236 @@
+"""
+Durable background jobs in a MongoDB collection.
+
+The TUI (with ``JOB_QUEUE=1``) and ``update --enqueue`` only add jobs, one or
+more ``jobs`` worker processes on any host drain the queue. A worker claims a
+job atomically, which hides it from other workers for the visibility timeout,
+and extends that lease while the handler runs. A crashed worker's job becomes
+visible again when its lease runs out. Failed jobs are retried with
+exponential backoff up to ``max_attempts``, a dedupe key keeps the same work
+from being queued twice.
+
+Handlers are plain functions ``(payload, db_service) -> result`` registered
+per job kind with ``@handler``. They must be safe to run more than once.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import secrets
+import socket
+import threading
+from typing import Any, Callable, Dict, List
+
+from config import config
+from database import LIST_FIELDS, DatabaseService, video_from_doc
+from metrics import metrics
+from models import Job, VideoYT, YTChannel, YTConfig
+from utils import summary_preview
+
+HANDLERS: Dict[str, Callable[[Dict, DatabaseService], Any]] = {}
+
+# Interactive work goes before channel refreshes
+PRIORITIES = {"summary": 10, "duration": 10, "refresh_channel": 0}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help, the job fails right away"""
+
+
+def handler(kind: str):
+    """Register the decorated function as the handler of ``kind`` jobs"""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def video_payload(video: VideoYT) -> Dict:
+    """Job payload of a video: the listed fields, enough to rebuild it without a query"""
+    return {k: v for k, v in video.to_dict().items() if k in LIST_FIELDS}
+
+
+def enqueue_video_job(db_service: DatabaseService, kind: str, video: VideoYT) -> str:
+    return db_service.enqueue_job(
+        kind, video_payload(video), priority=PRIORITIES[kind], dedupe_key=f"{kind}:{video.video_id}",
+    )
+
+
+def enqueue_channel_refresh(db_service: DatabaseService, channel: YTChannel, argv: List[str] | None = None) -> str:
+    """Queue an update of one channel, ``argv`` are ``update`` options like ["--pages", "3"]"""
+    return db_service.enqueue_job(
+        "refresh_channel",
+        {"channel": channel.__dict__, "argv": argv or []},
+        priority=PRIORITIES["refresh_channel"],
+        dedupe_key=f"refresh_channel:{channel.channel_id}",
+    )
+
+
+@handler("duration")
+def fetch_duration(payload: Dict, db_service: DatabaseService) -> Dict:
+    from youtube import iter_with_durations
+
+    video = next(iter_with_durations([video_from_doc(payload)]))
+    if video.duration == "N/A":
+        raise RuntimeError(f"No duration returned for {video.video_id}")
+    db_service.update_video_duration(video.video_id, video.duration)
+    return {"duration": video.duration, "duration_seconds": video.duration_seconds}
+
+
+@handler("summary")
+def generate_summary(payload: Dict, db_service: DatabaseService) -> Dict:
+    from google_ai import summarize_video
+
+    video = video_from_doc(payload)
+    result = asyncio.run(summarize_video(video))
+    if not result.text:
+        raise RuntimeError("empty response")
+    db_service.update_video_summary(video.video_id, result.text)
+    return {
+        "summary": result.text,
+        "summary_preview": summary_preview(result.text),
+        "mode": result.mode,
+        "input_tokens": result.input_tokens,
+        "output_tokens": result.output_tokens,
+    }
+
+
+@handler("refresh_channel")
+def refresh_channel(payload: Dict, db_service: DatabaseService) -> Dict:
+    from run_update_yt_db import parse_args, update_channels
+
+    ytconfig = YTConfig.from_yaml(config.yt_config_file)
+    channel = YTChannel.from_dict(payload["channel"])
+    stats = update_channels([channel], parse_args(payload["argv"]), ytconfig, db_service)
+    return stats.__dict__
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter after the ``attempts``-th failed attempt"""
+    delay = min(config.job_retry_base_s * 2 ** (attempts - 1), config.job_retry_max_s)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobWorker:
+    """Claims and runs jobs with ``concurrency`` threads until stopped (or the queue is empty with ``drain``)"""
+
+    def __init__(
+        self,
+        db_service: DatabaseService | None = None,
+        kinds: List[str] | None = None,
+        concurrency: int | None = None,
+        drain: bool = False,
+    ):
+        self.db_service = db_service or DatabaseService(keep_alive=True)
+        self.kinds = kinds
+        self.concurrency = concurrency or config.job_concurrency
+        self.drain = drain
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopped = threading.Event()
+        self.processed: Dict[str, int] = {"done": 0, "retried": 0, "failed": 0, "lost": 0}
+        self._lock = threading.Lock()
+
+    def count(self, outcome: str):
+        with self._lock:
+            self.processed[outcome] += 1
+
+    def keep_leased(self, job: Job, finished: threading.Event):
+        """Extend the job's lease until the handler finishes"""
+        while not finished.wait(config.job_visibility_timeout_s / 3):
+            if not self.db_service.extend_job_lease(job.job_id, job.owner):
+                logging.warning(f"Job {job.job_id} ({job.kind}) lost its lease")
+                return
+
+    def run_job(self, job: Job):
+        if job.attempts > job.max_attempts:
+            # Claimed again after workers died or stalled on it every time
+            self.db_service.fail_job(job.job_id, job.owner, "visibility timeout expired on every attempt")
+            self.count("failed")
+            return
+
+        finished = threading.Event()
+        threading.Thread(target=self.keep_leased, args=(job, finished), daemon=True).start()
+        try:
+            func = HANDLERS.get(job.kind)
+            if func is None:
+                raise PermanentJobError(f"Unknown job kind {job.kind!r}")
+            with metrics.timed(f"job.{job.kind}"):
+                result = func(job.payload, self.db_service)
+        except Exception as e:
+            permanent = isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts
+            retry_in_s = None if permanent else retry_delay(job.attempts)
+            logging.warning(f"Job {job.job_id} ({job.kind}) attempt {job.attempts} failed: {e}")
+            stored = self.db_service.fail_job(job.job_id, job.owner, str(e), retry_in_s)
+            self.count("lost" if not stored else "failed" if permanent else "retried")
+            return
+        finally:
+            finished.set()
+
+        if self.db_service.complete_job(job.job_id, job.owner, result):
+            self.count("done")
+        else:
+            # Another worker took over after our lease ran out, its run counts
+            self.count("lost")
+
+    def loop(self):
+        while not self.stopped.is_set():
+            try:
+                # Owner is unique per claim, a run that lost its lease can't finish the new one
+                job = self.db_service.claim_job(f"{self.worker_id}:{secrets.token_hex(4)}", self.kinds)
+                if job is not None:
+                    self.run_job(job)
+                    continue
+            except Exception as e:
+                logging.error(f"Job queue unavailable: {e}")
+            if self.drain:
+                return
+            self.stopped.wait(config.job_poll_interval_s)
+
+    def run(self):
+        # Connect once before the threads share the pooled client
+        self.db_service.connect()
+        threads = [threading.Thread(target=self.loop, daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                # Join with a timeout so Ctrl+C reaches the main thread
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            logging.info("Stopping, running jobs are finished first")
+            self.stopped.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.db_service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run background jobs from the MongoDB job queue")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(HANDLERS), default=None, help="Only run these job kinds")
+    parser.add_argument("--concurrency", type=int, default=config.job_concurrency, help="Jobs run at the same time")
+    parser.add_argument("--drain", action="store_true", help="Exit once no job is visible instead of waiting for more")
+    parser.add_argument("--status", action="store_true", help="Print the number of jobs per kind and status and exit")
+    parser.add_argument("--metrics-out", default=None, help="Write per-operation metrics to file")
+    args = parser.parse_args(argv)
+
+    db_service = DatabaseService()
+    db_service.ensure_job_indexes()
+
+    if args.status:
+        for (kind, status), count in sorted(db_service.job_counts().items()):
+            print(f"{kind:<16} {status:<8} {count}")
+        return
+
+    worker = JobWorker(kinds=args.kinds, concurrency=args.concurrency, drain=args.drain)
+    worker.run()
+    print(", ".join(f"{count} {outcome}" for outcome, count in worker.processed.items()))
+
+    if args.metrics_out:
+        metrics.export(args.metrics_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+
+from config import config
+from metrics import metrics
+from models import VideoYT
+from utils import parse_iso_duration
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    published_at TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    channel_title TEXT NOT NULL,
+    url TEXT NOT NULL DEFAULT 'N/A',
+    duration TEXT NOT NULL DEFAULT 'N/A',
+    duration_seconds INTEGER,
+    seen INTEGER NOT NULL DEFAULT 0,
+    has_summary INTEGER NOT NULL DEFAULT 0,
+    summary TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS videos_channel_published ON videos (channel_title, published_at DESC);
+CREATE INDEX IF NOT EXISTS videos_seen_published ON videos (seen, published_at DESC, video_id DESC);
+CREATE INDEX IF NOT EXISTS videos_channel_seen_duration ON videos (channel_id, seen, duration_seconds);
+
+CREATE TABLE IF NOT EXISTS channels (
+    channel_id TEXT PRIMARY KEY,
+    channel_title TEXT NOT NULL
+);
+
+-- One coalesced row per video: fields changed locally and not yet pushed to MongoDB
+CREATE TABLE IF NOT EXISTS pending_mutations (
+    video_id TEXT PRIMARY KEY,
+    changes TEXT NOT NULL,
+    base_version INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+VIDEO_COLUMNS = (
+    "title", "video_id", "published_at", "channel_id", "channel_title", "url",
+    "duration", "duration_seconds", "seen", "has_summary", "summary",
+)
+
+# Columns read for list and table views, the full summary is fetched with get_summary
+LIST_COLUMNS = ", ".join(name for name in VIDEO_COLUMNS if name != "summary") + (
+    f", substr(summary, 1, {config.summary_preview_chars}) AS summary_preview"
+)
+
+
+def video_from_row(row: sqlite3.Row) -> VideoYT:
+    columns = row.keys()
+    return VideoYT(
+        title=row["title"],
+        video_id=row["video_id"],
+        published_at=datetime.fromisoformat(row["published_at"]),
+        channel_id=row["channel_id"],
+        channel_title=row["channel_title"],
+        url=row["url"],
+        duration=row["duration"],
+        duration_seconds=row["duration_seconds"],
+        seen=bool(row["seen"]),
+        has_summary=bool(row["has_summary"]),
+        summary=row["summary"] if "summary" in columns else "",
+        summary_preview=row["summary_preview"] if "summary_preview" in columns else "",
+    )
+
+
+def as_naive_utc(dt: datetime) -> datetime:
+    """Store datetimes the way pymongo returns them: naive UTC, so ISO strings sort correctly"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class LocalStore:
+    """
+    Embedded SQLite copy of the videos collection.
+
+    Exposes the same read/write methods as ``DatabaseService`` so the TUI can
+    use either. Writes are applied locally and queued in ``pending_mutations``
+    for ``sync.SyncEngine`` to push to MongoDB.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or config.local_store_path
+        self._local = threading.local()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """
+        Connection of the calling thread.
+
+        Thread workers (sync, summaries) use the store next to the UI thread,
+        a shared connection would mix their transactions. WAL lets readers
+        run alongside the one writer, writers wait up to the busy timeout.
+        A thread's connection is closed when the thread ends.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=config.local_store_busy_timeout_s)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @metrics.instrument("local.load_videos")
+    def load_videos(self, per_channel: int = 20) -> Dict[str, List[VideoYT]]:
+        """Latest ``per_channel`` videos per channel, same shape as DatabaseService.load_videos"""
+        rows = self.conn.execute(
+            f"""
+            SELECT {LIST_COLUMNS} FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY channel_title ORDER BY published_at DESC
+                ) AS rank
+                FROM videos
+            )
+            WHERE rank <= ?
+            ORDER BY channel_title, published_at DESC
+            """,
+            (per_channel,),
+        )
+        data: Dict[str, List[VideoYT]] = {}
+        for row in rows:
+            data.setdefault(row["channel_title"], []).append(video_from_row(row))
+        return data
+
+    @metrics.instrument("local.find_videos")
+    def find_videos(
+        self,
+        channel_id: str | None,
+        seen: bool | None = None,
+        max_duration_seconds: int | None = None,
+        sort: str = "published_at",
+        descending: bool = True,
+        limit: int = 100,
+    ) -> List[VideoYT]:
+        """Same filters as DatabaseService.find_videos, served by the local indexes"""
+        if sort not in VIDEO_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort}")
+
+        clauses, params = [], []
+        if channel_id is not None:
+            clauses.append("channel_id = ?")
+            params.append(channel_id)
+        if seen is not None:
+            clauses.append("seen = ?")
+            params.append(int(seen))
+        if max_duration_seconds is not None:
+            clauses.append("duration_seconds <= ?")
+            params.append(max_duration_seconds)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if descending else "ASC"
+        rows = self.conn.execute(
+            f"SELECT {LIST_COLUMNS} FROM videos {where} ORDER BY {sort} {order} LIMIT ?",
+            (*params, limit),
+        )
+        return [video_from_row(row) for row in rows]
+
+    @metrics.instrument("local.load_unseen_feed")
+    def load_unseen_feed(self, limit: int | None = None, after: VideoYT | None = None) -> List[VideoYT]:
+        """Same keyset paging as DatabaseService.load_unseen_feed"""
+        limit = limit or config.feed_page_size
+        if after is None:
+            rows = self.conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM videos WHERE seen = 0 "
+                "ORDER BY published_at DESC, video_id DESC LIMIT ?",
+                (limit,),
+            )
+        else:
+            published_at = as_naive_utc(after.published_at).isoformat()
+            rows = self.conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM videos WHERE seen = 0 AND (published_at, video_id) < (?, ?) "
+                "ORDER BY published_at DESC, video_id DESC LIMIT ?",
+                (published_at, after.video_id, limit),
+            )
+        return [video_from_row(row) for row in rows]
+
+    @metrics.instrument("local.get_summary")
+    def get_summary(self, video_id: str) -> str:
+        row = self.conn.execute("SELECT summary FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+        return row["summary"] if row else ""
+
+    def update_video_seen_status(self, video_id, seen_status: bool):
+        """Update the seen status of a video"""
+        self._mutate(video_id, {"seen": seen_status})
+
+    def update_video_duration(self, video_id, duration: str):
+        """Update the duration of a video"""
+        self._mutate(video_id, {"duration": duration, "duration_seconds": parse_iso_duration(duration)})
+
+    def update_video_summary(self, video_id, summary: str):
+        """Update the summary of a video"""
+        self._mutate(video_id, {"summary": summary, "has_summary": True})
+
+    @metrics.instrument("local.mutate")
+    def _mutate(self, video_id: str, changes: Dict):
+        """Apply change locally and queue it, coalescing with an unsent change of the same video"""
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        now = datetime.now(timezone.utc).isoformat()
+
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute(
+                f"UPDATE videos SET {assignments} WHERE video_id = ?",
+                (*changes.values(), video_id),
+            )
+            pending = self.conn.execute(
+                "SELECT changes FROM pending_mutations WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if pending:
+                merged = json.loads(pending["changes"]) | changes
+                self.conn.execute(
+                    "UPDATE pending_mutations SET changes = ?, created_at = ? WHERE video_id = ?",
+                    (json.dumps(merged), now, video_id),
+                )
+            else:
+                self.conn.execute(
+                    "INSERT INTO pending_mutations (video_id, changes, base_version, created_at) "
+                    "SELECT video_id, ?, version, ? FROM videos WHERE video_id = ?",
+                    (json.dumps(changes), now, video_id),
+                )
+
+    def pending_mutations(self) -> List[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM pending_mutations ORDER BY created_at").fetchall()
+
+    def complete_mutation(self, video_id: str, created_at: str):
+        """Drop a pushed mutation unless it was changed again while being pushed"""
+        self.conn.execute(
+            "DELETE FROM pending_mutations WHERE video_id = ? AND created_at = ?",
+            (video_id, created_at),
+        )
+
+    @metrics.instrument("local.upsert_remote")
+    def upsert_remote(self, docs: Iterable[Dict]) -> int:
+        """
+        Store documents pulled from MongoDB.
+
+        User-owned fields of videos with unsent local changes are kept, only
+        the remote version is taken so the next push can detect conflicts.
+        """
+        count = 0
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            pending = {row["video_id"] for row in self.conn.execute("SELECT video_id FROM pending_mutations")}
+            for doc in docs:
+                row = {name: doc.get(name) for name in VIDEO_COLUMNS}
+                row["published_at"] = as_naive_utc(row["published_at"]).isoformat()
+                row["url"] = row["url"] or "N/A"
+                row["duration"] = row["duration"] or "N/A"
+                if row["duration_seconds"] is None:
+                    row["duration_seconds"] = parse_iso_duration(row["duration"])
+                row["seen"] = int(bool(row["seen"]))
+                row["has_summary"] = int(bool(row["has_summary"]))
+                row["summary"] = row["summary"] or ""
+                row["version"] = doc.get("version", 0)
+
+                if row["video_id"] in pending:
+                    self.conn.execute(
+                        "INSERT INTO videos (title, video_id, published_at, channel_id, channel_title, url, version) "
+                        "VALUES (:title, :video_id, :published_at, :channel_id, :channel_title, :url, :version) "
+                        "ON CONFLICT (video_id) DO UPDATE SET title = excluded.title, url = excluded.url, "
+                        "channel_title = excluded.channel_title, version = excluded.version",
+                        row,
+                    )
+                else:
+                    columns = ", ".join(row)
+                    placeholders = ", ".join(f":{name}" for name in row)
+                    updates = ", ".join(f"{name} = excluded.{name}" for name in row if name != "video_id")
+                    self.conn.execute(
+                        f"INSERT INTO videos ({columns}) VALUES ({placeholders}) "
+                        f"ON CONFLICT (video_id) DO UPDATE SET {updates}",
+                        row,
+                    )
+                self.conn.execute(
+                    "INSERT INTO channels (channel_id, channel_title) VALUES (?, ?) "
+                    "ON CONFLICT (channel_id) DO UPDATE SET channel_title = excluded.channel_title",
+                    (row["channel_id"], row["channel_title"]),
+                )
+                count += 1
+        return count
+
+    def set_version(self, video_id: str, version: int):
+        self.conn.execute("UPDATE videos SET version = ? WHERE video_id = ?", (version, video_id))
+
+    def get_state(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_state(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT INTO sync_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
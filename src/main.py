@@ -2,24 +2,33 @@ from textual.app import App
 from textual.widgets import Footer
 from textual.binding import Binding
 from textual.containers import Horizontal
+from textual.timer import Timer
 from textual import on
+import logging
 
-from widgets.list_view import CustomListView
+from widgets.list_view import CustomListView, UNSEEN_FEED_KEY
 from widgets.data_table import CustomDataTable
-from utils import get_initial_data, pickle_data
-from models import Video
+from widgets.metrics_modalscreen import MetricsScreen
+from utils import get_initial_data, get_store, pickle_data
+from config import config
+from video_store import VideoStore
 
 class MyApp(App):
     CSS_PATH = "app.tcss"
 
     BINDINGS = [
         Binding("q", "exit", "Exit"),
-        Binding("l", "focus_datatable", show=False)
+        Binding("l", "focus_datatable", show=False),
+        Binding("m", "show_metrics", "Metrics"),
     ]
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs) # Does it need to be here?
-        self.data = get_initial_data() # Load initial data from pickle file or database
+        # Videos of all channels, widgets read it and subscribe to its change events
+        self.store = VideoStore(get_initial_data())
+        self.highlighted_key: str | None = None
+        self.rendered_key: str | None = None
+        self.highlight_timer: Timer | None = None
     
     def compose(self):
         yield Footer()
@@ -29,14 +38,38 @@ class MyApp(App):
             
     def on_mount(self):
         list_view = self.query_one(CustomListView)
-        list_view.set_data(self.data)
+        list_view.update_data()
         list_view.focus()
         list_view.index = 0
 
+        if config.offline_first:
+            self.set_interval(config.sync_interval_s, self.start_sync)
+            self.start_sync()
+
+    def start_sync(self):
+        """Push local changes / pull remote ones without blocking the UI"""
+        self.run_worker(self.sync_with_remote, thread=True, group="sync", exclusive=True)
+
+    def sync_with_remote(self):
+        from sync import SyncEngine
+        try:
+            store = get_store()
+            result = SyncEngine(store).sync_once()
+            if result.pulled:
+                # Loaded here, applied on the UI thread: the list and the table rebuild on StoreReloaded
+                data = store.load_videos()
+                self.call_from_thread(self.store.load, data)
+        except Exception as e:
+            # Offline is a normal state here, mutations stay queued
+            logging.info(f"Sync skipped: {e}")
+
     def action_exit(self):
         # pickle_data(self.data)
         self.exit()
 
+    def action_show_metrics(self):
+        self.push_screen(MetricsScreen())
+
     def action_focus_datatable(self):
         list_view = self.query_one(CustomListView)
         data_table = self.query_one(CustomDataTable)
@@ -48,13 +81,40 @@ class MyApp(App):
 
     @on(CustomListView.Highlighted)
     def update_data_table(self, event):
-        if event.item is not None:
-            data_table = self.query_one(CustomDataTable)
-            data_table.update_table(event.item.data, self.data[event.item.data])
+        """
+        Debounced table update.
+
+        The first move after a pause renders right away, moves during fast
+        scrolling only restart the timer and the final position renders once
+        the cursor rests for ``highlight_debounce_s``.
+        """
+        if event.item is None:
+            return
+
+        self.highlighted_key = event.item.data
+        # Loading and prefetch for the position we just left are no longer useful
+        data_table = self.query_one(CustomDataTable)
+        self.workers.cancel_group(data_table, "prefetch")
+        self.workers.cancel_group(data_table, "table_load")
+
+        if self.highlight_timer is None:
+            self.show_highlighted()
+        else:
+            self.highlight_timer.stop()
+        self.highlight_timer = self.set_timer(config.highlight_debounce_s, self.settle_highlight)
 
-    @on(CustomListView.DataUpdated) 
-    def data_updated(self, event):
-        self.data = event.data
+    def settle_highlight(self):
+        self.highlight_timer = None
+        if self.highlighted_key != self.rendered_key:
+            self.show_highlighted()
+
+    def show_highlighted(self):
+        data_table = self.query_one(CustomDataTable)
+        data_table.show(self.highlighted_key)
+        self.rendered_key = self.highlighted_key
+        # Prepare the channels the cursor is likely to move to next
+        list_view = self.query_one(CustomListView)
+        data_table.prefetch(list_view.neighbour_keys(config.prefetch_neighbours))
 
 def main():
     app = MyApp()
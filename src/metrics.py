@@ -0,0 +1,155 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Latency samples kept per operation, old samples are dropped first
+MAX_SAMPLES = 2048
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+@dataclass
+class OperationStats:
+    count: int = 0
+    errors: int = 0
+    bytes: int = 0
+    total_ms: float = 0.0
+    samples: deque = field(default_factory=lambda: deque(maxlen=MAX_SAMPLES))
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "total_ms": round(self.total_ms, 3),
+            "p50_ms": round(percentile(ordered, 50), 3),
+            "p95_ms": round(percentile(ordered, 95), 3),
+            "p99_ms": round(percentile(ordered, 99), 3),
+            "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+        }
+
+
+class Metrics:
+    """Process wide registry of per-operation latency, call, byte and error counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations: Dict[str, OperationStats] = {}
+
+    def record(self, name: str, elapsed_ms: float, error: bool = False, nbytes: int = 0):
+        with self._lock:
+            stats = self.operations.setdefault(name, OperationStats())
+            stats.count += 1
+            stats.errors += int(error)
+            stats.bytes += nbytes
+            stats.total_ms += elapsed_ms
+            stats.samples.append(elapsed_ms)
+
+    def add_bytes(self, name: str, nbytes: int):
+        with self._lock:
+            self.operations.setdefault(name, OperationStats()).bytes += nbytes
+
+    def dump(self) -> Dict[str, Dict]:
+        """Raw counters and samples, picklable so worker processes can send them back"""
+        with self._lock:
+            return {
+                name: {
+                    "count": stats.count, "errors": stats.errors, "bytes": stats.bytes,
+                    "total_ms": stats.total_ms, "samples": list(stats.samples),
+                }
+                for name, stats in self.operations.items()
+            }
+
+    def merge(self, dump: Dict[str, Dict]):
+        """Add counters and samples from ``dump()`` of another process"""
+        with self._lock:
+            for name, other in dump.items():
+                stats = self.operations.setdefault(name, OperationStats())
+                stats.count += other["count"]
+                stats.errors += other["errors"]
+                stats.bytes += other["bytes"]
+                stats.total_ms += other["total_ms"]
+                stats.samples.extend(other["samples"])
+
+    def reset(self):
+        with self._lock:
+            self.operations.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: stats.summary() for name, stats in sorted(self.operations.items())}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_openmetrics(self) -> str:
+        """Render counters and latency quantiles in OpenMetrics text format"""
+        lines = [
+            "# TYPE app_operation_latency_ms summary",
+            "# UNIT app_operation_latency_ms ms",
+            "# TYPE app_operation_errors counter",
+            "# TYPE app_operation_bytes counter",
+        ]
+        for name, s in self.snapshot().items():
+            label = f'operation="{name}"'
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'app_operation_latency_ms{{{label},quantile="{quantile}"}} {s[key]}')
+            lines.append(f"app_operation_latency_ms_count{{{label}}} {s['count']}")
+            lines.append(f"app_operation_latency_ms_sum{{{label}}} {s['total_ms']}")
+            lines.append(f"app_operation_errors_total{{{label}}} {s['errors']}")
+            lines.append(f"app_operation_bytes_total{{{label}}} {s['bytes']}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path: str):
+        """Write metrics to file, OpenMetrics for *.prom / *.txt, JSON otherwise"""
+        text = self.to_openmetrics() if file_path.endswith((".prom", ".txt")) else self.to_json()
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+    @contextmanager
+    def timed(self, name: str):
+        """Time the enclosed block, exceptions are counted as errors and re-raised"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, error=error)
+
+    def instrument(self, name: str):
+        """Decorator timing every call of a sync or async function under ``name``"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timed(name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timed(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+# Create a global metrics instance
+metrics = Metrics()
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from bson import ObjectId
-from typing import Dict
+from typing import Any, Dict
 import yaml
 
 @dataclass
@@ -12,6 +12,7 @@ class Video:
     published_at: datetime
     url: str = field(default="N/A")
     duration: str = field(default="N/A")
+    duration_seconds: int | None = field(default=None)
     seen: bool = field(default=False)
     has_summary: bool = field(default=False)
     summary: str = field(default="")
@@ -25,18 +26,80 @@ class VideoYT:
     channel_title: str
     url: str = field(default="N/A")
     duration: str = field(default="N/A")
+    duration_seconds: int | None = field(default=None)
     seen: bool = field(default=False)
     has_summary: bool = field(default=False)
     summary: str = field(default="")
+    # Start of the summary for list views, the full text is loaded on demand
+    summary_preview: str = field(default="")
 
     def to_dict(self) -> Dict[str, str]:
         """Convert VideoYT instance to dictionary using field names"""
         return {field: getattr(self, field) for field in self.__dataclass_fields__}
 
+@dataclass
+class BulkWriteStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged + self.errors
+
+    def merge(self, other: 'BulkWriteStats'):
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.errors += other.errors
+
+    def add(self, result: Dict[str, Any]):
+        """Accumulate counts from a pymongo bulk_api_result / BulkWriteError.details"""
+        upserted = result.get("nUpserted", 0)
+        matched = result.get("nMatched", 0)
+        modified = result.get("nModified", 0)
+        self.inserted += upserted
+        self.updated += modified
+        self.unchanged += matched - modified
+        self.errors += len(result.get("writeErrors", []))
+
+@dataclass
+class Job:
+    """Unit of background work in the MongoDB job queue (see jobs.py)"""
+    kind: str
+    payload: Dict[str, Any]
+    job_id: str | None = None
+    # queued -> running -> done | failed, failed attempts go back to queued until max_attempts
+    status: str = "queued"
+    priority: int = 0
+    attempts: int = 0
+    max_attempts: int = 5
+    dedupe_key: str | None = None
+    # Claimable from this time: run time when queued, end of the visibility timeout when running
+    visible_at: datetime | None = None
+    owner: str | None = None
+    result: Any = None
+    error: str | None = None
+    created_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'Job':
+        known = cls.__dataclass_fields__
+        return cls(job_id=str(doc["_id"]), **{k: v for k, v in doc.items() if k in known and k != "job_id"})
+
 @dataclass
 class YTConfig:
     channels: Dict[str, str]
     results: int
+    # Upper bound of playlist pages (50 videos each) fetched per channel
+    pages: int = 1
+    # Default fetch backend: "api" (playlistItems.list) or "feed" (public Atom feed, no quota)
+    backend: str = "api"
+    # Default retention of seen videos, older ones are moved to the archive (see archive.py)
+    keep_newest: int | None = None
+    keep_days: int | None = None
     
     @classmethod
     def from_yaml(cls, file_path: str) -> 'YTConfig':
@@ -50,6 +113,11 @@ class YTChannel:
     channel_id: str
     channel_title: str
     uploads_id: str
+    # Per-channel fetch backend override, empty means YTConfig.backend
+    backend: str = ""
+    # Per-channel retention overrides, None means the YTConfig default
+    keep_newest: int | None = None
+    keep_days: int | None = None
     
     @classmethod
     def from_dict(cls, data: Dict[str, str]) -> 'YTChannel':
@@ -57,5 +125,8 @@ class YTChannel:
         return cls(
             channel_id=data.get('channel_id', ''),
             channel_title=data.get('channel_title', ''),
-            uploads_id=data.get('uploads_id', '')
+            uploads_id=data.get('uploads_id', ''),
+            backend=data.get('backend', ''),
+            keep_newest=data.get('keep_newest'),
+            keep_days=data.get('keep_days'),
         )
\ No newline at end of file
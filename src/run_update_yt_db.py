@@ -1,20 +1,251 @@
-from youtube import get_last_videos
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from youtube import MAX_PAGE_SIZE, build_youtube, iter_playlist_videos, iter_with_durations
 from database import DatabaseService
 from config import config
-from models import YTConfig, YTChannel
+from models import BulkWriteStats, VideoYT, YTConfig, YTChannel
+from utils import unique_videos
+from metrics import metrics
+from scheduler import run_daemon
+from feeds import fetch_feeds_concurrently, iter_feed_videos
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fetch latest uploads of configured channels into MongoDB")
+    parser.add_argument(
+        "--pages", type=int, default=None,
+        help="Max playlist pages (50 videos each) per channel, 0 = no limit, overrides `pages` from YAML config",
+    )
+    parser.add_argument(
+        "--until-date", type=datetime.fromisoformat, default=None,
+        help="Stop at videos published before this ISO date (e.g. 2024-01-01), useful for backfills",
+    )
+    parser.add_argument(
+        "--new-only", action="store_true",
+        help="Stop at the newest video already stored for the channel",
+    )
+    parser.add_argument(
+        "--durations", action="store_true",
+        help="Fetch video durations while ingesting (1 quota unit per 50 videos)",
+    )
+    parser.add_argument(
+        "--backend", choices=("api", "feed"), default=None,
+        help="Fetch backend for all channels, overrides `backend` from YAML config (feed = no quota, 15 latest)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Shard channels across this many processes (leased in MongoDB per shard, see update_shards)",
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="Keep running and poll each channel according to its recent upload rate",
+    )
+    parser.add_argument(
+        "--enqueue", action="store_true",
+        help="Only queue one refresh job per channel (with the other options) for the `jobs` workers",
+    )
+    parser.add_argument(
+        "--metrics-out", default=None,
+        help="Write per-operation latency/bytes/errors to file (JSON, or OpenMetrics for *.prom)",
+    )
+    return parser.parse_args(argv)
+
+
+class LeaseLost(Exception):
+    """Another updater took over the shard lease"""
+
+
+def shard_of(channel: YTChannel, shards: int = config.update_shards) -> int:
+    """Stable shard number, the same on every host"""
+    return zlib.crc32(channel.channel_id.encode()) % shards
+
+
+def keep_leased(dbservice: DatabaseService, lease: str, owner: str, finished: threading.Event, lost: threading.Event):
+    """Extend the lease until the shard is finished, sets ``lost`` when it can't be renewed"""
+    while not finished.wait(config.lease_ttl_s / 3):
+        try:
+            renewed = dbservice.acquire_lease(lease, owner, config.lease_ttl_s)
+        except Exception as e:
+            logging.warning(f"Renewing lease {lease} failed: {e}")
+            renewed = False
+        if not renewed:
+            logging.warning(f"Lease {lease} lost, stopping its shard")
+            lost.set()
+            return
+
+
+def until_lost(videos: Iterable[VideoYT], lost: threading.Event) -> Iterable[VideoYT]:
+    """Stop a video pipeline as soon as the lease is lost, even in the middle of a channel"""
+    for video in videos:
+        if lost.is_set():
+            raise LeaseLost()
+        yield video
+
+
+def update_channels(
+    channels: List[YTChannel],
+    args: argparse.Namespace,
+    ytconfig: YTConfig,
+    dbservice: DatabaseService,
+    youtube=None,
+    lease_lost: threading.Event | None = None,
+) -> BulkWriteStats:
+    """
+    Fetch and save uploads of the given channels, returns aggregated write counts.
+
+    When ``lease_lost`` gets set the remaining channels are skipped and the
+    counts written so far are returned.
+    """
+    stats = BulkWriteStats()
+    deep_fetch = args.pages is not None or args.until_date is not None
+
+    if deep_fetch:
+        # Feeds only list the 15 latest uploads, backfills need the API
+        page_size = MAX_PAGE_SIZE
+        if args.pages is not None:
+            max_pages = args.pages or None
+        elif args.until_date is not None:
+            # Date backfill: page until the date is reached
+            max_pages = None
+        else:
+            max_pages = ytconfig.pages
+    else:
+        # Default run: same depth as before, `results` newest uploads
+        page_size, max_pages = ytconfig.results, 1
+
+    def backend_of(channel: YTChannel) -> str:
+        if deep_fetch:
+            return "api"
+        return args.backend or channel.backend or ytconfig.backend
 
+    def ingest(channel: YTChannel, videos):
+        videos = unique_videos(videos)
+        if lease_lost is not None:
+            videos = until_lost(videos, lease_lost)
+        if args.durations:
+            # The only field feeds lack, filled from the API in batches of 50
+            videos = iter_with_durations(videos, youtube=youtube)
+        stats.merge(dbservice.save_videos_bulk(videos))
 
-def main():
+    def api_options(channel: YTChannel) -> dict:
+        return {
+            "page_size": page_size,
+            "max_pages": max_pages,
+            "until_date": args.until_date,
+            "until_video_id": dbservice.get_latest_video_id(channel.channel_id) if args.new_only else None,
+            "youtube": youtube,
+        }
+
+    try:
+        # Feed channels: downloaded concurrently, saved as each one arrives
+        feed_channels = [channel for channel in channels if backend_of(channel) == "feed"]
+        for channel, feed in fetch_feeds_concurrently(feed_channels):
+            options = api_options(channel)
+            if feed is None:
+                ingest(channel, iter_playlist_videos(channel, **options))
+            else:
+                ingest(channel, iter_feed_videos(channel, feed=feed, **options))
+
+        # API channels: generator pipeline, pages are fetched lazily while batches are written
+        for channel in channels:
+            if backend_of(channel) == "api":
+                ingest(channel, iter_playlist_videos(channel, **api_options(channel)))
+    except LeaseLost:
+        logging.warning("Lease lost, remaining channels are left to its new holder")
+
+    return stats
+
+
+def run_shard(worker: int, argv: List[str] | None) -> Tuple[BulkWriteStats, Dict]:
+    """
+    Update the channels of every ``config.update_shards`` shard assigned to one worker.
+
+    Runs in a worker process with its own pooled MongoDB client and API
+    session. Each shard is leased in MongoDB first, so an updater on another
+    host never works on the same channels concurrently, whatever its
+    --workers. The lease is renewed from a background thread and the shard
+    is abandoned as soon as a renewal fails. Returns (stats, raw metrics).
+    """
+    args = parse_args(argv)
+    ytconfig = YTConfig.from_yaml(config.yt_config_file)
+    shards: Dict[int, List[YTChannel]] = {}
+    for channel in map(YTChannel.from_dict, ytconfig.channels):
+        shard = shard_of(channel)
+        if shard % args.workers == worker:
+            shards.setdefault(shard, []).append(channel)
+
+    stats = BulkWriteStats()
+    dbservice = DatabaseService(keep_alive=True)
+    youtube = build_youtube()
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        for shard, channels in sorted(shards.items()):
+            lease = f"update-shard-{shard}"
+            if not dbservice.acquire_lease(lease, owner, config.lease_ttl_s):
+                logging.warning(f"Shard {shard} is being updated by another instance, skipping")
+                continue
+            finished, lost = threading.Event(), threading.Event()
+            threading.Thread(
+                target=keep_leased, args=(dbservice, lease, owner, finished, lost), daemon=True
+            ).start()
+            try:
+                stats.merge(update_channels(channels, args, ytconfig, dbservice, youtube=youtube, lease_lost=lost))
+            finally:
+                finished.set()
+                dbservice.release_lease(lease, owner)
+    finally:
+        dbservice.close()
+
+    return stats, metrics.dump()
+
+
+def main(argv=None):
+    args = parse_args(argv)
     ytconfig = YTConfig.from_yaml(config.yt_config_file)
     dbservice = DatabaseService()
+    dbservice.ensure_indexes()
+    dbservice.run_migrations()
+
+    if args.daemon:
+        run_daemon(ytconfig.channels)
+        return
+
+    if args.enqueue:
+        from jobs import enqueue_channel_refresh
+
+        dbservice.ensure_job_indexes()
+        options = [arg for arg in (sys.argv[1:] if argv is None else argv) if arg != "--enqueue"]
+        for channel in map(YTChannel.from_dict, ytconfig.channels):
+            enqueue_channel_refresh(dbservice, channel, options)
+        logging.info(f"Queued refresh of {len(ytconfig.channels)} channels")
+        return
+
+    stats = BulkWriteStats()
+    if args.workers > 1:
+        # Each process parses, builds VideoYT objects and encodes BSON for its own shard
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for shard_stats, shard_metrics in pool.map(run_shard, range(args.workers), [argv] * args.workers):
+                metrics.merge(shard_metrics)
+                stats.merge(shard_stats)
+    else:
+        shard_stats, _ = run_shard(0, argv)
+        stats.merge(shard_stats)
 
-    for channel_data in ytconfig.channels:
+    logging.info(f"Update completed: {stats.inserted} inserted, {stats.updated} updated, "
+                 f"{stats.unchanged} unchanged, {stats.errors} errors")
 
-        channel = YTChannel.from_dict(channel_data)
-        videos = get_last_videos(channel, max_results=ytconfig.results)
-        # dbservice.save_videos(videos)
-        dbservice.save_videos_bulk(videos)
+    if args.metrics_out:
+        metrics.export(args.metrics_out)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,139 @@
+import heapq
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from statistics import median
+from typing import Callable, Dict, List
+
+from config import config
+from database import DatabaseService, as_utc
+from models import YTChannel
+from youtube import iter_playlist_videos
+
+
+def estimate_upload_interval(published: List[datetime]) -> float | None:
+    """Median gap in seconds between consecutive uploads (newest first), None if unknown"""
+    if len(published) < 2:
+        return None
+    gaps = [
+        (as_utc(newer) - as_utc(older)).total_seconds()
+        for newer, older in zip(published, published[1:])
+    ]
+    return max(median(gaps), 1.0)
+
+
+def next_fetch_delay(interval: float | None, last_upload: datetime | None, now: datetime) -> float:
+    """
+    Seconds until the channel should be polled again.
+
+    Busy channels are polled several times per upload interval so new videos
+    show up within minutes. The delay also grows with the time since the
+    last upload, so dormant channels back off to ``scheduler_max_interval_s``.
+    """
+    if interval is None:
+        delay = config.scheduler_max_interval_s / 4
+    else:
+        delay = interval / config.scheduler_polls_per_upload
+
+    if last_upload is not None:
+        silence = (now - as_utc(last_upload)).total_seconds()
+        if interval is not None and silence > 2 * interval:
+            delay = max(delay, silence / config.scheduler_polls_per_upload)
+
+    delay = min(max(delay, config.scheduler_min_interval_s), config.scheduler_max_interval_s)
+    # Jitter spreads channels with similar rates so calls don't come in bursts
+    return delay * random.uniform(1 - config.scheduler_jitter, 1 + config.scheduler_jitter)
+
+
+@dataclass(order=True)
+class ScheduledChannel:
+    due: float
+    channel: YTChannel = field(compare=False)
+    published: List[datetime] = field(compare=False, default_factory=list)
+    latest_video_id: str | None = field(compare=False, default=None)
+
+
+class FetchScheduler:
+    """Priority queue of channels ordered by their next fetch time"""
+
+    def __init__(
+        self,
+        channels: List[YTChannel],
+        db_service: DatabaseService | None = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.db_service = db_service or DatabaseService()
+        self.clock = clock
+        self.sleep = sleep
+        self.queue: List[ScheduledChannel] = []
+
+        history = self.db_service.recent_upload_history([c.channel_id for c in channels], config.scheduler_history)
+        now = self.clock()
+        for channel in channels:
+            published, latest_video_id = history.get(channel.channel_id, ([], None))
+            # First pass polls every channel once, spread over the minimum interval
+            due = now + random.uniform(0, config.scheduler_min_interval_s)
+            heapq.heappush(self.queue, ScheduledChannel(due, channel, published, latest_video_id))
+
+    def reschedule(self, item: ScheduledChannel):
+        now = datetime.fromtimestamp(self.clock(), timezone.utc)
+        interval = estimate_upload_interval(item.published)
+        last_upload = item.published[0] if item.published else None
+        item.due = self.clock() + next_fetch_delay(interval, last_upload, now)
+        heapq.heappush(self.queue, item)
+
+    def fetch(self, item: ScheduledChannel) -> int:
+        """
+        Fetch uploads newer than the last known one, returns number of new videos.
+
+        Pages until the last known upload is reached, at most
+        ``scheduler_max_pages``. A channel without stored uploads only gets
+        its first page.
+        """
+        max_pages = config.scheduler_max_pages if item.latest_video_id else 1
+        new_videos = list(iter_playlist_videos(
+            item.channel,
+            page_size=config.scheduler_page_size,
+            max_pages=max_pages,
+            until_video_id=item.latest_video_id,
+        ))
+        if item.latest_video_id and len(new_videos) >= config.scheduler_page_size * max_pages:
+            logging.warning(
+                f"{item.channel.channel_title}: last known upload not within {len(new_videos)} newest, "
+                "older uploads are left to a backfill"
+            )
+        if new_videos:
+            self.db_service.save_videos_bulk(new_videos)
+            item.latest_video_id = new_videos[0].video_id
+            published = [video.published_at for video in new_videos if isinstance(video.published_at, datetime)]
+            item.published = (published + item.published)[:config.scheduler_history]
+        return len(new_videos)
+
+    def run_once(self) -> ScheduledChannel:
+        """Wait for the next due channel, fetch it and put it back in the queue"""
+        item = heapq.heappop(self.queue)
+        wait = item.due - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+
+        try:
+            new = self.fetch(item)
+            logging.info(f"Fetched {item.channel.channel_title}: {new} new videos")
+        except Exception as e:
+            logging.error(f"Fetching {item.channel.channel_title} failed: {e}")
+
+        self.reschedule(item)
+        return item
+
+    def run_forever(self):
+        while self.queue:
+            self.run_once()
+
+
+def run_daemon(channels: List[Dict[str, str]]):
+    """Long-lived updater: poll each channel according to its upload rate"""
+    scheduler = FetchScheduler([YTChannel.from_dict(channel) for channel in channels])
+    scheduler.run_forever()
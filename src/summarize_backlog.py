@@ -0,0 +1,318 @@
+"""
+Headless AI summarization of every video that has no summary yet.
+
+Videos are summarized with bounded concurrency. Every finished summary (or
+failure) is appended to a JSONL checkpoint right away and summaries are
+written to MongoDB in bulk batches. An interrupted run resumes from the
+checkpoint: summaries that never reached the database are written first,
+finished and failed videos are skipped.
+
+Requests rejected with 429 (rate limit) or 503 (overloaded) are retried with
+exponential backoff, see ``ai_max_attempts``.
+
+Long videos are summarized from their transcript (map-reduce), the rest as
+video, see ``google_ai.summarize_video``. The report breaks latency and
+tokens down per mode.
+
+With ``--batch`` video mode summaries are submitted as Batch API jobs of
+``ai_batch_size`` videos. Submitted job names go to the checkpoint, a resumed
+run waits for those jobs instead of submitting the videos again.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Set
+
+from google import genai
+from google.genai import errors
+
+from config import config
+from database import DatabaseService
+from google_ai import SummaryResult, choose_mode, get_client, instruction_cache, summarize_batch, summarize_video
+from metrics import metrics
+from models import VideoYT
+
+
+RETRYABLE_CODES = (429, 503)
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter after the ``attempts``-th rate limited request"""
+    delay = min(config.ai_retry_base_s * 2 ** (attempts - 1), config.ai_retry_max_s)
+    return delay * random.uniform(0.5, 1.0)
+
+
+@dataclass
+class SummaryReport:
+    done: int = 0
+    failed: int = 0
+    skipped: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    saved_usd: float = 0.0
+    # Storage of the cached instructions, included in cost_usd and deducted from saved_usd
+    cache_storage_usd: float = 0.0
+    elapsed_s: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+    # mode -> {"videos", "latency_s", "input_tokens", "output_tokens"}
+    modes: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def add_cache_storage(self, storage_usd: float):
+        self.cache_storage_usd += storage_usd
+        self.cost_usd += storage_usd
+        self.saved_usd -= storage_usd
+
+    def add(self, result: SummaryResult):
+        self.done += 1
+        self.input_tokens += result.input_tokens
+        self.cached_tokens += result.cached_tokens
+        self.output_tokens += result.output_tokens
+        self.cost_usd += result.cost_usd
+        self.saved_usd += result.saved_usd
+        mode = self.modes.setdefault("batch" if result.batched else result.mode, {"videos": 0, "latency_s": 0.0, "input_tokens": 0, "output_tokens": 0})
+        mode["videos"] += 1
+        mode["latency_s"] += result.latency_s
+        mode["input_tokens"] += result.input_tokens
+        mode["output_tokens"] += result.output_tokens
+
+    def __str__(self) -> str:
+        per_minute = self.done / self.elapsed_s * 60 if self.elapsed_s else 0.0
+        lines = [
+            f"{self.done} summarized, {self.failed} failed, {self.skipped} skipped in {self.elapsed_s:.1f} s "
+            f"({per_minute:.1f}/min), {self.input_tokens} input ({self.cached_tokens} cached) / "
+            f"{self.output_tokens} output tokens, ~${self.cost_usd:.4f} (${self.saved_usd:.4f} saved by cache and batch, "
+            f"after ${self.cache_storage_usd:.4f} cache storage)"
+        ]
+        for name, mode in sorted(self.modes.items()):
+            videos = mode["videos"]
+            lines.append(
+                f"  {name}: {videos} videos, {mode['latency_s'] / videos:.1f} s, "
+                f"{mode['input_tokens'] // videos} input / {mode['output_tokens'] // videos} output tokens per video"
+            )
+        return "\n".join(lines)
+
+
+class Checkpoint:
+    """
+    Append-only JSONL log of finished ({video_id, summary}) and failed ({video_id, error}) videos
+    and of submitted batch jobs ({batch, video_ids})
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.summaries: Dict[str, str] = {}
+        self.failed: Set[str] = set()
+        self.batches: Dict[str, List[str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    entry = json.loads(line)
+                    if "batch" in entry:
+                        self.batches[entry["batch"]] = entry["video_ids"]
+                    elif "summary" in entry:
+                        self.summaries[entry["video_id"]] = entry["summary"]
+                        self.failed.discard(entry["video_id"])
+                    else:
+                        self.failed.add(entry["video_id"])
+        self.file = open(path, "a", encoding="utf-8")
+
+    def record(self, entry: Dict[str, str]):
+        self.file.write(json.dumps(entry) + "\n")
+        # Flushed per entry so a killed run loses at most the requests in flight
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class BacklogSummarizer:
+    def __init__(
+        self,
+        db_service: DatabaseService,
+        checkpoint: Checkpoint,
+        client: genai.Client | None = None,
+        concurrency: int | None = None,
+        flush_size: int | None = None,
+        batch_size: int | None = None,
+    ):
+        self.db_service = db_service
+        self.checkpoint = checkpoint
+        # Created in run(), the shared client belongs to the event loop
+        self.client = client
+        self.concurrency = concurrency or config.ai_concurrency
+        self.flush_size = flush_size or config.ai_summary_flush_size
+        self.batch_size = batch_size or config.ai_batch_size
+        self.pending: Dict[str, str] = {}
+        self.report = SummaryReport()
+        # One bulk write at a time, they share the database client
+        self.flush_lock = asyncio.Lock()
+
+    async def flush(self):
+        async with self.flush_lock:
+            if self.pending:
+                summaries, self.pending = self.pending, {}
+                await asyncio.to_thread(self.db_service.save_summaries_bulk, summaries)
+
+    async def finish(self, video: VideoYT, result: SummaryResult | Exception):
+        if isinstance(result, SummaryResult) and not result.text:
+            result = ValueError("empty response")
+        if isinstance(result, Exception):
+            logging.warning(f"Summary of {video.video_id} failed: {result}")
+            self.report.failed += 1
+            self.report.errors[video.video_id] = str(result)
+            self.checkpoint.record({"video_id": video.video_id, "error": str(result)})
+            return
+
+        self.report.add(result)
+
+        self.checkpoint.record({"video_id": video.video_id, "summary": result.text})
+        self.pending[video.video_id] = result.text
+        if len(self.pending) >= self.flush_size:
+            await self.flush()
+
+    async def summarize(self, video: VideoYT):
+        for attempt in range(1, config.ai_max_attempts + 1):
+            try:
+                with metrics.timed("ai.summarize_backlog"):
+                    result = await summarize_video(video, self.client)
+            except errors.APIError as e:
+                result = e
+                if e.code in RETRYABLE_CODES and attempt < config.ai_max_attempts:
+                    delay = backoff_delay(attempt)
+                    logging.info(f"Summary of {video.video_id} got {e.code}, retrying in {delay:.0f} s")
+                    await asyncio.sleep(delay)
+                    continue
+            except Exception as e:
+                result = e
+            break
+        await self.finish(video, result)
+
+    async def summarize_batch(self, videos: List[VideoYT], job_name: str | None = None):
+        def on_submit(name: str):
+            self.checkpoint.record({"batch": name, "video_ids": [video.video_id for video in videos]})
+
+        try:
+            with metrics.timed("ai.summarize_backlog.batch"):
+                results = await summarize_batch(videos, self.client, job_name, on_submit)
+        except Exception as e:
+            results = {video.video_id: e for video in videos}
+        for video in videos:
+            await self.finish(video, results[video.video_id])
+
+    async def worker(self, queue: asyncio.Queue):
+        while not queue.empty():
+            await self.summarize(queue.get_nowait())
+
+    def plan_batches(self, queue: asyncio.Queue) -> List[tuple]:
+        """
+        Move video mode videos from the queue into (videos, job_name) batches,
+        job_name is set for batches submitted by an interrupted run
+        """
+        videos: Dict[str, VideoYT] = {}
+        rest = []
+        while not queue.empty():
+            video = queue.get_nowait()
+            if choose_mode(video.duration_seconds) == "video":
+                videos[video.video_id] = video
+            else:
+                rest.append(video)
+        for video in rest:
+            queue.put_nowait(video)
+
+        batches = []
+        for job_name, video_ids in self.checkpoint.batches.items():
+            submitted = [videos.pop(video_id) for video_id in video_ids if video_id in videos]
+            if submitted:
+                batches.append((submitted, job_name))
+        remaining = list(videos.values())
+        for i in range(0, len(remaining), self.batch_size):
+            batches.append((remaining[i:i + self.batch_size], None))
+        return batches
+
+    async def run(self, videos: List[VideoYT], retry_failed: bool = False, batch: bool = False) -> SummaryReport:
+        start = time.perf_counter()
+        self.client = self.client or get_client()
+        storage_usd = instruction_cache.storage_usd
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for video in videos:
+            if video.video_id in self.checkpoint.summaries:
+                # Summarized by an interrupted run but never written to the database
+                self.pending[video.video_id] = self.checkpoint.summaries[video.video_id]
+                self.report.skipped += 1
+            elif video.video_id in self.checkpoint.failed and not retry_failed:
+                self.report.skipped += 1
+            else:
+                queue.put_nowait(video)
+        await self.flush()
+
+        batches = self.plan_batches(queue) if batch else []
+        await asyncio.gather(
+            *(self.summarize_batch(batch_videos, job_name) for batch_videos, job_name in batches),
+            *(self.worker(queue) for _ in range(self.concurrency)),
+        )
+        await self.flush()
+
+        self.report.add_cache_storage(instruction_cache.storage_usd - storage_usd)
+        self.report.elapsed_s = time.perf_counter() - start
+        return self.report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate AI summaries for all videos without one")
+    parser.add_argument("--channel-id", default=None, help="Only videos of this channel")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Published on or after this ISO date")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Published before this ISO date")
+    parser.add_argument("--max-minutes", type=int, default=None, help="Skip videos longer than this (and unknown durations)")
+    parser.add_argument("--limit", type=int, default=0, help="Summarize at most this many videos (newest first)")
+    parser.add_argument("--concurrency", type=int, default=config.ai_concurrency, help="Requests in flight")
+    parser.add_argument("--checkpoint", default=config.ai_checkpoint_file, help="JSONL checkpoint file used to resume")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry videos that failed in a previous run")
+    parser.add_argument(
+        "--batch", action="store_true",
+        help=f"Submit video mode summaries as Batch API jobs of {config.ai_batch_size} (cheaper, can take hours)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only print how many videos match")
+    parser.add_argument("--metrics-out", default=None, help="Write per-operation metrics to file")
+    args = parser.parse_args(argv)
+
+    # One client for the whole run, flushes are serialized by the summarizer
+    db_service = DatabaseService(keep_alive=True)
+    videos = db_service.find_unsummarized(
+        channel_id=args.channel_id,
+        published_after=args.since,
+        published_before=args.until,
+        max_duration_seconds=args.max_minutes * 60 if args.max_minutes is not None else None,
+        limit=args.limit,
+    )
+    if args.dry_run:
+        print(f"{len(videos)} videos without summary match")
+        db_service.close()
+        return
+
+    checkpoint = Checkpoint(args.checkpoint)
+    try:
+        summarizer = BacklogSummarizer(db_service, checkpoint, concurrency=args.concurrency)
+        report = asyncio.run(summarizer.run(videos, retry_failed=args.retry_failed, batch=args.batch))
+    finally:
+        checkpoint.close()
+        db_service.close()
+
+    print(report)
+    for video_id, error in report.errors.items():
+        print(f"  failed {video_id}: {error}")
+
+    if args.metrics_out:
+        metrics.export(args.metrics_out)
+
+
+if __name__ == "__main__":
+    main()
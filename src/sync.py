@@ -0,0 +1,83 @@
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import batched
+
+from config import config
+from database import DatabaseService, as_utc
+from local_store import LocalStore
+from metrics import metrics
+
+LAST_PULL_KEY = "last_pull_updated_at"
+
+
+@dataclass
+class SyncResult:
+    pushed: int = 0
+    dropped: int = 0
+    pulled: int = 0
+
+
+class SyncEngine:
+    """
+    Two-way sync between the local SQLite store and MongoDB.
+
+    push: queued local mutations are applied with an optimistic version check,
+          conflicts are resolved per field by DatabaseService.apply_mutation.
+    pull: documents with ``updated_at`` newer than the last pull are copied
+          into the local store.
+    """
+
+    def __init__(self, store: LocalStore, db_service: DatabaseService | None = None):
+        self.store = store
+        self.db_service = db_service or DatabaseService()
+
+    def push(self, result: SyncResult):
+        for mutation in self.store.pending_mutations():
+            applied = self.db_service.apply_mutation(
+                mutation["video_id"],
+                json.loads(mutation["changes"]),
+                mutation["base_version"],
+                datetime.fromisoformat(mutation["created_at"]),
+            )
+            self.store.complete_mutation(mutation["video_id"], mutation["created_at"])
+            if applied:
+                result.pushed += 1
+            else:
+                result.dropped += 1
+
+    def pull(self, result: SyncResult):
+        last_pull = self.store.get_state(LAST_PULL_KEY)
+        since = datetime.fromisoformat(last_pull) if last_pull else None
+        newest = since
+
+        for batch in batched(self.db_service.find_changed_videos(since), config.mongo_write_batch_size):
+            result.pulled += self.store.upsert_remote(batch)
+            for doc in batch:
+                updated_at = doc.get("updated_at")
+                if updated_at is not None and (newest is None or as_utc(updated_at) > newest):
+                    newest = as_utc(updated_at)
+
+        if newest is not None:
+            self.store.set_state(LAST_PULL_KEY, newest.isoformat())
+
+    @metrics.instrument("sync.sync_once")
+    def sync_once(self) -> SyncResult:
+        """Push local changes first so a pull never overwrites them with stale remote state"""
+        result = SyncResult()
+        self.push(result)
+        self.pull(result)
+        logging.info(f"Sync completed: {result.pushed} pushed, {result.dropped} dropped, {result.pulled} pulled")
+        return result
+
+
+def main():
+    """Run one sync cycle, e.g. to seed the local store before going offline"""
+    store = LocalStore()
+    SyncEngine(store).sync_once()
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import pickle
+import re
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any
 from config import config
 from models import Video
 from models import VideoYT
@@ -21,6 +23,70 @@ def count_new_videos(videos: List[Any]) -> int:
     """Count videos published within the last two days"""
     return sum(1 for video in videos if is_within_last_two_days(video.published_at))
 
+ISO_DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+def parse_iso_duration(duration: str) -> int | None:
+    """Parse YouTube ISO 8601 duration (e.g. PT1H2M3S) into seconds, None if unknown"""
+    match = ISO_DURATION_RE.match(duration or "")
+    if not match or duration in ("P", "PT"):
+        return None
+    parts = {k: int(v) for k, v in match.groupdict(default="0").items()}
+    return parts["days"] * 86400 + parts["hours"] * 3600 + parts["minutes"] * 60 + parts["seconds"]
+
+def format_duration(seconds: int | None) -> str:
+    """Format seconds as H:MM:SS / M:SS for display"""
+    if seconds is None:
+        return "N/A"
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{secs:02}"
+    return f"{minutes}:{secs:02}"
+
+def unique_videos(videos: Iterable[VideoYT]) -> Iterator[VideoYT]:
+    """Yield videos skipping repeated video_ids (pages can overlap while uploads happen)"""
+    seen_ids: set[str] = set()
+    for video in videos:
+        if video.video_id in seen_ids:
+            continue
+        seen_ids.add(video.video_id)
+        yield video
+
+def summary_preview(summary: str) -> str:
+    """Start of a summary stored next to it for list views"""
+    return summary[:config.summary_preview_chars]
+
+class LRUCache:
+    """Small mapping that drops the least recently used entry when full"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.items: OrderedDict = OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self.items:
+            return default
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.maxsize:
+            self.items.popitem(last=False)
+
+summary_cache = LRUCache(config.summary_cache_size)
+
+def load_summary(video_id: str) -> str:
+    """Full summary of a video, from the cache or fetched by video_id"""
+    summary = summary_cache.get(video_id)
+    if summary is None:
+        summary = get_store().get_summary(video_id)
+        summary_cache.put(video_id, summary)
+    return summary
+
 def pickle_data(data: Dict[str, List[Any]]):
     """Save data to pickle file"""
     with open(config.default_pickle_file, "wb") as f:
@@ -31,14 +97,30 @@ def load_pickle_data() -> Dict[str, List[Any]]:
     with open(config.default_pickle_file, "rb") as f:
         return pickle.load(f)
 
-def get_initial_data() -> Dict[str, List[VideoYT]]:
-    """Get initial data from pickle file or database"""
+_local_store = None
+
+def get_store():
+    """
+    Store used by the TUI for reads and user state writes.
+
+    LocalStore (SQLite, synced in background) in offline-first mode,
+    DatabaseService (MongoDB) otherwise. Both expose the same methods.
+    """
+    global _local_store
+    if config.offline_first:
+        if _local_store is None:
+            from local_store import LocalStore
+            _local_store = LocalStore()
+        return _local_store
+
     from database import DatabaseService
+    return DatabaseService(deadline_s=config.db_deadline_s)
 
+def get_initial_data() -> Dict[str, List[VideoYT]]:
+    """Get initial data from pickle file or database"""
     # Load data from pickle file is disabled
     # as it is not used in the current implementation.
-    db_service = DatabaseService()
-    return db_service.load_videos()
+    return get_store().load_videos()
 
     # file_path = Path(config.default_pickle_file)
     # if file_path.exists():
@@ -0,0 +1,141 @@
+"""
+In-memory store of the videos shown by the TUI.
+
+One ``VideoStore`` per app holds every loaded video once, indexed by
+``video_id`` and by channel, with per-channel counters and sorted views that
+are kept up to date as videos change. Widgets do not share lists of videos:
+they read from the store and subscribe to its change events, so a change only
+touches the affected table row and channel badge.
+
+Mutations and listeners run on the UI thread, background threads hand their
+changes over with ``call_from_thread``.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from models import VideoYT
+from utils import is_within_last_two_days
+
+# Table column key -> sort key, unknown durations always go last
+SORT_KEYS: Dict[str, Callable[[VideoYT], Any]] = {
+    "published_at": lambda video: video.published_at,
+    "duration": lambda video: (video.duration_seconds is None, video.duration_seconds or 0),
+    "seen": lambda video: video.seen,
+    "has_summary": lambda video: video.has_summary,
+    "title": lambda video: video.title.lower(),
+    "channel_title": lambda video: video.channel_title.lower(),
+}
+
+
+@dataclass
+class ChannelCounts:
+    total: int = 0
+    # Published within the "new" window of is_within_last_two_days
+    new: int = 0
+    unseen: int = 0
+    summarized: int = 0
+
+    def add(self, video: VideoYT, sign: int = 1):
+        self.total += sign
+        self.new += sign * is_within_last_two_days(video.published_at)
+        self.unseen += sign * (not video.seen)
+        self.summarized += sign * video.has_summary
+
+
+@dataclass
+class VideoChanged:
+    video: VideoYT
+    changes: Dict[str, Any]
+
+
+@dataclass
+class ChannelCountsChanged:
+    channel: str
+    counts: ChannelCounts
+
+
+@dataclass
+class StoreReloaded:
+    pass
+
+
+class VideoStore:
+    def __init__(self, data: Dict[str, List[VideoYT]] | None = None):
+        self.videos: Dict[str, VideoYT] = {}
+        # Channel title -> videos in load order (newest first)
+        self.channels: Dict[str, List[VideoYT]] = {}
+        self.counts: Dict[str, ChannelCounts] = {}
+        # Channel -> (sort column, reverse) -> sorted videos, dropped when the channel changes
+        self.sorted_views: Dict[str, Dict[tuple, List[VideoYT]]] = {}
+        self.listeners: List[Callable[[object], None]] = []
+        # Prefetch threads read sorted views while the UI thread updates
+        self._lock = threading.Lock()
+        self.load(data or {}, notify=False)
+
+    def subscribe(self, listener: Callable[[object], None]):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[object], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def emit(self, event: object):
+        for listener in list(self.listeners):
+            listener(event)
+
+    def load(self, data: Dict[str, List[VideoYT]], notify: bool = True):
+        """Replace all videos, e.g. after a reload from the database"""
+        with self._lock:
+            self.channels = {channel: list(videos) for channel, videos in data.items()}
+            self.videos = {video.video_id: video for videos in self.channels.values() for video in videos}
+            self.counts = {}
+            for channel, videos in self.channels.items():
+                counts = self.counts[channel] = ChannelCounts()
+                for video in videos:
+                    counts.add(video)
+            self.sorted_views.clear()
+        if notify:
+            self.emit(StoreReloaded())
+
+    def get(self, video_id: str) -> VideoYT | None:
+        return self.videos.get(video_id)
+
+    def channel_names(self) -> List[str]:
+        return list(self.channels)
+
+    def channel(self, channel: str) -> List[VideoYT]:
+        return self.channels.get(channel, [])
+
+    def sorted(self, channel: str, column: str, reverse: bool) -> List[VideoYT]:
+        """Videos of a channel sorted by a table column, computed once until the channel changes"""
+        with self._lock:
+            views = self.sorted_views.setdefault(channel, {})
+            view = views.get((column, reverse))
+            if view is None:
+                view = views[(column, reverse)] = sorted(self.channel(channel), key=SORT_KEYS[column], reverse=reverse)
+            return view
+
+    def update(self, video: VideoYT, **changes):
+        """
+        Change fields of a video and notify listeners.
+
+        ``video`` may be a copy that is not in the store (e.g. a row of the
+        cross-channel feed), the change then applies to both.
+        """
+        with self._lock:
+            stored = self.videos.get(video.video_id)
+            counts = self.counts.get(stored.channel_title) if stored is not None else None
+            before = (counts.new, counts.unseen, counts.summarized) if counts is not None else None
+            if counts is not None:
+                counts.add(stored, -1)
+            for target in {id(v): v for v in (stored, video) if v is not None}.values():
+                for name, value in changes.items():
+                    setattr(target, name, value)
+            if counts is not None:
+                counts.add(stored)
+                self.sorted_views.pop(stored.channel_title, None)
+
+        self.emit(VideoChanged(stored or video, changes))
+        if counts is not None and before != (counts.new, counts.unseen, counts.summarized):
+            self.emit(ChannelCountsChanged(stored.channel_title, counts))
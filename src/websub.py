@@ -0,0 +1,292 @@
+"""
+WebSub (PubSubHubbub) push ingestion of new uploads.
+
+YouTube publishes channel Atom feeds through a WebSub hub. ``WebSubServer``
+is the subscriber callback: it confirms subscriptions and turns pushed feed
+entries into ``VideoYT`` objects saved via ``DatabaseService.save_videos_bulk``.
+Polling with ``update`` stays as the fallback for anything the hub misses.
+
+``LocalHub`` is a minimal hub for offline runs: it verifies subscribers like the
+real hub does and publishes sample feeds to them.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import io
+import logging
+import secrets
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Tuple
+
+from config import config
+from metrics import metrics
+from models import VideoYT, YTConfig
+from feeds import iter_feed_entries
+
+FEED_TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+
+
+def parse_atom_entries(body: bytes) -> List[VideoYT]:
+    """Parse YouTube Atom feed / notification entries, deleted entries are skipped"""
+    return list(iter_feed_entries(io.BytesIO(body)))
+
+
+def sign(secret: str, body: bytes) -> str:
+    """X-Hub-Signature header value for body"""
+    return "sha1=" + hmac.new(secret.encode(), body, hashlib.sha1).hexdigest()
+
+
+def http_request(url: str, data: Dict[str, str] | bytes | None = None, headers: Dict[str, str] | None = None) -> Tuple[int, bytes]:
+    """Blocking HTTP call (run it with asyncio.to_thread), returns (status, body)"""
+    if isinstance(data, dict):
+        data = urllib.parse.urlencode(data).encode()
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=config.connection_timeout_ms / 1000) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+class RequestTooLarge(ValueError):
+    """Request headers or body exceed the configured limits"""
+
+
+async def read_http_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    """Minimal HTTP/1.1 request parser: (method, target, headers, body)"""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    method, target, _ = request_line.split(" ", 2)
+    headers: Dict[str, str] = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        if len(headers) >= config.websub_max_headers:
+            raise RequestTooLarge("too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length < 0:
+        raise ValueError("negative Content-Length")
+    # Checked before reading, the body is never buffered beyond the limit
+    if length > config.websub_max_body_bytes:
+        raise RequestTooLarge(f"body of {length} bytes")
+    body = await reader.readexactly(length)
+    return method, target, headers, body
+
+
+async def write_http_response(writer: asyncio.StreamWriter, status: int, body: bytes = b""):
+    reason = {
+        200: "OK", 202: "Accepted", 204: "No Content", 403: "Forbidden", 404: "Not Found", 413: "Content Too Large",
+    }.get(status, "")
+    writer.write(
+        f"HTTP/1.1 {status} {reason}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    writer.close()
+
+
+class WebSubServer:
+    """
+    Subscriber callback endpoint receiving hub verifications and feed notifications.
+
+    Requires a callback URL and a secret: notifications are only ingested
+    with a valid HMAC signature, otherwise anyone reaching the port could
+    write videos into the database.
+    """
+
+    def __init__(
+        self,
+        callback_url: str,
+        hub_url: str | None = None,
+        secret: str | None = None,
+        on_videos: Callable[[List[VideoYT]], object] | None = None,
+    ):
+        self.callback_url = callback_url
+        self.hub_url = hub_url or config.websub_hub_url
+        self.secret = secret if secret is not None else config.websub_secret
+        if not self.callback_url:
+            raise ValueError("WEBSUB_CALLBACK_URL environment variable is not set.")
+        if not self.secret:
+            raise ValueError("WEBSUB_SECRET environment variable is not set.")
+        self.topics: set[str] = set()
+        if on_videos is None:
+            from database import DatabaseService
+            on_videos = DatabaseService().save_videos_bulk
+        self.on_videos = on_videos
+        self.received = 0
+
+    async def subscribe(self, channel_id: str, mode: str = "subscribe") -> bool:
+        """Ask the hub to (un)subscribe the callback to a channel feed"""
+        topic = FEED_TOPIC_URL.format(channel_id=channel_id)
+        self.topics.add(topic)
+        data = {
+            "hub.callback": self.callback_url,
+            "hub.topic": topic,
+            "hub.mode": mode,
+            "hub.verify": "async",
+            "hub.lease_seconds": str(config.websub_lease_seconds),
+            "hub.secret": self.secret,
+        }
+        status, body = await asyncio.to_thread(http_request, self.hub_url, data)
+        if status not in (202, 204):
+            logging.error(f"WebSub {mode} for {channel_id} failed: {status} {body[:200]!r}")
+            return False
+        return True
+
+    async def subscribe_all(self, channel_ids: List[str]):
+        results = await asyncio.gather(*(self.subscribe(channel_id) for channel_id in channel_ids))
+        logging.info(f"WebSub: {sum(results)}/{len(channel_ids)} subscriptions requested")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, target, headers, body = await read_http_request(reader)
+        except RequestTooLarge as e:
+            logging.warning(f"WebSub request rejected: {e}")
+            await write_http_response(writer, 413)
+            return
+        except (ValueError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+
+        if method == "GET":
+            # Hub verification of intent: echo challenge for topics we asked for
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(target).query))
+            if query.get("hub.topic") in self.topics and "hub.challenge" in query:
+                await write_http_response(writer, 200, query["hub.challenge"].encode())
+            else:
+                await write_http_response(writer, 404)
+            return
+
+        if method == "POST":
+            if not hmac.compare_digest(headers.get("x-hub-signature", ""), sign(self.secret, body)):
+                # Spec: acknowledge but ignore notifications with a bad signature
+                await write_http_response(writer, 204)
+                logging.warning("WebSub notification with invalid signature ignored")
+                return
+            # Acknowledge right away, hubs retry slow callbacks
+            await write_http_response(writer, 204)
+            await self.ingest(body)
+            return
+
+        await write_http_response(writer, 404)
+
+    @metrics.instrument("websub.ingest")
+    async def ingest(self, body: bytes):
+        try:
+            videos = parse_atom_entries(body)
+        except ET.ParseError as e:
+            logging.warning(f"Unparsable WebSub notification: {e}")
+            return
+        if videos:
+            await asyncio.to_thread(self.on_videos, videos)
+            # Counted once saved, waiting on it means the videos are in the database
+            self.received += len(videos)
+
+    async def renew_forever(self, channel_ids: List[str]):
+        """Re-subscribe before leases expire"""
+        while True:
+            await self.subscribe_all(channel_ids)
+            await asyncio.sleep(config.websub_lease_seconds * 0.8)
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+class LocalHub:
+    """Offline stand-in for the WebSub hub used by YouTube"""
+
+    def __init__(self):
+        # topic -> {callback: secret}
+        self.subscribers: Dict[str, Dict[str, str]] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        method, _, _, body = await read_http_request(reader)
+        if method != "POST":
+            await write_http_response(writer, 404)
+            return
+
+        form = dict(urllib.parse.parse_qsl(body.decode()))
+        callback, topic, mode = form.get("hub.callback"), form.get("hub.topic"), form.get("hub.mode")
+        await write_http_response(writer, 202)
+
+        # Verification of intent, like the real hub does after accepting
+        challenge = secrets.token_hex(8)
+        query = urllib.parse.urlencode({
+            "hub.mode": mode, "hub.topic": topic, "hub.challenge": challenge,
+            "hub.lease_seconds": form.get("hub.lease_seconds", ""),
+        })
+        status, response = await asyncio.to_thread(http_request, f"{callback}?{query}")
+        if status != 200 or response.decode() != challenge:
+            logging.warning(f"LocalHub: verification failed for {callback}")
+            return
+        if mode == "subscribe":
+            self.subscribers.setdefault(topic, {})[callback] = form.get("hub.secret", "")
+        else:
+            self.subscribers.get(topic, {}).pop(callback, None)
+
+    async def publish(self, channel_id: str, body: bytes) -> int:
+        """Push a feed to every subscriber of the channel topic, returns number delivered"""
+        topic = FEED_TOPIC_URL.format(channel_id=channel_id)
+        delivered = 0
+        for callback, secret in self.subscribers.get(topic, {}).items():
+            headers = {"Content-Type": "application/atom+xml"}
+            if secret:
+                headers["X-Hub-Signature"] = sign(secret, body)
+            status, _ = await asyncio.to_thread(http_request, callback, body, headers)
+            delivered += status < 300
+        return delivered
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve():
+    ytconfig = YTConfig.from_yaml(config.yt_config_file)
+    server = WebSubServer(config.websub_callback_url)
+    listener = await server.start(config.websub_host, config.websub_port)
+    logging.info(f"WebSub callback listening on {config.websub_host}:{config.websub_port}")
+    async with listener:
+        await server.renew_forever([channel["channel_id"] for channel in ytconfig.channels])
+
+
+async def local_demo(feed_path: str, port: int = 8765):
+    """Subscribe to a LocalHub and publish a stored feed, videos are printed instead of saved"""
+    with open(feed_path, "rb") as file:
+        body = file.read()
+    channel_id = parse_atom_entries(body)[0].channel_id
+
+    hub = LocalHub()
+    hub_server = await hub.start("127.0.0.1", port + 1)
+    server = WebSubServer(
+        f"http://127.0.0.1:{port}/websub",
+        hub_url=f"http://127.0.0.1:{port + 1}/subscribe",
+        secret="local-secret",
+        on_videos=lambda videos: [print(video) for video in videos],
+    )
+    callback_server = await server.start("127.0.0.1", port)
+
+    async with hub_server, callback_server:
+        await server.subscribe(channel_id)
+        while not hub.subscribers:
+            await asyncio.sleep(0.01)
+        delivered = await hub.publish(channel_id, body)
+        await asyncio.sleep(0.1)
+    print(f"Delivered to {delivered} subscriber(s), {server.received} videos ingested")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WebSub push ingestion of new YouTube uploads")
+    parser.add_argument("--local-demo", metavar="FEED", help="Run offline against LocalHub with a stored Atom feed")
+    args = parser.parse_args(argv)
+
+    if args.local_demo:
+        asyncio.run(local_demo(args.local_demo))
+    else:
+        asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
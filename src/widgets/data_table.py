@@ -1,18 +1,29 @@
+import logging
 from textual.widgets import DataTable
 from textual.binding import Binding
 from textual import on
 from rich.text import Text
 from datetime import date, timedelta
-from typing import List
-from models import Video
-from database import DatabaseService
+from typing import Awaitable, Dict, List
+from models import Job, Video
 from config import config
-from utils import is_today, is_within_last_two_days
-from youtube import get_video_duration
+from metrics import metrics
+from utils import (
+    is_today, is_within_last_two_days, parse_iso_duration, format_duration, get_store, summary_cache, summary_preview,
+)
+from youtube import MAX_PAGE_SIZE, get_video_duration, iter_with_durations
 from widgets.summary_modalscreen import SummaryScreen
-from google_ai import get_summary_url
-from textual.worker import Worker, WorkerState
-from database import DatabaseService, MongoDBAsyncClient
+from widgets.list_view import UNSEEN_FEED_KEY
+from google_ai import get_summary
+from textual.worker import Worker, WorkerState, get_current_worker
+from database import DatabaseService, VideoRepository
+from jobs import enqueue_video_job
+from video_store import SORT_KEYS, StoreReloaded, VideoChanged
+from collections import OrderedDict
+from dataclasses import replace
+from functools import partial
+
+CHANNEL_COLUMN_KEY = "channel_title"
 
 
 class CustomDataTable(DataTable):
@@ -24,28 +35,62 @@ class CustomDataTable(DataTable):
         Binding("s", "display_summary", "Display summary", show=True),
         Binding("a", "get_ai_summary", "Get AI summary", show=True),
         Binding("w", "show_worker_status", "Worker status", show=True),
+        Binding("o", "cycle_sort", "Sort", show=True),
+        Binding("f", "toggle_short_unseen", "Short & unseen", show=True),
+        Binding("n", "load_more", "Load more", show=True),
     ]
 
+    # Table column key -> indexed Mongo field used for server-side sort
+    SORT_FIELDS = {
+        "published_at": "published_at",
+        "duration": "duration_seconds",
+        "seen": "seen",
+        "has_summary": "has_summary",
+        "title": "title",
+        "channel_title": "channel_title",
+    }
+    CYCLE_SORT_COLUMNS = ("published_at", "duration", "seen", "has_summary")
+    # Video field -> table columns showing it
+    FIELD_COLUMNS = {
+        "seen": ("title", "seen"),
+        "duration_seconds": ("duration",),
+        "has_summary": ("has_summary",),
+    }
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.videos: List[Video] = []
+        # video_id -> video of the rendered rows, rows are addressed by key, never by position
+        self.video_rows: Dict[str, Video] = {}
         self.key = ""
-
+        self.sort_column = "published_at"
+        self.sort_reverse = True
+        self.short_unseen_only = False
+        # Async MongoDB access with deadlines, used unless offline-first
+        self.repository = VideoRepository()
+        # (key, sort, filter) -> (videos, rows) ready for add_row, least recently used first
+        self.row_cache: OrderedDict[tuple, tuple[List[Video], List[tuple]]] = OrderedDict()
+        # Bumped whenever cached rows go stale, rows prepared before that are dropped
+        self.cache_generation = 0
+        # videos.list calls left for prefetching missing durations this session
+        self.duration_quota = config.prefetch_duration_quota
+        # Videos already looked up, e.g. private ones the API returns no duration for
+        self.duration_looked_up: set[str] = set()
+        # job_id -> video of queued jobs whose result is still to be shown
+        self.watched_jobs: Dict[str, Video] = {}
 
     async def action_get_ai_summary(self):
         """Get detailed information about the current row's video"""
-        if not self.videos:
+        video = self.current_video()
+        if video is None:
             return
-            
-        row = self.cursor_row
-        if row >= len(self.videos):
+        if self.use_job_queue():
+            self.enqueue("summary", video)
             return
-            
-        video = self.videos[row]
         # summary = await get_summary_url(video.url)
         self.app.notify(f"Generating AI summary...\n{video.title}", title="Processing")
         self.worker = self.run_worker(
-            get_summary_url(video.url, video),
+            get_summary(video),
             group="ai_summary",
             exclusive=False,
             )
@@ -69,8 +114,12 @@ class CustomDataTable(DataTable):
             summary, video = event.worker.result
             self.app.notify(f"AI summary fetched successfully!\n{video.title}\nGroup: {event.worker.group}", title="Success")
             
-            db_service = DatabaseService()
-            db_service.update_video_summary(video.video_id, summary)
+            if config.offline_first:
+                get_store().update_video_summary(video.video_id, summary)
+            else:
+                self.run_worker(self.save_remote(self.repository.set_summary(video.video_id, summary), "summary"), group="db_write")
+            summary_cache.put(video.video_id, summary)
+            self.app.store.update(video, has_summary=True, summary_preview=summary_preview(summary))
 
         elif event.state == WorkerState.ERROR:
             self.app.notify("Failed to fetch AI summary.", title="Error")
@@ -78,102 +127,462 @@ class CustomDataTable(DataTable):
 
     def action_display_summary(self):
         """Display a summary of the current video"""
-        if not self.videos:
+        video = self.current_video()
+        if video is None:
             return
-            
-        row = self.cursor_row
-        if row >= len(self.videos):
-            return
-            
-        video = self.videos[row]
 
-        self.app.push_screen(
-            SummaryScreen(
-                text=video.summary if video.has_summary else "No summary available.",
-            )
-        )
+        if video.has_summary:
+            # Only the preview is loaded with the rows, the full text comes by video_id
+            self.app.push_screen(SummaryScreen(video_id=video.video_id))
+        else:
+            self.app.push_screen(SummaryScreen(text="No summary available."))
 
     def on_mount(self) -> None:
         self.cursor_type = "row"
-        # self.add_columns(*config.column_headers)
-        self.add_column("Published At", key="published_at")
-        self.add_column("Title", key="title")
-        self.add_column("Duration", key="duration")
-        self.add_column("Has summary", key="has_summary")
+        for label, column_key in config.column_headers:
+            self.add_column(label, key=column_key)
         self.cursor_foreground_priority = 'renderable'
+        self.app.store.subscribe(self.on_store_event)
+        if self.use_job_queue():
+            self.set_interval(config.job_poll_interval_s, self.watch_jobs)
+
+    def use_job_queue(self) -> bool:
+        """Slow work goes to the `jobs` workers instead of running in this process"""
+        return config.job_queue and not config.offline_first
+
+    def enqueue(self, kind: str, video: Video):
+        self.app.notify(f"Queued {kind} job\n{video.title}", title="Jobs")
+        self.run_worker(partial(self.enqueue_job, kind, video), thread=True, group="jobs")
+
+    def enqueue_job(self, kind: str, video: Video):
+        try:
+            job_id = enqueue_video_job(DatabaseService(deadline_s=config.db_deadline_s), kind, video)
+        except Exception as e:
+            self.app.call_from_thread(self.app.notify, f"Queueing {kind} failed: {e}", title="Jobs", severity="error")
+            return
+        self.app.call_from_thread(self.watched_jobs.__setitem__, job_id, video)
+
+    def watch_jobs(self):
+        """Poll the status of queued jobs in background"""
+        if self.watched_jobs:
+            self.run_worker(partial(self.poll_jobs, list(self.watched_jobs)), thread=True, group="job_poll", exclusive=True)
+
+    def poll_jobs(self, job_ids: List[str]):
+        try:
+            jobs = DatabaseService(deadline_s=config.db_deadline_s).get_jobs(job_ids)
+        except Exception as e:
+            logging.info(f"Job status poll failed: {e}")
+            return
+        self.app.call_from_thread(self.apply_jobs, jobs)
+
+    def apply_jobs(self, jobs: Dict[str, Job]):
+        """Show results of finished jobs, their writes are already in the database"""
+        for job_id, job in jobs.items():
+            if job.status not in ("done", "failed") or job_id not in self.watched_jobs:
+                continue
+            video = self.watched_jobs.pop(job_id)
+            if job.status == "failed":
+                self.app.notify(f"{job.kind} job failed: {job.error}\n{video.title}", title="Jobs", severity="error")
+                continue
+
+            if job.kind == "summary":
+                if "summary" in job.result:
+                    # Older workers only return the preview
+                    summary_cache.put(video.video_id, job.result["summary"])
+                self.app.store.update(video, has_summary=True, summary_preview=job.result["summary_preview"])
+                self.app.notify(f"AI summary fetched successfully!\n{video.title}", title="Success")
+            else:
+                self.app.store.update(video, duration=job.result["duration"], duration_seconds=job.result["duration_seconds"])
+
+    def current_video(self) -> Video | None:
+        """Video of the cursor row, looked up by its row key"""
+        if not self.row_count:
+            return None
+        row_key, _ = self.coordinate_to_cell_key(self.cursor_coordinate)
+        return self.video_rows.get(row_key.value)
+
+    def on_store_event(self, event):
+        """Apply store changes to the affected row only"""
+        if isinstance(event, StoreReloaded):
+            self.invalidate_cache()
+        elif isinstance(event, VideoChanged):
+            self.forget(event.video.channel_title)
+            shown = self.video_rows.get(event.video.video_id)
+            if shown is not None:
+                if shown is not event.video:
+                    for name, value in event.changes.items():
+                        setattr(shown, name, value)
+                self.update_row(shown, event.changes)
+                if "summary_preview" in event.changes and shown is self.current_video():
+                    self.tooltip = shown.summary_preview or None
+
+    def update_row(self, video: Video, changes: dict):
+        with_channel = CHANNEL_COLUMN_KEY in self.columns
+        column_keys = [CHANNEL_COLUMN_KEY] * with_channel + [column_key for _, column_key in config.column_headers]
+        row = dict(zip(column_keys, self.video_row(video, with_channel)))
+        for name in changes:
+            for column_key in self.FIELD_COLUMNS.get(name, ()):
+                self.update_cell(row_key=video.video_id, column_key=column_key, value=row[column_key])
+
+    @metrics.instrument("ui.update_table")
+    def update_table(self, key: str, videos: List[Video] | None = None):
+        """Update the table with videos for a specific channel or the unseen feed"""
+        prepared = self.prepare_rows(key, videos)
+        self.remember(self.cache_key(key), prepared)
+        self.render_rows(key, *prepared)
+
+    @metrics.instrument("ui.show")
+    def show(self, key: str):
+        """Show a channel or the unseen feed, from the prefetch cache if it is there"""
+        cache_key = self.cache_key(key)
+        prepared = self.row_cache.get(cache_key)
+        if prepared is None and self.is_query_view(key) and not config.offline_first:
+            # Server-side query: don't block the UI, moving away cancels it
+            self.render_rows(key, [], [])
+            self.loading = True
+            self.run_worker(self.load_query(key), group="table_load", exclusive=True)
+            return
+        if prepared is None:
+            prepared = self.prepare_rows(key)
+            self.remember(cache_key, prepared)
+        else:
+            self.row_cache.move_to_end(cache_key)
+        self.render_rows(key, *prepared)
+
+    def is_query_view(self, key: str) -> bool:
+        """The feed and the short & unseen filter are server-side queries, not views of the store"""
+        return key == UNSEEN_FEED_KEY or self.short_unseen_only
+
+    def channel_id_of(self, key: str) -> str | None:
+        videos = self.app.store.channel(key)
+        return videos[0].channel_id if videos else None
+
+    async def load_query(self, key: str, limit: int | None = None, cursor_row: int | None = None):
+        """Run the query of the feed or the short & unseen filter and show its rows"""
+        cache_key = self.cache_key(key)
+        generation = self.cache_generation
+        channel_id = None if key == UNSEEN_FEED_KEY else self.channel_id_of(key)
+        try:
+            if not self.short_unseen_only:
+                videos = await self.repository.load_channel_page(None, limit=limit, seen=False)
+            elif channel_id is None and key != UNSEEN_FEED_KEY:
+                videos = []
+            else:
+                videos = await self.repository.load_channel_page(
+                    channel_id,
+                    seen=False,
+                    max_duration_seconds=config.short_video_max_seconds,
+                    sort=self.SORT_FIELDS[self.sort_column],
+                    descending=self.sort_reverse,
+                )
+        except Exception as e:
+            self.app.notify(f"Loading videos failed: {e}", title="Database", severity="error")
+            return
+        finally:
+            self.loading = False
+        prepared = self.prepare_rows(key, videos)
+        if not self.remember(cache_key, prepared, generation):
+            # The store changed while the query ran, its result may already be outdated
+            if self.key == key and self.cache_key(key) == cache_key:
+                self.loading = True
+                self.run_worker(self.load_query(key, limit, cursor_row), group="table_load", exclusive=True)
+            return
+        if self.key == key and self.cache_key(key) == cache_key:
+            self.render_rows(key, *prepared)
+            if cursor_row is not None:
+                self.move_cursor(row=cursor_row)
+
+    async def on_unmount(self):
+        self.app.store.unsubscribe(self.on_store_event)
+        await self.repository.close()
 
-    def update_table(self, key: str, videos: List[Video]):
-        """Update the table with videos for a specific channel"""
+    def render_rows(self, key: str, videos: List[Video], rows: List[tuple]):
         self.clear()
-        self.videos = videos
         self.key = key
+        self.set_channel_column(key == UNSEEN_FEED_KEY)
+        self.videos = list(videos)
+        self.video_rows = {video.video_id: video for video in self.videos}
+        for video, row in zip(self.videos, rows):
+            self.add_row(*row, key=video.video_id)
 
+    def query_videos(self, key: str, limit: int | None = None) -> List[Video]:
+        """Blocking query of a query view, for the offline store or a thread worker"""
+        store = get_store()
+        if self.short_unseen_only:
+            channel_id = None if key == UNSEEN_FEED_KEY else self.channel_id_of(key)
+            if channel_id is None and key != UNSEEN_FEED_KEY:
+                return []
+            # Resolved by the (channel_id, seen, duration_seconds) index,
+            # or the (seen, ...) prefix of the feed index across channels
+            return store.find_videos(
+                channel_id,
+                seen=False,
+                max_duration_seconds=config.short_video_max_seconds,
+                sort=self.SORT_FIELDS[self.sort_column],
+                descending=self.sort_reverse,
+                limit=config.feed_page_size,
+            )
+        return store.load_unseen_feed(limit=limit)
+
+    def prepare_rows(self, key: str, videos: List[Video] | None = None) -> tuple[List[Video], List[tuple]]:
+        """
+        Sort and format videos into table rows, safe to run off the UI thread.
+
+        Channel rows come from the store's sorted views. Query views use
+        ``videos`` as returned by the query, without it the query runs here
+        and blocks.
+        """
+        if not self.is_query_view(key):
+            videos = self.app.store.sorted(key, self.sort_column, self.sort_reverse)
+        elif videos is None:
+            videos = self.query_videos(key)
+        # Feed pages keep the server order so "load more" can append to them
+
+        videos = list(videos)
+        return videos, [self.video_row(video, with_channel=key == UNSEEN_FEED_KEY) for video in videos]
+
+    def cache_key(self, key: str) -> tuple:
+        return (key, self.sort_column, self.sort_reverse, self.short_unseen_only)
+
+    def remember(
+        self, cache_key: tuple, prepared: tuple[List[Video], List[tuple]], generation: int | None = None,
+    ) -> bool:
+        """Cache prepared rows, False if they were prepared before the cache was last invalidated"""
+        if generation is not None and generation != self.cache_generation:
+            return False
+        self.row_cache[cache_key] = prepared
+        self.row_cache.move_to_end(cache_key)
+        while len(self.row_cache) > config.prefetch_cache_size:
+            self.row_cache.popitem(last=False)
+        return True
+
+    def invalidate_cache(self):
+        """Forget all prepared rows, e.g. after a reload"""
+        self.cache_generation += 1
+        self.row_cache.clear()
+
+    def forget(self, channel: str):
+        """Forget prepared rows a change in ``channel`` can affect"""
+        self.cache_generation += 1
+        for cache_key in [cache_key for cache_key in self.row_cache if cache_key[0] in (channel, UNSEEN_FEED_KEY)]:
+            del self.row_cache[cache_key]
+
+    def prefetch(self, keys: List[str]):
+        """Prepare rows of the given channels in background, replaces a still running prefetch"""
+        self.run_worker(partial(self.prefetch_rows, keys), thread=True, group="prefetch", exclusive=True)
+
+    def prefetch_rows(self, keys: List[str]):
+        """
+        Prepare rows of the given channels. Missing durations are fetched at
+        most one videos.list call per prefetch, and only while the session's
+        ``prefetch_duration_quota`` lasts, so cursor moves can't drain the quota.
+        """
+        worker = get_current_worker()
+
+        for key in keys:
+            cache_key = self.cache_key(key)
+            if worker.is_cancelled:
+                return
+            if cache_key in self.row_cache:
+                continue
+
+            if self.duration_quota > 0:
+                # Copies: store videos are only changed on the UI thread
+                missing = [
+                    replace(video) for video in self.app.store.channel(key)
+                    if video.duration_seconds is None and video.video_id not in self.duration_looked_up
+                ][:MAX_PAGE_SIZE]
+                if missing:
+                    self.duration_quota -= 1
+                    self.duration_looked_up.update(video.video_id for video in missing)
+                    fetched = list(iter_with_durations(missing))
+                    self.save_durations(fetched)
+                    self.app.call_from_thread(self.apply_durations, fetched)
+                    if worker.is_cancelled:
+                        return
+
+            # Taken after the durations are applied, applying them forgets this channel's rows
+            generation = self.cache_generation
+            prepared = self.prepare_rows(key)
+            if worker.is_cancelled:
+                return
+            self.app.call_from_thread(self.remember, cache_key, prepared, generation)
+
+    def apply_durations(self, videos: List[Video]):
         for video in videos:
-            # Color coding based on publish date
-            if is_today(video.published_at):
-                title = Text(video.title, style="bold red")
-            elif is_within_last_two_days(video.published_at):
-                title = Text(video.title, style="bold green")
-            else:
-                title = video.title
+            self.app.store.update(video, duration=video.duration, duration_seconds=video.duration_seconds)
 
-            # Dim if already seen
-            if video.seen:
-                title = Text(video.title, style="dim")
-            row = (video.published_at, title, video.duration, video.has_summary)
-            self.add_row(*row, key=video.video_id)
+    def save_durations(self, videos: List[Video]):
+        with metrics.timed("ui.prefetch_durations"):
+            if config.offline_first:
+                for video in videos:
+                    get_store().update_video_duration(video.video_id, video.duration)
+            else:
+                DatabaseService(deadline_s=config.db_deadline_s).save_videos_bulk(videos)
 
-    def action_get_video_info(self):
-        """Get detailed information about the current row's video"""
-        if not self.videos:
+    def set_channel_column(self, show: bool):
+        """Add the Channel column for the cross-channel feed, remove it for channel views"""
+        if show == (CHANNEL_COLUMN_KEY in self.columns):
             return
-            
+        self.clear(columns=True)
+        if show:
+            self.add_column("Channel", key=CHANNEL_COLUMN_KEY)
+        for label, column_key in config.column_headers:
+            self.add_column(label, key=column_key)
+
+    def video_row(self, video: Video, with_channel: bool) -> tuple:
+        # Color coding based on publish date
+        if is_today(video.published_at):
+            title = Text(video.title, style="bold red")
+        elif is_within_last_two_days(video.published_at):
+            title = Text(video.title, style="bold green")
+        else:
+            title = video.title
+
+        # Dim if already seen
+        if video.seen:
+            title = Text(video.title, style="dim")
+        row = (video.published_at, title, format_duration(video.duration_seconds), video.seen, video.has_summary)
+        if with_channel:
+            row = (video.channel_title, *row)
+        return row
+
+    def add_video_row(self, video: Video):
+        self.video_rows[video.video_id] = video
+        self.add_row(*self.video_row(video, CHANNEL_COLUMN_KEY in self.columns), key=video.video_id)
+
+    def refresh_table(self):
+        """Re-render current view keeping the cursor on the same row index"""
         row = self.cursor_row
-        if row >= len(self.videos):
+        # Re-query so videos marked as seen drop out of the feed and the filter
+        limit = max(len(self.videos), config.feed_page_size)
+        if self.is_query_view(self.key) and not config.offline_first:
+            self.run_worker(self.load_query(self.key, limit, cursor_row=row), group="table_load", exclusive=True)
             return
-            
-        video = self.videos[row]
-        video.duration = get_video_duration(video)
-
-
-        # Refresh the table with updated duration
-        self.update_cell(
-            row_key=video.video_id,
-            column_key="duration",
-            value=video.duration)
+        self.update_table(self.key, self.query_videos(self.key, limit) if self.is_query_view(self.key) else None)
+        self.move_cursor(row=row)
 
-        # db_service = DatabaseService()
-        async_db_service = MongoDBAsyncClient()
+    async def action_load_more(self):
+        """Append the next page of the unseen feed"""
+        if self.key != UNSEEN_FEED_KEY or not self.videos:
+            return
 
-        self.run_worker(
-            async_db_service.update_video_duration(video.video_id, video.duration),
-            exclusive=False,
-        )
+        last = self.videos[-1]
+        try:
+            if config.offline_first:
+                more = get_store().load_unseen_feed(after=last)
+            else:
+                more = await self.repository.load_channel_page(None, after=last, seen=False)
+        except Exception as e:
+            self.app.notify(f"Loading videos failed: {e}", title="Database", severity="error")
+            return
+        if self.key != UNSEEN_FEED_KEY or not self.videos or self.videos[-1] is not last:
+            # Moved away or re-rendered while the page loaded
+            return
+        if not more:
+            self.app.notify("No more unseen videos", title="Feed")
+            return
 
-        self.app.notify("Updated duration", title="Video Information")
+        self.videos.extend(more)
+        for video in more:
+            self.add_video_row(video)
 
+    def sortable(self) -> bool:
+        """Feed pages keep the server order (newest first) so "load more" can append to them"""
+        return self.key != UNSEEN_FEED_KEY or self.short_unseen_only
 
-    def action_style_row(self):
-        """Toggle the seen status of the current row's video"""
-        if not self.videos:
+    def action_cycle_sort(self):
+        """Cycle sort column through published date, duration, seen and has summary"""
+        if not self.sortable():
             return
-
-        row = self.cursor_row
-        if row >= len(self.videos):
+        if self.sort_column in self.CYCLE_SORT_COLUMNS:
+            index = self.CYCLE_SORT_COLUMNS.index(self.sort_column) + 1
+        else:
+            index = 0
+        self.sort_column = self.CYCLE_SORT_COLUMNS[index % len(self.CYCLE_SORT_COLUMNS)]
+        # Newest / longest / seen / summarized first
+        self.sort_reverse = True
+        self.refresh_table()
+        self.app.notify(f"Sorted by {self.sort_column}", title="Sort")
+
+    def action_toggle_short_unseen(self):
+        """Toggle filter showing only unseen videos shorter than the configured threshold"""
+        self.short_unseen_only = not self.short_unseen_only
+        self.refresh_table()
+        state = "on" if self.short_unseen_only else "off"
+        self.app.notify(f"Short & unseen filter {state}", title="Filter")
+
+    @on(DataTable.HeaderSelected)
+    def sort_by_header(self, event: DataTable.HeaderSelected):
+        """Sort by clicked column, clicking the same column again flips the order"""
+        column = event.column_key.value
+        if not self.sortable():
             return
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = True
+        self.refresh_table()
 
-        video = self.videos[row]
-        video.seen = not video.seen
+    def action_get_video_info(self):
+        """Get detailed information about the current row's video"""
+        video = self.current_video()
+        if video is None:
+            return
+        if self.use_job_queue():
+            self.enqueue("duration", video)
+            return
+        duration = get_video_duration(video)
+        # The store event updates the duration cell
+        self.app.store.update(video, duration=duration, duration_seconds=parse_iso_duration(duration))
+
+        if config.offline_first:
+            get_store().update_video_duration(video.video_id, video.duration)
+        else:
+            self.run_worker(
+                self.save_remote(self.repository.set_duration(video.video_id, video.duration), "duration"),
+                group="db_write",
+            )
 
-        # Update in database
-        db_service = DatabaseService()
-        db_service.update_video_seen_status(video.video_id, video.seen)
+        self.app.notify("Updated duration", title="Video Information")
 
-        # Refresh the table
-        self.update_table(self.key, self.videos)
 
-        # Restore cursor position
-        self.move_cursor(row=row)
+    def action_style_row(self):
+        """Toggle the seen status of the current row's video"""
+        video = self.current_video()
+        if video is None:
+            return
+        # The store event restyles the row right away
+        self.app.store.update(video, seen=not video.seen)
+
+        if config.offline_first:
+            get_store().update_video_seen_status(video.video_id, video.seen)
+            if self.needs_requery():
+                self.refresh_table()
+        else:
+            self.run_worker(self.save_seen(video), group="db_write")
+
+    async def save_seen(self, video: Video):
+        """Write the seen toggle, undone if the write fails"""
+        if not await self.save_remote(self.repository.set_seen(video.video_id, video.seen), "seen status"):
+            self.app.store.update(video, seen=not video.seen)
+        elif self.needs_requery():
+            # Refresh the table, restoring cursor position
+            self.refresh_table()
+
+    def needs_requery(self) -> bool:
+        """Query views filter on the seen status"""
+        return self.is_query_view(self.key)
+
+    async def save_remote(self, write: Awaitable, what: str) -> bool:
+        """Await a repository write, a failure or missed deadline is reported instead of raised"""
+        try:
+            await write
+        except Exception as e:
+            self.app.notify(f"Saving {what} failed: {e}", title="Database", severity="error")
+            return False
+        return True
 
     def action_show_worker_status(self):
         """Show status of all workers, especially AI summary workers"""
@@ -208,9 +617,17 @@ class CustomDataTable(DataTable):
         message += f"  Pending: {total_pending}\n"
         message += f"  Running: {total_running}\n"
         message += f"  Total Active: {len(all_workers)}"
+        if self.use_job_queue():
+            message += f"\n\nQueued jobs watched: {len(self.watched_jobs)}"
 
         self.app.notify(message, title="Worker Status")
 
+    @on(DataTable.RowHighlighted)
+    def show_summary_preview(self, event: DataTable.RowHighlighted):
+        """Show the start of the cursor row's summary as tooltip"""
+        video = self.video_rows.get(event.row_key.value)
+        self.tooltip = video.summary_preview if video is not None and video.summary_preview else None
+
     @on(DataTable.RowSelected)
     def open_url_in_browser(self, event: DataTable.RowSelected):
         """Open the selected video in browser"""
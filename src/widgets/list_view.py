@@ -1,17 +1,30 @@
 from textual.widgets import ListView, ListItem, Label
 from textual.binding import Binding
-from models import Video
-from utils import count_new_videos
-from textual.message import Message
+from rich.text import Text
+from utils import get_store
+from metrics import metrics
+from video_store import ChannelCounts, ChannelCountsChanged, StoreReloaded
+
+# Virtual list entry served by a single cross-channel query, not by self.data
+UNSEEN_FEED_KEY = "All unseen / recent"
 
 class MyListItem(ListItem):
-    def __init__(self, channel_name, videos):
+    def __init__(self, channel_name, counts: ChannelCounts | None = None):
         self.data = channel_name
-        label = channel_name
-        number = count_new_videos(videos)
-        if number > 0:
-            label = f"{channel_name} ({number})"
-        super().__init__(Label(label))
+        self.badge_label = Label(self.badge(counts))
+        super().__init__(self.badge_label)
+
+    def badge(self, counts: ChannelCounts | None) -> Text:
+        """Channel name with its number of new videos and, dimmed, of unseen ones"""
+        text = Text(self.data)
+        if counts is not None and counts.new > 0:
+            text.append(f" ({counts.new})")
+        if counts is not None and counts.unseen > 0:
+            text.append(f" {counts.unseen} unseen", style="dim")
+        return text
+
+    def set_counts(self, counts: ChannelCounts):
+        self.badge_label.update(self.badge(counts))
 
 class CustomListView(ListView):
     BINDINGS = [
@@ -23,36 +36,54 @@ class CustomListView(ListView):
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.data: dict[str, list[Video]] = {}
-
-    def set_data(self, data: dict[str, list[Video]]):
-        """
-        Set the data for the list view.
-        
-        Args:
-            data (dict): A dictionary mapping channel names (str) to lists of videos.
-        
-        Side Effects:
-            - Updates the internal `data` attribute with the provided dictionary.
-            - Calls `update_data` to refresh the list view with the new data.
-        """
-        self.data: dict[str, list[Video]] = data
-        self.update_data()
-        
+        # Channel name -> list item, badges are updated in place
+        self.items_by_key: dict[str, MyListItem] = {}
+
+    def on_mount(self):
+        self.app.store.subscribe(self.on_store_event)
+
+    def on_unmount(self):
+        self.app.store.unsubscribe(self.on_store_event)
+
+    def on_store_event(self, event):
+        if isinstance(event, StoreReloaded):
+            self.update_data()
+        elif isinstance(event, ChannelCountsChanged):
+            item = self.items_by_key.get(event.channel)
+            if item is not None:
+                item.set_counts(event.counts)
+
+    @metrics.instrument("ui.update_list")
     def update_data(self):
+        store = self.app.store
         self.clear()
-        for channel_name, videos in self.data.items():
-            self.append(MyListItem(channel_name, videos))
+        self.append(MyListItem(UNSEEN_FEED_KEY))
+        self.items_by_key = {
+            channel_name: MyListItem(channel_name, store.counts[channel_name])
+            for channel_name in store.channel_names()
+        }
+        self.extend(self.items_by_key.values())
             
+    def neighbour_keys(self, distance: int) -> list[str]:
+        """Keys of the items up to ``distance`` below and above the cursor, nearest first"""
+        if self.index is None:
+            return []
+        keys = []
+        for offset in range(1, distance + 1):
+            for index in (self.index + offset, self.index - offset):
+                if 0 <= index < len(self.children):
+                    keys.append(self.children[index].data)
+        return keys
+
     def action_load_data_from_db(self):
-        from database import DatabaseService
-        db_service = DatabaseService()
-        new_data = db_service.load_videos()
-        self.set_data(new_data)
-        # Emit event to update main app data
-        self.post_message(self.DataUpdated(new_data))
-
-    class DataUpdated(Message):
-        def __init__(self, data) -> None:
-            self.data = data
-            super().__init__()
\ No newline at end of file
+        """Reload all channels without blocking the UI, a new reload replaces a running one"""
+        self.app.run_worker(self.load_data_from_db, thread=True, group="reload", exclusive=True)
+
+    def load_data_from_db(self):
+        try:
+            data = get_store().load_videos()
+        except Exception as e:
+            self.app.call_from_thread(self.app.notify, f"Loading videos failed: {e}", title="Database", severity="error")
+            return
+        # Subscribers (this list and the table) rebuild on StoreReloaded
+        self.app.call_from_thread(self.app.store.load, data)
\ No newline at end of file
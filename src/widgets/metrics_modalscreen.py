@@ -0,0 +1,48 @@
+from textual.screen import ModalScreen
+from textual.widgets import DataTable
+from textual.binding import Binding
+from metrics import metrics
+
+
+class MetricsScreen(ModalScreen):
+    """
+    A modal screen that displays latency, call, byte and error counters per operation.
+    """
+    BINDINGS = [
+        Binding("q", "exit", "Exit", show=True),
+        Binding("r", "refresh_metrics", "Refresh", show=True),
+        Binding("e", "export_metrics", "Export JSON", show=True),
+        Binding("c", "reset_metrics", "Reset", show=True),
+    ]
+
+    COLUMNS = ("count", "errors", "bytes", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+    def compose(self):
+        yield DataTable()
+
+    def on_mount(self):
+        table = self.query_one(DataTable)
+        table.cursor_type = "row"
+        table.add_column("Operation", key="operation")
+        for column in self.COLUMNS:
+            table.add_column(column, key=column)
+        self.action_refresh_metrics()
+
+    def action_refresh_metrics(self):
+        table = self.query_one(DataTable)
+        table.clear()
+        for name, summary in metrics.snapshot().items():
+            table.add_row(name, *(summary[column] for column in self.COLUMNS), key=name)
+
+    def action_export_metrics(self):
+        file_path = "metrics.json"
+        metrics.export(file_path)
+        self.app.notify(f"Metrics exported to {file_path}", title="Metrics")
+
+    def action_reset_metrics(self):
+        metrics.reset()
+        self.action_refresh_metrics()
+
+    def action_exit(self):
+        """Exit the modal screen."""
+        self.app.pop_screen()
@@ -1,25 +1,52 @@
 from textual.screen import ModalScreen
 from textual.widgets import Markdown
 from textual.binding import Binding
+from textual.worker import get_current_worker
+from utils import load_summary
 
 
 class SummaryScreen(ModalScreen):
     """
     A modal screen that displays a summary of the application state.
+
+    Pass ``text`` to show it directly, or ``video_id`` to load the summary
+    in a background thread while a loading message is shown.
     """
     BINDINGS = [
         Binding("q", "exit", "Exit", show=True),
     ]
 
-    def __init__(self, text: str, **kwargs):
+    def __init__(self, text: str | None = None, video_id: str | None = None, **kwargs):
         super().__init__(**kwargs)
         self.text = text
+        self.video_id = video_id
 
     def compose(self):
         yield Markdown(
-            f"# Summary\n\n{self.text}"
+            f"# Summary\n\n{self.text if self.text is not None else '*Loading summary...*'}"
         )
 
+    def on_mount(self):
+        if self.text is None:
+            # Cancelled with the screen if it is closed before the summary arrives
+            self.run_worker(self.fetch_summary, thread=True, exclusive=True)
+
+    def fetch_summary(self):
+        try:
+            text = load_summary(self.video_id) or "No summary available."
+        except Exception as e:
+            text = f"Failed to load summary: {e}"
+        # Cancelled when the screen is unmounted, the thread itself can't be interrupted
+        if not get_current_worker().is_cancelled:
+            self.app.call_from_thread(self.show_text, text)
+
+    def show_text(self, text: str):
+        if not self.is_attached:
+            # Closed while the summary was on its way
+            return
+        self.text = text
+        self.query_one(Markdown).update(f"# Summary\n\n{text}")
+
     def action_exit(self):
         """Exit the modal screen."""
-        self.app.pop_screen()
\ No newline at end of file
+        self.app.pop_screen()
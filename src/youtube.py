@@ -1,15 +1,19 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from itertools import batched, islice
+from typing import Iterable, Iterator
 import re
 import yaml
 import logging
 
 from urllib.parse import parse_qs, urlparse
 from config import config
+from metrics import metrics
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from rich.prompt import Prompt
 from rich.console import Console
 from models import YTChannel, VideoYT
+from utils import parse_iso_duration
 
 logging.basicConfig(level=logging.INFO)
 
@@ -25,6 +29,18 @@ def save_youtube_config(file_path: str, data: dict):
     with open(file_path, "w") as file:
         yaml.dump(data, file, sort_keys=False)
 
+def execute(request, name: str) -> dict:
+    """Execute YouTube API request recording latency and HTTP response body size"""
+    postproc = getattr(request, "postproc", None)
+    if postproc is not None:
+        # HttpRequest hands the raw body to postproc before JSON decoding
+        def measured(resp, content):
+            metrics.add_bytes(name, len(content))
+            return postproc(resp, content)
+        request.postproc = measured
+    with metrics.timed(name):
+        return request.execute()
+
 def get_video_duration(video: VideoYT) -> str:
     """Call YouTube API to get the duration of a video."""
     youtube = build(
@@ -38,7 +54,7 @@ def get_video_duration(video: VideoYT) -> str:
             part="contentDetails",
             id=video.video_id
         )
-        response = request.execute()
+        response = execute(request, "yt.videos.list")
         duration = response["items"][0]["contentDetails"]["duration"]
         return duration
     except HttpError as e:
@@ -110,7 +126,7 @@ def get_channel_id_from_video_url(video_url: str) -> tuple[str, str] | None:
             part="snippet,contentDetails",  # 'snippet' contains channelId, title, description, etc.
             id=video_id      # ID of the video to retrieve
         )
-        response = request.execute()
+        response = execute(request, "yt.videos.list")
 
         if response.get("items"):
             # Extract the channel ID from the first item in the response
@@ -164,7 +180,7 @@ def add_channel_to_config(channel_id: str, channel_title: str, config_file: str)
         id=channel_id,  # Tutaj jest możliwość podania kilku ID kanału
         part='snippet,contentDetails',
     )
-    channel_response = channel_request.execute()
+    channel_response = execute(channel_request, "yt.channels.list")
 
     uploads_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
     channel_title = channel_response['items'][0]['snippet']['title']
@@ -186,63 +202,156 @@ def add_channel_to_config(channel_id: str, channel_title: str, config_file: str)
     print(f"Added new channel: [{channel_title}] with ID: {channel_id}")
 
 
-def get_last_videos(channel: YTChannel, max_results: int=3) -> list[VideoYT]:
+# Only request the fields that end up in VideoYT to keep playlist pages small
+PLAYLIST_ITEMS_FIELDS = (
+    "nextPageToken,"
+    "items/snippet(publishedAt,channelId,channelTitle,title,resourceId/videoId)"
+)
+VIDEO_DURATION_FIELDS = "items(id,contentDetails/duration)"
+# YouTube Data API hard limit for maxResults and for ids per videos.list call
+MAX_PAGE_SIZE = 50
 
-    videos: list[VideoYT] = []
 
-    # Build the YouTube API service object
-    youtube = build(
-        config.youtube_api_service_name, 
-        config.youtube_api_version, 
+def build_youtube():
+    """YouTube Data API client, build once and pass it around to reuse its HTTP session"""
+    return build(
+        config.youtube_api_service_name,
+        config.youtube_api_version,
         developerKey=config.youtube_api_key
         )
 
-    playlist_request = youtube.playlistItems().list(
-        playlistId=channel.uploads_id,
-        part='snippet',
-        maxResults=max_results,  # Limit the number of results
+
+def parse_published_at(published_at_str: str) -> datetime | str:
+    """Parse YouTube ISO 8601 timestamp, fall back to the raw string."""
+    try:
+        # YouTube API returns ISO 8601 format (e.g., "2023-10-26T14:30:00Z")
+        # .replace('Z', '+00:00') is robust for Python versions < 3.11 with fromisoformat
+        if published_at_str.endswith('Z'):
+            return datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
+        return datetime.fromisoformat(published_at_str)
+    except ValueError:
+        logging.warning(f"Could not parse date '{published_at_str}'. Storing as string.")
+        return published_at_str # Fallback
+
+
+def video_from_playlist_item(item: dict) -> VideoYT:
+    """Build VideoYT from a single playlistItems.list item."""
+    snippet = item['snippet']
+    video_id = snippet['resourceId']['videoId']
+
+    return VideoYT(
+        title=snippet['title'],
+        video_id=video_id,
+        published_at=parse_published_at(snippet['publishedAt']),
+        channel_id=snippet['channelId'],
+        channel_title=snippet['channelTitle'],
+        url=f"https://www.youtube.com/watch?v={video_id}",
+        # Duration can be fetched separately if needed
     )
-    playlist_response = playlist_request.execute()
-    items = playlist_response['items']
 
-    for item in items:
-        video_id = item['snippet']['resourceId']['videoId']
-        video_title = item['snippet']['title']
-        published_at_str = item['snippet']['publishedAt']
-        channel_id = item['snippet']['channelId']
-        channel_title = item['snippet']['channelTitle']
 
-        # Construct URL
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
+def iter_playlist_videos(
+    channel: YTChannel,
+    page_size: int = MAX_PAGE_SIZE,
+    max_pages: int | None = None,
+    until_date: datetime | None = None,
+    until_video_id: str | None = None,
+    youtube=None,
+) -> Iterator[VideoYT]:
+    """
+    Stream videos from the channel uploads playlist, newest first, page by page.
 
-        published_at_dt = None
-        try:
-            # YouTube API returns ISO 8601 format (e.g., "2023-10-26T14:30:00Z")
-            # .replace('Z', '+00:00') is robust for Python versions < 3.11 with fromisoformat
-            if published_at_str.endswith('Z'):
-                published_at_dt = datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
-            else:
-                published_at_dt = datetime.fromisoformat(published_at_str)
-        except ValueError:
-            print(f"Warning: Could not parse date '{published_at_str}' for video ID '{video_id}'. Storing as string.")
-            published_at_dt = published_at_str # Fallback
-
-        # Append video details to the list
-        # Using VideoYT model for structured data
-        video_yt = VideoYT(
-            title=video_title,
-            video_id=video_id,
-            published_at=published_at_dt,
-            channel_id=channel_id,
-            channel_title=channel_title,
-            url=video_url,
-            # Duration can be fetched separately if needed
+    Iteration stops at the first of:
+    - no more pages (``nextPageToken`` missing),
+    - ``max_pages`` pages fetched,
+    - a video published before ``until_date``,
+    - the already known ``until_video_id`` (not yielded).
+
+    Pages are only requested when the consumer asks for more videos, so
+    stopping iteration early (e.g. ``islice``) saves API calls.
+    """
+    if youtube is None:
+        youtube = build_youtube()
+
+    if until_date is not None and until_date.tzinfo is None:
+        # Published dates from the API are UTC aware
+        until_date = until_date.replace(tzinfo=timezone.utc)
+
+    page_token = None
+    pages = 0
+
+    while True:
+        playlist_request = youtube.playlistItems().list(
+            playlistId=channel.uploads_id,
+            part='snippet',
+            maxResults=min(page_size, MAX_PAGE_SIZE),
+            pageToken=page_token,
+            fields=PLAYLIST_ITEMS_FIELDS,
         )
-        # Append to the list of videos
-        videos.append(video_yt)
+        playlist_response = execute(playlist_request, "yt.playlistItems.list")
+        pages += 1
+
+        for item in playlist_response.get('items', []):
+            video = video_from_playlist_item(item)
+
+            if until_video_id and video.video_id == until_video_id:
+                return
+            if (
+                until_date is not None
+                and isinstance(video.published_at, datetime)
+                and video.published_at < until_date
+            ):
+                return
+
+            yield video
+
+        page_token = playlist_response.get('nextPageToken')
+        if not page_token or (max_pages is not None and pages >= max_pages):
+            return
+
+
+def iter_with_durations(videos: Iterable[VideoYT], youtube=None) -> Iterator[VideoYT]:
+    """
+    Fill in ``duration`` for a stream of videos.
+
+    Videos are looked up in batches of up to 50 ids per videos.list call
+    (one quota unit per batch) and yielded as soon as their batch is done.
+    """
+    if youtube is None:
+        youtube = build_youtube()
+
+    for batch in batched(videos, MAX_PAGE_SIZE):
+        try:
+            request = youtube.videos().list(
+                part="contentDetails",
+                id=",".join(video.video_id for video in batch),
+                fields=VIDEO_DURATION_FIELDS,
+            )
+            response = execute(request, "yt.videos.list")
+            durations = {
+                item["id"]: item["contentDetails"]["duration"]
+                for item in response.get("items", [])
+            }
+        except HttpError as e:
+            logging.error(f"An error occurred while fetching video durations: {e}")
+            durations = {}
+
+        for video in batch:
+            video.duration = durations.get(video.video_id, video.duration)
+            # Parse once at ingest so sorting/filtering never touches the ISO string
+            video.duration_seconds = parse_iso_duration(video.duration)
+            yield video
+
+
+def get_last_videos(channel: YTChannel, max_results: int=3) -> list[VideoYT]:
+    """Fetch the ``max_results`` most recent uploads of a channel."""
+    videos: list[VideoYT] = []
+
+    for video in islice(iter_playlist_videos(channel, page_size=max_results), max_results):
+        videos.append(video)
 
         # Print video details
-        print(f"Video ID: {video_id}, Title: {video_title}, Published At: {published_at_str}, Channel ID: {channel_id}, Channel Title: {channel_title}")
+        print(f"Video ID: {video.video_id}, Title: {video.title}, Published At: {video.published_at}, Channel ID: {video.channel_id}, Channel Title: {video.channel_title}")
 
     return videos
 
@@ -0,0 +1,35 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# config.py refuses to load without these, tests never talk to the real services
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("YT_API_KEY", "test")
+os.environ.setdefault("GOOGLE_AI_API_KEY", "test")
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+
+@pytest.fixture
+def fixture_bytes():
+    """Read a stored fixture file from benchmarks/fixtures"""
+    return lambda name: (FIXTURES / name).read_bytes()
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Empty mongomock database behind DatabaseService and VideoRepository"""
+    mongomock = pytest.importorskip("mongomock")
+    import database
+    from config import config
+    from fakes import AsyncDatabase
+    from run_benchmark import patch_mongomock
+
+    patch_mongomock()
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(database, "MongoClient", lambda *args, **kwargs: client)
+    monkeypatch.setattr(
+        database.VideoRepository, "database", lambda self: AsyncDatabase(client[config.mongo_database_name])
+    )
+    return client[config.mongo_database_name]
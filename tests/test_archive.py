@@ -0,0 +1,38 @@
+from dataclasses import replace
+
+from archive import MongoArchive, RetentionPolicy, archive_channel, refetch_window
+from config import config
+from database import DatabaseService
+from fakes import make_channels, make_videos
+from feeds import FEED_ENTRIES
+from models import YTChannel, YTConfig
+
+
+def test_keep_newest_is_floored_at_the_refetch_window():
+    channel = YTChannel.from_dict(make_channels(1)[0])
+    ytconfig = YTConfig(channels=[], results=5, keep_newest=3)
+
+    policy = RetentionPolicy.for_channel(channel, ytconfig)
+
+    assert refetch_window(ytconfig) == FEED_ENTRIES
+    assert policy.keep_newest == FEED_ENTRIES
+    assert RetentionPolicy.for_channel(replace(channel, keep_newest=100), ytconfig).keep_newest == 100
+    assert not RetentionPolicy.for_channel(channel, replace(ytconfig, keep_newest=None)).enabled
+
+
+def test_backfill_does_not_bring_archived_videos_back(mongo):
+    channel = make_channels(1)[0]
+    videos = make_videos(channel, 30)
+    for video in videos:
+        video.seen = True
+    db_service = DatabaseService()
+    db_service.save_videos_bulk(videos)
+    # mongomock has no storage engine options, skip the zstd setup
+    mongo.create_collection(config.mongo_archive_collection_name)
+
+    moved = archive_channel(YTChannel.from_dict(channel), RetentionPolicy(keep_newest=20), db_service, MongoArchive(db_service))
+    stats = db_service.save_videos_bulk(replace(video, seen=False) for video in videos)
+
+    assert moved == 10
+    assert (stats.inserted, stats.unchanged) == (0, 30)
+    assert mongo[config.mongo_collection_name].count_documents({}) == 20
@@ -0,0 +1,77 @@
+from dataclasses import replace
+
+import pytest
+
+from config import config
+from database import DatabaseService
+from fakes import make_channels, make_videos
+
+
+@pytest.fixture
+def videos():
+    return make_videos(make_channels(1)[0], 5)
+
+
+def stored(mongo, video_id: str) -> dict:
+    return mongo[config.mongo_collection_name].find_one({"video_id": video_id})
+
+
+def test_bulk_upsert_inserts_then_leaves_unchanged_videos_alone(mongo, videos):
+    db_service = DatabaseService()
+
+    first = db_service.save_videos_bulk(videos)
+    updated_at = stored(mongo, videos[0].video_id)["updated_at"]
+    second = db_service.save_videos_bulk(videos)
+
+    assert (first.inserted, first.updated, first.unchanged, first.errors) == (5, 0, 0, 0)
+    assert (second.inserted, second.updated, second.unchanged, second.errors) == (0, 0, 5, 0)
+    assert stored(mongo, videos[0].video_id)["updated_at"] == updated_at
+    assert mongo[config.mongo_collection_name].count_documents({}) == 5
+
+
+def test_bulk_upsert_refreshes_youtube_fields(mongo, videos):
+    db_service = DatabaseService()
+    db_service.save_videos_bulk(videos)
+    updated_at = stored(mongo, videos[0].video_id)["updated_at"]
+
+    stats = db_service.save_videos_bulk([replace(videos[0], title="New title")])
+
+    assert (stats.updated, stats.unchanged) == (1, 0)
+    doc = stored(mongo, videos[0].video_id)
+    assert doc["title"] == "New title"
+    assert doc["updated_at"] > updated_at
+
+
+def test_bulk_upsert_keeps_user_state(mongo, videos):
+    db_service = DatabaseService()
+    db_service.save_videos_bulk(videos)
+    db_service.update_video_seen_status(videos[0].video_id, True)
+    db_service.save_summaries_bulk({videos[0].video_id: "A summary"})
+
+    # A refresh from YouTube carries the defaults of the user-owned fields
+    db_service.save_videos_bulk([replace(videos[0], seen=False, summary="", has_summary=False, title="Renamed")])
+
+    doc = stored(mongo, videos[0].video_id)
+    assert doc["title"] == "Renamed"
+    assert doc["seen"] is True
+    assert doc["summary"] == "A summary" and doc["has_summary"] is True
+
+
+def test_bulk_upsert_keeps_known_duration(mongo, videos):
+    db_service = DatabaseService()
+    db_service.save_videos_bulk(videos)
+
+    # Playlist pages and feeds carry no duration
+    stats = db_service.save_videos_bulk([replace(videos[0], duration="N/A", duration_seconds=None)])
+
+    assert stats.unchanged == 1
+    doc = stored(mongo, videos[0].video_id)
+    assert doc["duration"] == videos[0].duration
+    assert doc["duration_seconds"] == videos[0].duration_seconds
+
+
+def test_bulk_upsert_in_batches(mongo, videos):
+    stats = DatabaseService().save_videos_bulk(iter(videos), batch_size=2)
+
+    assert stats.inserted == 5
+    assert mongo[config.mongo_collection_name].count_documents({}) == 5
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from config import config
+from database import DatabaseService, VideoRepository
+from fakes import make_channels, make_videos
+from utils import format_duration, parse_iso_duration
+
+
+@pytest.mark.parametrize("duration, seconds", [
+    ("PT1H2M3S", 3723),
+    ("PT45S", 45),
+    ("PT10M", 600),
+    ("P1DT1S", 86401),
+    ("N/A", None),
+    ("", None),
+    ("PT", None),
+    ("P0D", 0),
+])
+def test_parse_iso_duration(duration, seconds):
+    assert parse_iso_duration(duration) == seconds
+
+
+@pytest.mark.parametrize("seconds, text", [(None, "N/A"), (59, "0:59"), (600, "10:00"), (3723, "1:02:03")])
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
+
+
+@pytest.fixture
+def stored_videos(mongo):
+    channel = make_channels(1)[0]
+    videos = make_videos(channel, 40)
+    for i, video in enumerate(videos):
+        # Short and long, seen and unseen videos in every combination
+        video.duration_seconds = 60 * (5 + 10 * (i % 4))
+        video.duration = f"PT{video.duration_seconds // 60}M"
+        video.seen = i % 3 == 0
+    db_service = DatabaseService()
+    db_service.ensure_indexes()
+    db_service.save_videos_bulk(videos)
+    return videos
+
+
+def test_durations_are_stored_parsed(mongo, stored_videos):
+    for doc in mongo[config.mongo_collection_name].find():
+        assert doc["duration_seconds"] == parse_iso_duration(doc["duration"])
+
+
+def test_duration_filter_index_exists(mongo, stored_videos):
+    keys = [list(index["key"]) for index in mongo[config.mongo_collection_name].list_indexes()]
+
+    assert ["channel_id", "seen", "duration_seconds"] in keys
+
+
+def test_find_videos_filters_and_sorts_by_duration(stored_videos):
+    channel_id = stored_videos[0].channel_id
+    limit = 20 * 60
+
+    found = DatabaseService().find_videos(
+        channel_id, seen=False, max_duration_seconds=limit, sort="duration_seconds", descending=False,
+    )
+
+    expected = sorted(
+        (video for video in stored_videos if not video.seen and video.duration_seconds <= limit),
+        key=lambda video: video.duration_seconds,
+    )
+    assert expected
+    assert [video.duration_seconds for video in found] == [video.duration_seconds for video in expected]
+    assert {video.video_id for video in found} == {video.video_id for video in expected}
+
+
+def test_repository_page_uses_the_same_filter(stored_videos):
+    channel_id = stored_videos[0].channel_id
+    repository = VideoRepository()
+
+    page = asyncio.run(repository.load_channel_page(
+        channel_id, seen=False, max_duration_seconds=20 * 60, sort="duration_seconds", descending=True,
+    ))
+
+    durations = [video.duration_seconds for video in page]
+    assert durations
+    assert durations == sorted(durations, reverse=True)
+    assert all(duration <= 20 * 60 for duration in durations)
+    assert len(page) == len(DatabaseService().find_videos(channel_id, seen=False, max_duration_seconds=20 * 60))
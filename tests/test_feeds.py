@@ -0,0 +1,48 @@
+import io
+from datetime import datetime, timezone
+
+from feeds import iter_feed_entries
+from websub import parse_atom_entries
+
+CHANNEL_ID = "UC46xhU1EH7aywEgvA9syS3w"
+
+
+def test_channel_feed_entries(fixture_bytes):
+    videos = list(iter_feed_entries(io.BytesIO(fixture_bytes("channel_feed.xml"))))
+
+    assert [video.video_id for video in videos] == ["dQw4w9WgXcQ", "9bZkp7q19f0", "kJQP7kiw5Fk"]
+    first = videos[0]
+    assert first.title == "python 3.14 is here! (beginner - intermediate) anthony explains #600"
+    assert first.published_at == datetime(2025, 10, 7, 15, 0, 13, tzinfo=timezone.utc)
+    assert first.url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    assert all(video.channel_id == CHANNEL_ID for video in videos)
+    assert all(video.channel_title == "anthonywritescode" for video in videos)
+    # Feeds carry no duration
+    assert all(video.duration == "N/A" and video.duration_seconds is None for video in videos)
+
+
+def test_channel_feed_unescapes_titles(fixture_bytes):
+    videos = list(iter_feed_entries(io.BytesIO(fixture_bytes("channel_feed.xml"))))
+
+    assert videos[1].title == "debugging a flaky test & fixing it live"
+    assert videos[1].published_at == datetime(2025, 10, 2, 15, 0, 6, tzinfo=timezone.utc)
+
+
+def test_websub_notification(fixture_bytes):
+    videos = parse_atom_entries(fixture_bytes("websub_notification.xml"))
+
+    assert len(videos) == 1
+    assert videos[0].video_id == "dQw4w9WgXcQ"
+    assert videos[0].channel_id == CHANNEL_ID
+    assert videos[0].published_at == datetime(2025, 10, 7, 15, 0, 13, tzinfo=timezone.utc)
+
+
+def test_deleted_entries_are_skipped():
+    body = (
+        b'<?xml version="1.0" encoding="UTF-8"?>'
+        b'<feed xmlns:at="http://purl.org/atompub/tombstones/1.0" xmlns="http://www.w3.org/2005/Atom">'
+        b'<at:deleted-entry ref="yt:video:dQw4w9WgXcQ" when="2025-10-08T00:00:00+00:00"/>'
+        b"</feed>"
+    )
+
+    assert parse_atom_entries(body) == []
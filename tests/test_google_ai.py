@@ -0,0 +1,250 @@
+import asyncio
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+
+import google_ai
+from config import config
+from fakes import FakeGenAIClient, make_channels, make_videos
+from google_ai import (
+    InstructionCache, choose_mode, split_transcript, summarize_batch, summarize_transcript, summarize_video,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_instruction_cache():
+    google_ai.instruction_cache.reset()
+    yield
+    google_ai.instruction_cache.reset()
+
+
+@pytest.fixture
+def transcript(fixture_bytes):
+    return fixture_bytes("transcript_long.txt").decode()
+
+
+@pytest.fixture
+def video():
+    return make_videos(make_channels(1)[0], 1)[0]
+
+
+def test_split_transcript_cuts_at_whitespace(transcript):
+    chunks = split_transcript(transcript, chunk_chars=1000)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert all(chunk == chunk.strip() for chunk in chunks)
+    # Only whitespace is normalized, no word is lost or split
+    assert " ".join(chunks) == " ".join(transcript.split())
+
+
+def test_split_transcript_short_and_unbroken_text():
+    assert split_transcript("  a few\nwords  ", chunk_chars=100) == ["a few words"]
+    assert split_transcript("", chunk_chars=100) == []
+    # A word longer than a chunk is cut hard
+    assert split_transcript("x" * 25, chunk_chars=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_summarize_transcript_map_reduce(transcript):
+    client = FakeGenAIClient()
+    chunks = split_transcript(transcript)
+
+    result = asyncio.run(summarize_transcript(client, transcript, title="Indexes"))
+
+    assert result.mode == "transcript"
+    assert result.text == client.text
+    # One map request per chunk and one reduce request
+    assert result.requests == len(client.requests) == len(chunks) + 1
+    reduce_prompt = client.requests[-1]["contents"]
+    assert "Video title: Indexes" in reduce_prompt
+    assert reduce_prompt.count(client.text) == len(chunks)
+    assert result.input_tokens > len(transcript) // 4
+    assert result.output_tokens == (len(chunks) + 1) * (len(client.text) // 4)
+
+
+def test_summarize_short_transcript_skips_map_step():
+    client = FakeGenAIClient()
+
+    result = asyncio.run(summarize_transcript(client, "just a short transcript"))
+
+    assert result.requests == len(client.requests) == 1
+    assert "just a short transcript" in client.requests[0]["contents"]
+
+
+def test_long_video_is_summarized_from_transcript(video, transcript):
+    client = FakeGenAIClient()
+    video = replace(video, duration_seconds=config.transcript_min_seconds)
+
+    result = asyncio.run(summarize_video(video, client, transcript_provider=lambda video_id: transcript))
+
+    assert choose_mode(video.duration_seconds) == "transcript"
+    assert result.mode == "transcript"
+    assert all(isinstance(request["contents"], str) for request in client.requests)
+
+
+def test_long_video_without_transcript_falls_back_to_video_mode(video):
+    client = FakeGenAIClient()
+    video = replace(video, duration_seconds=config.transcript_min_seconds)
+    asked = []
+
+    result = asyncio.run(summarize_video(video, client, transcript_provider=lambda video_id: asked.append(video_id)))
+
+    assert asked == [video.video_id]
+    assert result.mode == "video"
+    assert result.requests == len(client.requests) == 1
+    assert client.requests[0]["contents"].parts[0].file_data.file_uri == video.url
+
+
+def test_short_video_never_asks_for_a_transcript(video):
+    client = FakeGenAIClient()
+    video = replace(video, duration_seconds=60)
+
+    def no_transcript(video_id):
+        raise AssertionError("transcript fetched for a short video")
+
+    result = asyncio.run(summarize_video(video, client, transcript_provider=no_transcript))
+
+    assert result.mode == "video"
+
+
+def counting(method, calls: list):
+    def call(**kwargs):
+        calls.append(kwargs)
+        return method(**kwargs)
+    return call
+
+
+def test_instruction_cache_is_created_once():
+    client = FakeGenAIClient()
+    cache = InstructionCache("instructions " * 100, ttl_s=600)
+
+    first = asyncio.run(cache.request_config(client))
+    second = asyncio.run(cache.request_config(client))
+
+    assert first.cached_content == second.cached_content == cache.name
+    assert first.system_instruction is None
+    assert list(client.cached_contents) == [cache.name]
+    assert cache.tokens == client.cached_contents[cache.name]
+    # Stored for one TTL so far
+    expected = cache.tokens * 600 / 3600 * config.ai_cache_storage_usd_per_mtok_hour / 1_000_000
+    assert cache.storage_usd == pytest.approx(expected, rel=1e-3)
+
+
+def test_instruction_cache_is_renewed_before_expiry():
+    client = FakeGenAIClient()
+    updates = []
+    client.caches.update = counting(client.caches.update, updates)
+    cache = InstructionCache("instructions " * 100, ttl_s=600)
+    name = asyncio.run(cache.request_config(client)).cached_content
+    storage_usd = cache.storage_usd
+
+    # Within the renewal margin: still valid, but no new request may reference it
+    cache.expires_at = time.monotonic() + cache.RENEW_MARGIN_S - 1
+
+    assert asyncio.run(cache.request_config(client)).cached_content == name
+    assert [update["name"] for update in updates] == [name]
+    assert len(client.cached_contents) == 1
+    assert cache.expires_at > time.monotonic() + 600 - 5
+    # Only the extension beyond the old expiry is billed again
+    assert cache.storage_usd - storage_usd == pytest.approx(storage_usd * (600 - cache.RENEW_MARGIN_S + 1) / 600, rel=1e-2)
+
+
+def test_instruction_cache_is_created_again_when_gone():
+    client = FakeGenAIClient()
+    creates = []
+    client.caches.create = counting(client.caches.create, creates)
+    cache = InstructionCache("instructions " * 100, ttl_s=600)
+    old = asyncio.run(cache.request_config(client)).cached_content
+    del client.cached_contents[old]
+    cache.expires_at = 0.0
+
+    new = asyncio.run(cache.request_config(client)).cached_content
+
+    # The update of the deleted cache failed, the instructions were registered again
+    assert len(creates) == 2
+    assert new == cache.name and new in client.cached_contents
+
+
+def test_instructions_are_sent_with_requests_when_cache_creation_fails():
+    client = FakeGenAIClient(min_cache_tokens=10**9)
+    creates = []
+    client.caches.create = counting(client.caches.create, creates)
+    cache = InstructionCache("instructions", ttl_s=600)
+
+    first = asyncio.run(cache.request_config(client))
+    second = asyncio.run(cache.request_config(client))
+
+    assert first.cached_content is None
+    assert first.system_instruction == second.system_instruction == "instructions"
+    # Not retried on every request, only after one TTL
+    assert len(creates) == 1
+    assert cache.retry_at > time.monotonic()
+    assert cache.storage_usd == 0.0
+
+
+@pytest.fixture
+def batch_videos(monkeypatch):
+    monkeypatch.setattr(config, "ai_batch_poll_s", 0)
+    return make_videos(make_channels(1)[0], 3)
+
+
+def test_batch_results_are_mapped_by_metadata_video_id(batch_videos):
+    client = FakeGenAIClient(batch_polls=2)
+    failed = batch_videos[1].video_id
+
+    def on_submit(job_name: str):
+        responses = client.batch_jobs[job_name]["responses"]
+        for inlined in responses:
+            video_id = inlined.metadata["video_id"]
+            inlined.response.text = f"summary of {video_id}"
+            if video_id == failed:
+                inlined.response, inlined.error = None, "RESOURCE_EXHAUSTED"
+        # Responses in another order than the requests
+        responses.reverse()
+
+    results = asyncio.run(summarize_batch(batch_videos, client, on_submit=on_submit))
+
+    assert set(results) == {video.video_id for video in batch_videos}
+    assert isinstance(results[failed], RuntimeError) and "RESOURCE_EXHAUSTED" in str(results[failed])
+    for video in batch_videos:
+        if video.video_id != failed:
+            assert results[video.video_id].text == f"summary of {video.video_id}"
+            assert results[video.video_id].batched
+    assert client.batch_jobs["batches/0"]["polls"] == 2
+
+
+def test_batch_requests_carry_the_instructions(batch_videos):
+    client = FakeGenAIClient()
+
+    asyncio.run(summarize_batch(batch_videos, client))
+
+    # The job may outlive any context cache, none is referenced or created
+    assert not client.cached_contents
+    assert all(
+        request["config"].system_instruction == google_ai.SUMMARY_INSTRUCTIONS and request["config"].cached_content is None
+        for request in client.requests
+    )
+
+
+@pytest.mark.parametrize("state", ["JOB_STATE_FAILED", "JOB_STATE_EXPIRED", "JOB_STATE_CANCELLED"])
+def test_unfinished_batch_fails_every_video(batch_videos, state):
+    client = FakeGenAIClient()
+    polls = []
+
+    async def get(name: str, config=None):
+        polls.append(name)
+        if len(polls) == 1:
+            return SimpleNamespace(name=name, state=SimpleNamespace(name="JOB_STATE_RUNNING"), error=None, dest=None)
+        return SimpleNamespace(name=name, state=SimpleNamespace(name=state), error="gone", dest=None)
+
+    client.aio.batches.get = get
+
+    # Resumed from a checkpoint: waits for the job instead of submitting again
+    results = asyncio.run(summarize_batch(batch_videos, client, job_name="batches/resumed"))
+
+    assert not client.batch_jobs
+    assert polls == ["batches/resumed"] * 2
+    assert set(results) == {video.video_id for video in batch_videos}
+    assert all(isinstance(error, RuntimeError) and state in str(error) for error in results.values())
@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+import jobs
+from config import config
+from database import DatabaseService, as_utc
+from fakes import make_channels, make_videos
+from jobs import JobWorker, PermanentJobError, enqueue_video_job, handler
+
+
+@pytest.fixture
+def db_service(mongo):
+    db_service = DatabaseService()
+    db_service.ensure_job_indexes()
+    return db_service
+
+
+@pytest.fixture
+def video():
+    return make_videos(make_channels(1)[0], 1)[0]
+
+
+@pytest.fixture
+def job_outcome(monkeypatch):
+    """Registers the ``test`` job kind, its behavior is set per test"""
+    monkeypatch.setattr(jobs, "HANDLERS", dict(jobs.HANDLERS))
+    outcome = {}
+
+    @handler("test")
+    def run(payload, db_service):
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    return outcome
+
+
+def stored_job(mongo, job_id: str) -> dict:
+    return mongo[config.mongo_jobs_collection_name].find_one({"_id": ObjectId(job_id)})
+
+
+def test_enqueue_dedupes_active_jobs(mongo, db_service, video):
+    first = enqueue_video_job(db_service, "summary", video)
+    second = enqueue_video_job(db_service, "summary", video)
+    other = enqueue_video_job(db_service, "duration", video)
+
+    assert first == second != other
+    assert mongo[config.mongo_jobs_collection_name].count_documents({}) == 2
+
+    # Once finished, the same work can be queued again
+    job = db_service.claim_job("worker", kinds=["summary"])
+    assert db_service.complete_job(job.job_id, job.owner, {"summary": "text"})
+    assert "active_key" not in stored_job(mongo, first)
+    assert enqueue_video_job(db_service, "summary", video) != first
+
+
+def test_claim_hides_the_job_for_its_lease(db_service):
+    job_id = db_service.enqueue_job("test", {"n": 1})
+
+    job = db_service.claim_job("worker-a")
+
+    assert (job.job_id, job.status, job.attempts, job.owner) == (job_id, "running", 1, "worker-a")
+    assert db_service.claim_job("worker-b") is None
+    assert db_service.extend_job_lease(job_id, "worker-a")
+    assert not db_service.extend_job_lease(job_id, "worker-b")
+
+
+def test_expired_lease_is_claimed_again(db_service):
+    job_id = db_service.enqueue_job("test", {"n": 1})
+    # Worker a stalls, its lease runs out right away
+    db_service.claim_job("worker-a", visibility_s=0)
+
+    job = db_service.claim_job("worker-b")
+
+    assert (job.job_id, job.owner, job.attempts) == (job_id, "worker-b", 2)
+    # The stalled run can no longer finish or fail the job
+    assert not db_service.complete_job(job_id, "worker-a", "late")
+    assert not db_service.fail_job(job_id, "worker-a", "late")
+    assert db_service.complete_job(job_id, "worker-b", "ok")
+
+
+def test_claim_order_is_priority_then_visibility(db_service):
+    low = db_service.enqueue_job("test", {}, priority=0)
+    high = db_service.enqueue_job("test", {}, priority=10)
+    later = db_service.enqueue_job("test", {}, priority=10, delay_s=3600)
+
+    claimed = [db_service.claim_job("worker").job_id for _ in range(2)]
+
+    assert claimed == [high, low]
+    assert db_service.claim_job("worker") is None
+    assert later not in claimed
+
+
+def test_failed_job_is_retried_with_backoff(mongo, db_service, job_outcome):
+    job_outcome["error"] = RuntimeError("flaky")
+    job_id = db_service.enqueue_job("test", {}, dedupe_key="test:1")
+    worker = JobWorker(db_service)
+
+    worker.run_job(db_service.claim_job("worker"))
+
+    doc = stored_job(mongo, job_id)
+    assert (doc["status"], doc["error"], doc["active_key"]) == ("queued", "flaky", "test:1")
+    assert as_utc(doc["visible_at"]) > datetime.now(timezone.utc)
+    assert worker.processed["retried"] == 1
+
+
+def test_job_fails_for_good_after_max_attempts(mongo, db_service, job_outcome):
+    job_outcome["error"] = RuntimeError("still broken")
+    job_id = db_service.enqueue_job("test", {}, dedupe_key="test:1", max_attempts=2)
+    worker = JobWorker(db_service)
+
+    for _ in range(2):
+        worker.run_job(db_service.claim_job("worker"))
+        # Skip the backoff
+        mongo[config.mongo_jobs_collection_name].update_one(
+            {"_id": ObjectId(job_id)}, {"$set": {"visible_at": datetime.now(timezone.utc)}}
+        )
+
+    doc = stored_job(mongo, job_id)
+    assert (doc["status"], doc["attempts"], doc["error"]) == ("failed", 2, "still broken")
+    assert "active_key" not in doc and doc["finished_at"] is not None
+    assert worker.processed == {"done": 0, "retried": 1, "failed": 1, "lost": 0}
+
+
+def test_permanent_error_is_not_retried(mongo, db_service, job_outcome):
+    job_outcome["error"] = PermanentJobError("bad payload")
+    job_id = db_service.enqueue_job("test", {})
+
+    JobWorker(db_service).run_job(db_service.claim_job("worker"))
+
+    assert stored_job(mongo, job_id)["status"] == "failed"
+
+
+def test_completed_job_stores_its_result(mongo, db_service, job_outcome):
+    job_outcome["result"] = {"summary": "text", "summary_preview": "text"}
+    job_id = db_service.enqueue_job("test", {}, dedupe_key="test:1")
+    worker = JobWorker(db_service)
+
+    worker.run_job(db_service.claim_job("worker"))
+
+    job = db_service.get_jobs([job_id])[job_id]
+    assert (job.status, job.result, job.error) == ("done", job_outcome["result"], None)
+    assert "active_key" not in stored_job(mongo, job_id)
+    assert worker.processed["done"] == 1
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from metrics import MAX_SAMPLES, Metrics, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_counts_errors_and_bytes():
+    metrics = Metrics()
+    for elapsed_ms in range(1, 101):
+        metrics.record("db.load", float(elapsed_ms), error=elapsed_ms > 98, nbytes=10)
+    metrics.add_bytes("db.load", 5)
+
+    summary = metrics.snapshot()["db.load"]
+
+    assert summary["count"] == 100
+    assert summary["errors"] == 2
+    assert summary["bytes"] == 1005
+    assert summary["total_ms"] == 5050.0
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"], summary["max_ms"]) == (50.0, 95.0, 99.0, 100.0)
+
+
+def test_samples_are_bounded():
+    metrics = Metrics()
+    for elapsed_ms in range(MAX_SAMPLES + 10):
+        metrics.record("op", float(elapsed_ms))
+
+    assert metrics.snapshot()["op"]["count"] == MAX_SAMPLES + 10
+    assert len(metrics.operations["op"].samples) == MAX_SAMPLES
+
+
+def test_timed_and_instrument_record_errors():
+    metrics = Metrics()
+
+    @metrics.instrument("sync")
+    def fails():
+        raise ValueError("boom")
+
+    @metrics.instrument("async")
+    async def succeeds():
+        return 42
+
+    with pytest.raises(ValueError):
+        fails()
+    assert asyncio.run(succeeds()) == 42
+
+    snapshot = metrics.snapshot()
+    assert (snapshot["sync"]["count"], snapshot["sync"]["errors"]) == (1, 1)
+    assert (snapshot["async"]["count"], snapshot["async"]["errors"]) == (1, 0)
+
+
+def test_merge_of_worker_dumps():
+    worker, parent = Metrics(), Metrics()
+    worker.record("op", 10.0, nbytes=3)
+    parent.record("op", 30.0, error=True)
+
+    parent.merge(worker.dump())
+
+    summary = parent.snapshot()["op"]
+    assert (summary["count"], summary["errors"], summary["bytes"], summary["total_ms"]) == (2, 1, 3, 40.0)
+    assert summary["max_ms"] == 30.0
+
+
+def test_openmetrics_export(tmp_path):
+    metrics = Metrics()
+    metrics.record("db.load", 10.0, nbytes=100)
+    metrics.record("db.load", 20.0, error=True)
+
+    metrics.export(str(tmp_path / "metrics.prom"))
+    lines = (tmp_path / "metrics.prom").read_text().splitlines()
+
+    assert "# TYPE app_operation_latency_ms summary" in lines
+    assert 'app_operation_latency_ms{operation="db.load",quantile="0.5"} 10.0' in lines
+    assert 'app_operation_latency_ms{operation="db.load",quantile="0.99"} 20.0' in lines
+    assert 'app_operation_latency_ms_count{operation="db.load"} 2' in lines
+    assert 'app_operation_latency_ms_sum{operation="db.load"} 30.0' in lines
+    assert 'app_operation_errors_total{operation="db.load"} 1' in lines
+    assert 'app_operation_bytes_total{operation="db.load"} 100' in lines
+    assert lines[-1] == "# EOF"
+
+
+def test_json_export(tmp_path):
+    metrics = Metrics()
+    metrics.record("op", 1.5)
+
+    metrics.export(str(tmp_path / "metrics.json"))
+
+    assert json.loads((tmp_path / "metrics.json").read_text())["op"]["p50_ms"] == 1.5
@@ -0,0 +1,55 @@
+import pytest
+
+import youtube
+from config import config
+from database import DatabaseService
+from fakes import FakeYouTube, make_channels
+from models import YTChannel
+from scheduler import FetchScheduler, ScheduledChannel
+
+
+@pytest.fixture
+def channel(mongo, monkeypatch):
+    channel = make_channels(1)[0]
+    fake = FakeYouTube([channel], videos_per_channel=200)
+    monkeypatch.setattr(youtube, "build_youtube", lambda: fake)
+    # $firstN is missing in mongomock, the history is set on each entry instead
+    monkeypatch.setattr(DatabaseService, "recent_upload_history", lambda self, channel_ids, per_channel: {})
+    return channel, fake
+
+
+def scheduled(channel: dict, known: int):
+    """Scheduler entry of a channel whose uploads from index ``known`` on are stored"""
+    channel, fake = channel
+    uploads = fake.playlists[channel["uploads_id"]]
+    DatabaseService().save_videos_bulk(uploads[known:])
+    scheduler = FetchScheduler([])
+    item = ScheduledChannel(0.0, YTChannel.from_dict(channel), latest_video_id=uploads[known].video_id)
+    return scheduler, item, fake
+
+
+def test_fetch_pages_until_last_known_upload(channel):
+    # More new uploads than fit on one page
+    scheduler, item, fake = scheduled(channel, known=25)
+
+    new = scheduler.fetch(item)
+
+    assert new == 25
+    assert fake.calls["playlistItems.list"] == 3
+    assert item.latest_video_id == fake.playlists[channel[0]["uploads_id"]][0].video_id
+
+
+def test_fetch_stops_at_page_cap(channel):
+    scheduler, item, fake = scheduled(channel, known=150)
+
+    new = scheduler.fetch(item)
+
+    assert new == config.scheduler_page_size * config.scheduler_max_pages
+    assert fake.calls["playlistItems.list"] == config.scheduler_max_pages
+
+
+def test_fetch_without_new_uploads_reads_one_page(channel):
+    scheduler, item, fake = scheduled(channel, known=0)
+
+    assert scheduler.fetch(item) == 0
+    assert fake.calls["playlistItems.list"] == 1
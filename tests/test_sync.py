@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from config import config
+from database import DatabaseService
+from fakes import make_channels, make_videos
+from local_store import LocalStore
+from sync import SyncEngine
+
+
+@pytest.fixture
+def video(mongo):
+    video = make_videos(make_channels(1)[0], 1)[0]
+    DatabaseService().save_videos_bulk([video])
+    return video
+
+
+@pytest.fixture
+def store(tmp_path, video):
+    store = LocalStore(str(tmp_path / "local.db"))
+    SyncEngine(store).sync_once()
+    yield store
+    store.close()
+
+
+def remote(mongo, video_id: str) -> dict:
+    return mongo[config.mongo_collection_name].find_one({"video_id": video_id})
+
+
+def test_offline_change_survives_remote_change_of_another_field(mongo, store, video):
+    store.update_video_seen_status(video.video_id, True)
+    # Meanwhile the job worker saves a summary, which bumps the version
+    DatabaseService().save_summaries_bulk({video.video_id: "A summary"})
+
+    result = SyncEngine(store).sync_once()
+
+    assert (result.pushed, result.dropped) == (1, 0)
+    doc = remote(mongo, video.video_id)
+    assert doc["seen"] is True
+    assert doc["summary"] == "A summary"
+
+
+def test_offline_change_loses_to_newer_remote_change_of_the_same_field(mongo, store, video):
+    store.update_video_seen_status(video.video_id, True)
+    # MongoDB stores milliseconds, make sure the remote change is strictly newer
+    time.sleep(0.01)
+    DatabaseService().update_video_seen_status(video.video_id, False)
+
+    result = SyncEngine(store).sync_once()
+
+    assert (result.pushed, result.dropped) == (0, 1)
+    assert remote(mongo, video.video_id)["seen"] is False
+    # The pull brings the remote value back into the local store
+    assert store.find_videos(video.channel_id)[0].seen is False
+
+
+def test_offline_change_without_conflict_is_applied(mongo, store, video):
+    store.update_video_seen_status(video.video_id, True)
+
+    result = SyncEngine(store).sync_once()
+
+    assert (result.pushed, result.dropped) == (1, 0)
+    doc = remote(mongo, video.video_id)
+    assert doc["seen"] is True and doc["version"] == 1
+
+
+def test_changed_videos_are_found_by_index(mongo):
+    DatabaseService().ensure_indexes()
+
+    keys = [list(index["key"]) for index in mongo[config.mongo_collection_name].list_indexes()]
+
+    assert ["updated_at"] in keys
+
+
+class SyncingApp:
+    """The parts of MyApp that sync_with_remote uses, call_from_thread runs inline"""
+
+    def __init__(self):
+        from video_store import StoreReloaded, VideoStore
+
+        self.store = VideoStore({})
+        self.reloads = 0
+        self.store.subscribe(lambda event: setattr(self, "reloads", self.reloads + isinstance(event, StoreReloaded)))
+
+    def call_from_thread(self, callback, *args):
+        return callback(*args)
+
+
+def test_app_store_is_reloaded_after_a_sync_that_pulled_changes(monkeypatch, store, video):
+    import main
+
+    monkeypatch.setattr(main, "get_store", lambda: store)
+    app = SyncingApp()
+    # Changed remotely, e.g. on another machine
+    DatabaseService().update_video_seen_status(video.video_id, True)
+
+    main.MyApp.sync_with_remote(app)
+
+    assert app.reloads == 1
+    assert app.store.get(video.video_id).seen is True
+
+    # Nothing changed remotely: the store is left alone
+    main.MyApp.sync_with_remote(app)
+
+    assert app.reloads == 1
@@ -0,0 +1,58 @@
+import asyncio
+
+from config import config
+from websub import LocalHub, WebSubServer, http_request, parse_atom_entries
+
+CHANNEL_ID = "UC46xhU1EH7aywEgvA9syS3w"
+
+
+def port_of(server: asyncio.Server) -> int:
+    return server.sockets[0].getsockname()[1]
+
+
+async def until(condition, timeout: float = 5.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+async def publish_through_local_hub(body: bytes) -> WebSubServer:
+    """Subscribe a WebSubServer to a LocalHub, publish ``body`` and wait until it is ingested"""
+    hub = LocalHub()
+    hub_server = await hub.start("127.0.0.1", 0)
+    server = WebSubServer("http://unbound", hub_url=f"http://127.0.0.1:{port_of(hub_server)}/", secret="local-secret")
+    callback_server = await server.start("127.0.0.1", 0)
+    server.callback_url = f"http://127.0.0.1:{port_of(callback_server)}/websub"
+
+    async with hub_server, callback_server:
+        channel_id = parse_atom_entries(body)[0].channel_id
+        assert await server.subscribe(channel_id)
+        await until(lambda: hub.subscribers)
+        assert await hub.publish(channel_id, body) == 1
+        await until(lambda: server.received)
+    return server
+
+
+def test_notification_is_upserted(mongo, fixture_bytes):
+    server = asyncio.run(publish_through_local_hub(fixture_bytes("websub_notification.xml")))
+
+    assert server.received == 1
+    doc = mongo[config.mongo_collection_name].find_one({"video_id": "dQw4w9WgXcQ"})
+    assert doc["channel_id"] == CHANNEL_ID
+    assert doc["seen"] is False and doc["version"] == 0
+
+
+def test_notification_with_bad_signature_is_ignored(mongo, fixture_bytes):
+    async def post_unsigned() -> int:
+        server = WebSubServer("http://unbound", secret="local-secret")
+        callback_server = await server.start("127.0.0.1", 0)
+        async with callback_server:
+            status, _ = await asyncio.to_thread(
+                http_request, f"http://127.0.0.1:{port_of(callback_server)}/websub",
+                fixture_bytes("websub_notification.xml"), {"X-Hub-Signature": "sha1=0"},
+            )
+        return status
+
+    # Acknowledged like the spec asks, but nothing is written
+    assert asyncio.run(post_unsigned()) == 204
+    assert mongo[config.mongo_collection_name].count_documents({}) == 0